@@ -21,12 +21,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-tjsyhl371r5w7_k7^qg4lq0)_t9#)!!5gywx7($(x@9a95wk70"
+SECRET_KEY = os.getenv(
+    "SECRET_KEY",
+    "django-insecure-tjsyhl371r5w7_k7^qg4lq0)_t9#)!!5gywx7($(x@9a95wk70",
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = bool(int(os.getenv("DEBUG", 0)))
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
 
 
 # Application definition
@@ -38,14 +41,23 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # third party packages
     "rest_framework.authtoken",
     # project apps
     "core",
     "user",
+    "recipe",
+    "jobs",
 ]
 
 MIDDLEWARE = [
+    # no-op unless METRICS["ENABLED"]
+    "core.metrics.MetricsMiddleware",
+    # no-op unless QUERY_PROFILING["ENABLED"]
+    "core.profiling.QueryProfilingMiddleware",
+    # no-op unless COMPRESSION["ENABLED"]
+    "core.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -79,17 +91,40 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE: seconds a connection is reused across requests (0 opens
+#   one per request)
+# DB_CONN_HEALTH_CHECKS: ping a reused connection when a request starts, so a
+#   connection dropped by the server is replaced instead of failing the request
+# DB_STATEMENT_TIMEOUT: milliseconds before PostgreSQL cancels a statement
+# DB_PGBOUNCER: the server is a PgBouncer in transaction pooling mode; server
+#   side cursors and connection startup options do not survive it, so set
+#   statement_timeout on the database role instead (ALTER ROLE ... SET ...)
+
+DB_PGBOUNCER = bool(int(os.getenv("DB_PGBOUNCER", 0)))
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 0))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
         "HOST": os.getenv("DB_HOST"),
+        "PORT": os.getenv("DB_PORT", ""),
         "NAME": os.getenv("DB_NAME"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
-        "OPTIONS": {},
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": bool(int(os.getenv("DB_CONN_HEALTH_CHECKS", 1))),
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
+        "OPTIONS": {
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
 
+if DB_STATEMENT_TIMEOUT and not DB_PGBOUNCER:
+    DATABASES["default"]["OPTIONS"].update(
+        options=f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -109,6 +144,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# New hashes use PASSWORD_HASH_ITERATIONS rounds of PBKDF2, pick it with
+# `manage.py bench_hashers`. Stored hashes made with another count (or an
+# older hasher) are replaced in the background after the next login
+
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", 260000))
+
+PASSWORD_HASHERS = [
+    "core.hashers.TunablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -138,3 +187,203 @@ MEDIA_ROOT = "/vol/web/media/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "core.User"
+
+# Token authentication cache (see user.authentication.CachedTokenAuthentication)
+# CACHE_ALIAS points at an entry of CACHES shared by all workers, where a
+# revoked token or deactivated user is dropped for every worker at once.
+# Leave it unset to use a per-process LRU instead, whose entries live for
+# LOCAL_TIMEOUT seconds: the other workers keep accepting a revoked token
+# for that long, so keep it short
+
+TOKEN_AUTH_CACHE = {
+    "MAXSIZE": int(os.getenv("TOKEN_AUTH_CACHE_MAXSIZE", 1024)),
+    "LOCAL_TIMEOUT": int(os.getenv("TOKEN_AUTH_CACHE_LOCAL_TIMEOUT", 5)),
+    "CACHE_ALIAS": os.getenv("TOKEN_AUTH_CACHE_ALIAS") or None,
+    "TIMEOUT": int(os.getenv("TOKEN_AUTH_CACHE_TIMEOUT", 300)),
+}
+
+# Thread pools running blocking work (see core.pools): "database" for ORM
+# calls of the async views, "hashing" for every password check made through
+# authenticate() and for hashing in the async views. Sized separately so a
+# burst of logins cannot starve plain queries; once HASHING_POOL_MAX_PENDING
+# checks are queued, logins are answered 503 instead of piling up
+
+BLOCKING_POOLS = {
+    "database": {"MAX_WORKERS": int(os.getenv("DATABASE_POOL_WORKERS", 8))},
+    "hashing": {
+        "MAX_WORKERS": int(os.getenv("HASHING_POOL_WORKERS", os.cpu_count() or 1)),
+        "MAX_PENDING": int(os.getenv("HASHING_POOL_MAX_PENDING", 32)),
+    },
+}
+
+AUTHENTICATION_BACKENDS = ["user.backends.PooledModelBackend"]
+
+# Caches
+# "throttle" holds the login rate limit counters. It is local to each worker
+# process, so with N processes a client gets up to N times the rates below;
+# point it at a shared cache to enforce them exactly
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
+}
+
+# Recipe response cache (see recipe.cache). CACHE_ALIAS must name a cache
+# shared by every worker; unset, responses are not cached and have no ETag
+
+RECIPE_CACHE = {
+    "CACHE_ALIAS": os.getenv("RECIPE_CACHE_ALIAS") or None,
+    "TIMEOUT": int(os.getenv("RECIPE_CACHE_TIMEOUT", 600)),
+}
+
+# Query profiling (see core.profiling): per request query count, database
+# time and repeated statements in a Server-Timing header and a JSON log
+# record. A statement run N1_THRESHOLD times in one request is flagged as a
+# likely N+1; with STRICT, a view running more queries than its
+# `query_budget` fails instead of being logged
+
+QUERY_PROFILING = {
+    "ENABLED": bool(int(os.getenv("QUERY_PROFILING", 0))),
+    "N1_THRESHOLD": int(os.getenv("QUERY_PROFILING_N1_THRESHOLD", 5)),
+    "STRICT": bool(int(os.getenv("QUERY_PROFILING_STRICT", 0))),
+}
+
+# Response compression (see core.compression): brotli (when installed) or
+# gzip, as the client accepts, for bodies of at least MIN_SIZE bytes of the
+# CONTENT_TYPES below. GZIP_LEVEL and BROTLI_QUALITY trade CPU per request
+# for bytes on the wire, see benchmarks/compression.py
+
+COMPRESSION = {
+    "ENABLED": bool(int(os.getenv("COMPRESSION", 1))),
+    "MIN_SIZE": int(os.getenv("COMPRESSION_MIN_SIZE", 1024)),
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/vnd.oai.openapi+json",
+        "text/plain",
+        "text/html",
+    ],
+    "GZIP_LEVEL": int(os.getenv("COMPRESSION_GZIP_LEVEL", 4)),
+    "BROTLI_QUALITY": int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4)),
+}
+
+# Background jobs (see jobs.brokers), run by `manage.py run_jobs`. A failed
+# job is retried up to MAX_ATTEMPTS times, RETRY_DELAY seconds after its
+# first attempt and twice as long after each next one. A worker that has not
+# finished a job LEASE seconds after claiming it is presumed dead and the job
+# runs again. Done jobs, and their idempotency keys, are deleted after
+# RETENTION_DAYS
+
+JOBS = {
+    "BROKER": os.getenv("JOBS_BROKER", "jobs.brokers.DatabaseBroker"),
+    "MAX_ATTEMPTS": int(os.getenv("JOBS_MAX_ATTEMPTS", 5)),
+    "RETRY_DELAY": int(os.getenv("JOBS_RETRY_DELAY", 10)),
+    "LEASE": int(os.getenv("JOBS_LEASE", 300)),
+    "RETENTION_DAYS": int(os.getenv("JOBS_RETENTION_DAYS", 7)),
+}
+
+# Email, sent by the background jobs of user.tasks
+
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 25))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = bool(int(os.getenv("EMAIL_USE_TLS", 0)))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+
+# Prometheus metrics (see core.metrics) served on /metrics to scrapers
+# sending "Authorization: Bearer <TOKEN>". Without a TOKEN the endpoint is
+# only served with DEBUG on, as the metrics reveal the paths and traffic.
+# With several worker processes, PROMETHEUS_MULTIPROC_DIR must name an empty
+# directory writable by all of them (scripts/run.sh sets it up)
+
+METRICS = {
+    "ENABLED": bool(int(os.getenv("METRICS_ENABLED", 1))),
+    "TOKEN": os.getenv("METRICS_TOKEN") or None,
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.profiling": {"handlers": ["console"], "level": "INFO"},
+        "jobs": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+# JSON is rendered and parsed with orjson (core.renderers, core.parsers),
+# which fall back to the stdlib json module when orjson is not installed;
+# FAST_JSON=0 goes back to DRF's own JSONRenderer and JSONParser
+
+FAST_JSON = bool(int(os.getenv("FAST_JSON", 1)))
+
+# Login attempts (user:token) allowed per client IP and per email address,
+# checked before any password is hashed. The client IP is REMOTE_ADDR unless
+# NUM_PROXIES trusted proxies sit in front and set X-Forwarded-For: leaving
+# it unset would let every client pick its IP with that header
+
+REST_FRAMEWORK = {
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": os.getenv("LOGIN_THROTTLE_IP_RATE", "60/min"),
+        "login_email": os.getenv("LOGIN_THROTTLE_EMAIL_RATE", "10/min"),
+    },
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+if not FAST_JSON:
+    # DRF's defaults: the same classes, with its own JSONRenderer and JSONParser
+    del REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"]
+    del REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"]
+
+# Settings profiles
+# SETTINGS_PROFILE=test makes the test suite fast: a cheap password hasher
+# (PBKDF2 is deliberately slow and most tests create users), no middleware
+# the API tests do not exercise and, unless TEST_DATABASE=postgresql, an
+# in-memory SQLite database. PostgreSQL only tests are skipped on SQLite.
+# Views exceeding their query budget fail the tests that call them.
+# Background jobs run as soon as they are enqueued.
+# Never use it to serve requests.
+
+SETTINGS_PROFILE = os.getenv("SETTINGS_PROFILE", "default")
+
+if SETTINGS_PROFILE == "test":
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    MIDDLEWARE = [
+        middleware
+        for middleware in MIDDLEWARE
+        if middleware
+        not in (
+            "django.middleware.security.SecurityMiddleware",
+            "django.middleware.csrf.CsrfViewMiddleware",
+            "django.middleware.clickjacking.XFrameOptionsMiddleware",
+        )
+    ]
+    # every test request checks the query budgets of the views, quietly
+    QUERY_PROFILING = {**QUERY_PROFILING, "ENABLED": True, "STRICT": True}
+    LOGGING["loggers"]["core.profiling"]["level"] = "ERROR"
+    JOBS = {**JOBS, "BROKER": "jobs.brokers.EagerBroker"}
+    LOGGING["loggers"]["jobs"]["level"] = "CRITICAL"
+    if os.getenv("TEST_DATABASE", "sqlite") == "sqlite":
+        DATABASES = {
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": BASE_DIR / "db.sqlite3",
+                "TEST": {"NAME": ":memory:"},
+            }
+        }
+        # covering indexes (INCLUDE) are PostgreSQL only, SQLite builds
+        # them without their non-key columns
+        SILENCED_SYSTEM_CHECKS = ["models.W040"]
@@ -2,4 +2,14 @@ from django.contrib import admin
 from django.urls import path
 from django.conf.urls import include
 
-urlpatterns = [path("admin/", admin.site.urls), path("user/", include("user.urls"))]
+from core.views import ExportView, healthz, metrics, readyz
+
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("user/", include("user.urls")),
+    path("recipe/", include("recipe.urls")),
+    path("healthz", healthz, name="healthz"),
+    path("readyz", readyz, name="readyz"),
+    path("metrics", metrics, name="metrics"),
+    path("export/<str:dataset>", ExportView.as_view(), name="export"),
+]
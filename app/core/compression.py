@@ -0,0 +1,116 @@
+"""
+Response compression for API payloads: brotli or gzip, whichever the client
+prefers, for bodies of at least COMPRESSION["MIN_SIZE"] bytes whose content
+type is in COMPRESSION["CONTENT_TYPES"]. Unlike Django's GZipMiddleware,
+small bodies, which cost more CPU to compress than the bytes it saves, and
+binary or already compressed content are passed through. brotli is
+optional: without it, only gzip is offered
+"""
+
+import asyncio
+import gzip
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepted_encodings(header):
+    """{coding: q} of an Accept-Encoding header, without the refused codings"""
+    codings = {}
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            codings[coding.lower()] = q
+    return codings
+
+
+def weak_etag_match(etag, etags):
+    """
+    Whether `etag` is in `etags` (see django.utils.http.parse_etags) by the
+    weak comparison If-None-Match calls for: W/"x" matches "x". The ETag of
+    a response this middleware encodes is made weak
+    """
+    if "*" in etags:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == opaque for candidate in etags)
+
+
+class CompressionMiddleware:
+    """
+    Off unless COMPRESSION["ENABLED"]; goes before anything reading the
+    body. Async capable, so it does not put ASGI requests on one thread
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = settings.COMPRESSION
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = options["MIN_SIZE"]
+        self.content_types = set(options["CONTENT_TYPES"])
+        self.gzip_level = options["GZIP_LEVEL"]
+        self.brotli_quality = options["BROTLI_QUALITY"]
+        if asyncio.iscoroutinefunction(get_response):
+            # what Django checks to await this middleware, see MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < self.min_size
+            or response.get("Content-Type", "").partition(";")[0].strip()
+            not in self.content_types
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        codings = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        br, gz = codings.get("br", 0), codings.get("gzip", 0)
+        if brotli is not None and br and br >= gz:
+            coding = "br"
+            content = brotli.compress(response.content, quality=self.brotli_quality)
+        elif gz:
+            coding = "gzip"
+            content = gzip.compress(
+                response.content, compresslevel=self.gzip_level, mtime=0
+            )
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = coding
+        # the encoded bytes differ from those a strong ETag stands for
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
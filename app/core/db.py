@@ -0,0 +1,56 @@
+"""
+Database helpers shared by the project apps
+"""
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, migrations
+
+
+def is_postgresql(connection) -> bool:
+    return connection.vendor == "postgresql"
+
+
+class RunPostgreSQL(migrations.RunSQL):
+    """
+    RunSQL for PostgreSQL specific DDL (GIN indexes, extensions, ...).
+    On any other backend the operation is skipped, so the schema still
+    migrates there, just without the PostgreSQL only optimisations
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgresql(schema_editor.connection):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgresql(schema_editor.connection):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def ping(alias: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Cheapest possible round trip to the database, raising DatabaseError when
+    it cannot be reached. A failed connection is closed so that the next
+    call opens a fresh one
+    """
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        connection.close()
+        raise
+
+
+def close_unusable_connections(**kwargs):
+    """
+    request_started handler implementing the CONN_HEALTH_CHECKS database
+    option: Django 3.2 only notices that a persistent connection was closed
+    by the server (restart, idle timeout, failover) when a query fails.
+    Reused connections are pinged instead and reopened if they are dead
+    """
+    for connection in connections.all():
+        if (
+            connection.settings_dict.get("CONN_HEALTH_CHECKS")
+            and connection.connection is not None
+            and not connection.is_usable()
+        ):
+            connection.close()
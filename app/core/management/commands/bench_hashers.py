@@ -0,0 +1,102 @@
+"""
+Command to time the configured password hashers on this machine, to pick
+PASSWORD_HASH_ITERATIONS (or the cost of another hasher) for a latency budget
+"""
+
+import statistics
+import time
+from typing import Optional, Any
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+# the attribute holding the work factor of the hashers shipped with Django
+COST_ATTRIBUTES = ("iterations", "rounds", "time_cost")
+
+
+class Command(BaseCommand):
+    """Django command measuring how long one password hash takes"""
+
+    help = "Time each password hasher at its configured or the given cost"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hasher",
+            action="append",
+            dest="hashers",
+            help="Dotted path of a hasher to time (default: PASSWORD_HASHERS)",
+        )
+        parser.add_argument(
+            "--cost",
+            action="append",
+            dest="costs",
+            type=int,
+            help="Iterations/rounds/time cost to time (default: the configured one)",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=5,
+            help="Hashes timed per hasher and cost (default: 5)",
+        )
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            help="Suggest the iteration count hashing in this many milliseconds",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        if options["samples"] < 1:
+            raise CommandError("--samples must be at least 1")
+        if options["hashers"]:
+            hashers = [import_string(path)() for path in options["hashers"]]
+        else:
+            hashers = get_hashers()
+
+        for hasher in hashers:
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(
+                        f"{hasher.algorithm:<24} skipped, library not installed"
+                    )
+                    continue
+            attribute = next(
+                (name for name in COST_ATTRIBUTES if hasattr(hasher, name)), None
+            )
+            if not attribute:
+                costs = [None]
+            else:
+                costs = options["costs"] or [getattr(hasher, attribute)]
+            for cost in costs:
+                median, fastest = self.time_hasher(hasher, attribute, cost, options)
+                label = f"{attribute}={cost}" if attribute else "fixed cost"
+                self.stdout.write(
+                    f"{hasher.algorithm:<24} {label:<20} "
+                    f"median={median:9.2f}ms min={fastest:9.2f}ms "
+                    f"{1000 / median:8.1f} hashes/s per thread"
+                )
+                if options["target_ms"] and attribute == "iterations":
+                    # PBKDF2 run time grows linearly with the iteration count
+                    suggested = int(cost * options["target_ms"] / median)
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"{'':<24} ~{suggested} iterations for "
+                            f"{options['target_ms']:g}ms"
+                        )
+                    )
+
+    def time_hasher(self, hasher, attribute, cost, options):
+        """Median and fastest time of one hash, in milliseconds"""
+        if attribute:
+            # a subclass, as the cost may be a read-only property
+            hasher = type(type(hasher).__name__, (type(hasher),), {attribute: cost})()
+        samples = []
+        for _ in range(options["samples"]):
+            salt = hasher.salt()
+            started = time.perf_counter()
+            hasher.encode("correct horse battery staple", salt)
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples), min(samples)
@@ -0,0 +1,54 @@
+"""
+Command to merge ingredients and tags whose names only differ by case or
+spacing, e.g. rows written with bulk operations or raw SQL, which bypass
+the normalisation of NamedModel.save()
+"""
+
+from typing import Optional, Any
+
+from django.core.management.base import BaseCommand
+
+from core.models import Ingredient, Recipe, Tag
+from core.names import find_duplicates, merge_duplicates, update_name_keys
+
+
+class Command(BaseCommand):
+    """Django command to deduplicate Ingredient and Tag names"""
+
+    help = "Merge duplicate ingredients and tags, repointing their recipe links"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Names merged per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the duplicates",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        for label, model, through, field_name in (
+            ("ingredients", Ingredient, Recipe.ingredients.through, "ingredient"),
+            ("tags", Tag, Recipe.tags.through, "tag"),
+        ):
+            if options["dry_run"]:
+                duplicates = find_duplicates(model)
+                count = sum(len(pks) for pks in duplicates.values())
+                self.stdout.write(
+                    f"{label}: {count} duplicates of {len(duplicates)} names"
+                )
+                continue
+            merged = merge_duplicates(
+                model, through, field_name, batch_size=options["batch_size"]
+            )
+            normalised = update_name_keys(model)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label}: merged {merged} duplicates, "
+                    f"normalised {normalised} names"
+                )
+            )
@@ -0,0 +1,97 @@
+"""
+Command to export users, recipes or reviews as gzip-compressed JSON Lines
+or CSV in constant memory, e.g. for the nightly analytics export. With
+--state the export is incremental: only the rows added since the previous
+run with the same state file are exported
+"""
+
+import json
+import os
+import sys
+from typing import Optional, Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import DATASETS, FORMATS, Export
+
+
+class Command(BaseCommand):
+    """Django command to stream a dataset to a gzip file"""
+
+    help = "Export users, recipes or reviews to gzip-compressed JSONL or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(DATASETS))
+        parser.add_argument(
+            "--format", choices=FORMATS, default="jsonl", help="(default: jsonl)"
+        )
+        parser.add_argument(
+            "--output",
+            help="Output file, - for stdout (default: <dataset>.<format>.gz)",
+        )
+        watermark = parser.add_mutually_exclusive_group()
+        watermark.add_argument(
+            "--since-id",
+            type=int,
+            default=0,
+            help="Only export rows with a greater primary key",
+        )
+        watermark.add_argument(
+            "--state",
+            help="JSON file holding the last exported primary key of each "
+            "dataset, read before and updated after the export",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows fetched from the database at a time (default: 2000)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        dataset = options["dataset"]
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be a positive integer")
+        output = options["output"] or f"{dataset}.{options['format']}.gz"
+        state = self.read_state(options["state"]) if options["state"] else {}
+        since = state.get(dataset, options["since_id"])
+
+        export = Export(dataset, options["format"], since, options["chunk_size"])
+        try:
+            if output == "-":
+                self.write(export, sys.stdout.buffer)
+            else:
+                # a failed export leaves neither a partial file nor a moved
+                # watermark behind
+                with open(f"{output}.tmp", "wb") as stream:
+                    self.write(export, stream)
+                os.replace(f"{output}.tmp", output)
+            if options["state"]:
+                self.write_state(options["state"], {**state, dataset: export.watermark})
+        except OSError as e:
+            raise CommandError(e)
+
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Exported {export.count} {dataset} to {output}, "
+                f"watermark {export.watermark}"
+            )
+        )
+
+    def write(self, export, stream):
+        for data in export.gzip():
+            stream.write(data)
+
+    def read_state(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+    def write_state(self, path, state):
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(f"{path}.tmp", path)
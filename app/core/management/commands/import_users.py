@@ -0,0 +1,226 @@
+"""
+Command to import users in bulk from a CSV or JSON Lines file.
+Passwords are hashed in a process pool and users inserted with bulk_create,
+rows that fail validation go to a reject file instead of aborting the run
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Optional, Any
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connections, transaction
+
+OPTIONAL_FIELDS = ("first_name", "last_name", "username")
+
+
+def init_worker():
+    """Pool processes started with "spawn" (macOS, Windows) need Django set up"""
+    if not apps.ready:
+        django.setup()
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) without loading the whole file"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, {"__error__": f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(row, dict):
+            row = {"__error__": "Expected a JSON object"}
+        yield line_number, row
+
+
+class Command(BaseCommand):
+    """Django command to import users from CSV/JSONL"""
+
+    help = "Import users from a CSV or JSON Lines file (use - for stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file, - to read stdin")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: guessed from the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users hashed and inserted per batch (default: 1000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Password hashing processes, 0 hashes inline (default: all cores)",
+        )
+        parser.add_argument(
+            "--rejects",
+            default="rejects.csv",
+            help="CSV file receiving the rows that were not imported",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        path = options["path"]
+        fmt = options["format"] or (
+            "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+        )
+        if fmt == "csv" and path == "-" and options["format"] is None:
+            raise CommandError("--format is required when reading stdin")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer")
+
+        self.model = get_user_model()
+        self.seen = set()
+        self.imported = self.rejected = 0
+        workers = options["workers"]
+        pool = None
+        if workers > 0:
+            # children must not inherit open database sockets (unless we are
+            # inside a transaction, which closing would abort)
+            for connection in connections.all():
+                if not connection.in_atomic_block:
+                    connection.close()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        self.hash_passwords = (
+            (lambda passwords: pool.map(make_password, passwords, chunksize=32))
+            if pool
+            else (lambda passwords: map(make_password, passwords))
+        )
+
+        started = time.perf_counter()
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            with stream, open(options["rejects"], "w", newline="") as rejects_file:
+                self.rejects = csv.writer(rejects_file)
+                self.rejects.writerow(["line", "email", "error"])
+                rows = read_rows(stream, fmt)
+                while True:
+                    batch = list(islice(rows, options["batch_size"]))
+                    if not batch:
+                        break
+                    self.import_batch(batch)
+                    if options["verbosity"] > 1:
+                        self.stdout.write(
+                            f"{self.imported} imported, {self.rejected} rejected"
+                        )
+        except OSError as e:
+            raise CommandError(e)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        rate = (self.imported + self.rejected) / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {self.imported} users, rejected {self.rejected} rows "
+                f"in {elapsed:.1f}s ({rate:.0f} rows/s)"
+            )
+        )
+        if self.rejected:
+            self.stdout.write(
+                self.style.WARNING(f"Rejected rows written to {options['rejects']}")
+            )
+
+    def reject(self, line, email, error):
+        self.rejects.writerow([line, email or "", error])
+        self.rejected += 1
+
+    def clean_row(self, row):
+        """Return the user fields of a row, raising ValidationError on bad input"""
+        if "__error__" in row:
+            raise ValidationError(row["__error__"])
+        email = (row.get("email") or "").strip()
+        if not email:
+            raise ValidationError("User must provide a valid email address")
+        validate_email(email)
+        if not row.get("password"):
+            raise ValidationError("User must provide a password")
+
+        fields = {"email": self.model.objects.normalize_email(email)}
+        for name in OPTIONAL_FIELDS:
+            value = row.get(name) or None
+            max_length = self.model._meta.get_field(name).max_length
+            if value is not None and len(value) > max_length:
+                raise ValidationError(f"{name} is longer than {max_length} characters")
+            fields[name] = value
+        return fields
+
+    def import_batch(self, batch):
+        pending = []
+        for line, row in batch:
+            try:
+                fields = self.clean_row(row)
+            except ValidationError as e:
+                self.reject(line, row.get("email"), "; ".join(e.messages))
+                continue
+            if fields["email"] in self.seen:
+                self.reject(line, fields["email"], "Duplicate email in input")
+                continue
+            self.seen.add(fields["email"])
+            pending.append((line, fields, row["password"]))
+
+        existing = set(
+            self.model.objects.filter(
+                email__in=[fields["email"] for _, fields, _ in pending]
+            ).values_list("email", flat=True)
+        )
+        new = []
+        for line, fields, password in pending:
+            if fields["email"] in existing:
+                self.reject(
+                    line, fields["email"], "A user with this email already exists"
+                )
+            else:
+                new.append((line, fields, password))
+        if not new:
+            return
+
+        hashes = self.hash_passwords([password for _, _, password in new])
+        users = [
+            self.model(password=hashed, **fields)
+            for (_, fields, _), hashed in zip(new, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(users)
+        except IntegrityError:
+            # a concurrent writer created some of these emails since the check
+            with transaction.atomic():
+                self.model.objects.bulk_create(users, ignore_conflicts=True)
+            inserted = set(
+                self.model.objects.filter(
+                    email__in=[user.email for user in users],
+                    password__in=[user.password for user in users],
+                ).values_list("email", flat=True)
+            )
+            for (line, fields, _), user in zip(new, users):
+                if user.email not in inserted:
+                    self.reject(
+                        line, user.email, "A user with this email already exists"
+                    )
+            self.imported += len(inserted)
+            return
+        self.imported += len(users)
@@ -0,0 +1,45 @@
+"""
+Command to recompute the denormalised rating aggregates of every recipe,
+e.g. after reviews were changed with bulk queryset operations
+"""
+
+from typing import Optional, Any
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from core.models import Recipe
+
+
+class Command(BaseCommand):
+    """Django command to rebuild Recipe.review_count/rating_sum/rating_avg"""
+
+    help = "Recompute recipe rating aggregates in primary key batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of recipes updated per statement (default: 5000)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        batch_size = options["batch_size"]
+        bounds = Recipe.objects.aggregate(low=Min("pk"), high=Max("pk"))
+        if bounds["low"] is None:
+            self.stdout.write("No recipes to rebuild")
+            return
+
+        updated = 0
+        # primary key ranges keep every UPDATE short and its row locks few
+        for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+            with transaction.atomic():
+                updated += Recipe.objects.filter(
+                    pk__gte=start, pk__lt=start + batch_size
+                ).refresh_ratings()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt rating aggregates of {updated} recipes")
+        )
@@ -3,28 +3,65 @@ Command class to tell the project to wait for the database to be available
 so we can avoid race condition
 """
 
+import random
 import time
 from typing import Optional, Any
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
 from django.db.utils import OperationalError
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from core.db import ping
+
 
 class Command(BaseCommand):
     """Django command to wait for database"""
 
+    # the system checks are not needed to open a connection
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait before giving up (default: 60)",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Upper bound of the delay between attempts (default: 5)",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def backoff(self, attempt: int, max_delay: float) -> float:
+        """Exponential backoff from 0.1s with jitter, so replicas do not retry in lockstep"""
+        ceiling = min(max_delay, 0.1 * 2**attempt)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
     def handle(self, *args: Any, **options: Any) -> Optional[str]:
         self.stdout.write("Waiting for database...")
-        db_up = False
-        while db_up is False:
+        deadline = time.monotonic() + options["timeout"]
+        attempt = 0
+        while True:
             try:
-                self.check(databases=["default"])
-                db_up = True
+                ping(options["database"])
+                break
             except (Psycopg2Error, OperationalError):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']:g} sec"
+                    )
+                delay = min(remaining, self.backoff(attempt, options["max_delay"]))
+                attempt += 1
                 self.stdout.write(
-                    self.style.WARNING("Database unavailable, retrying in 1 sec...")
+                    self.style.WARNING(
+                        f"Database unavailable, retrying in {delay:.2f} sec..."
+                    )
                 )
-                time.sleep(1)
+                time.sleep(delay)
         self.stdout.write(self.style.SUCCESS("Database available!"))
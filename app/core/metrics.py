@@ -0,0 +1,189 @@
+"""
+Prometheus metrics, scraped on /metrics (core.views.metrics):
+
+    http_request_duration_seconds   latency per view and method
+    http_requests_total             requests per view, method and status
+    http_requests_in_progress       requests being served
+    auth_logins_total               token endpoint logins per result
+    password_hash_duration_seconds  time of every hash made or checked
+    db_queries_total                queries run by requests
+    db_query_duration_seconds_total time spent in them
+    db_connections_opened_total     connections opened to each database
+    blocking_pool_*                 tasks and queueing of core.pools
+
+uWSGI, Gunicorn and uvicorn serve with several worker processes, each with
+its own values. With PROMETHEUS_MULTIPROC_DIR set (scripts/run.sh sets it
+to an emptied directory) every process writes its samples to files in that
+directory and a scrape, whichever worker serves it, adds them all up. The
+variable must be set before prometheus_client is imported
+"""
+
+import asyncio
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+
+# labels of unresolved URLs and unknown methods, so scanners cannot grow
+# the label sets
+UNRESOLVED = "<unresolved>"
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, streaming responses until their first byte",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests served", ["view", "method", "status"]
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being served",
+    multiprocess_mode="livesum",
+)
+LOGINS = Counter(
+    "auth_logins_total",
+    "Logins on the token endpoints by result: success, failure (bad "
+    "credentials or input), throttled, unavailable (hashing pool full)",
+    ["result"],
+)
+PASSWORD_HASH_TIME = Histogram(
+    "password_hash_duration_seconds",
+    "Time to hash a password, to store it or to check it",
+    ["algorithm"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
+DB_QUERIES = Counter("db_queries_total", "Queries run by requests", ["alias"])
+DB_QUERY_TIME = Counter(
+    "db_query_duration_seconds_total",
+    "Time spent in queries run by requests",
+    ["alias"],
+)
+DB_CONNECTIONS = Counter(
+    "db_connections_opened_total", "Database connections opened", ["alias"]
+)
+POOL_TASKS = Counter(
+    "blocking_pool_tasks_total",
+    "Tasks of core.pools by outcome: completed, failed or rejected",
+    ["pool", "outcome"],
+)
+POOL_IN_FLIGHT = Gauge(
+    "blocking_pool_in_flight",
+    "Tasks queued or running",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_WAIT = Histogram(
+    "blocking_pool_wait_seconds",
+    "Time tasks waited for a worker",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+LOGIN_RESULTS = {200: "success", 400: "failure", 429: "throttled", 503: "unavailable"}
+
+
+def record_login(status_code):
+    LOGINS.labels(LOGIN_RESULTS.get(status_code, "error")).inc()
+
+
+def get_registry():
+    """The registry to scrape: every worker's samples in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS.labels(connection.alias).inc()
+
+
+class QueryCounter:
+    """execute_wrapper adding the queries of one connection to DB_QUERIES"""
+
+    def __init__(self, alias):
+        self.queries = DB_QUERIES.labels(alias)
+        self.time = DB_QUERY_TIME.labels(alias)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.inc()
+            self.time.inc(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    Request metrics, off unless METRICS["ENABLED"]. Goes first, so the
+    latency includes the other middleware. Async capable, so ASGI requests
+    are not funnelled through one thread; their queries run on other threads
+    (see core.pools) and are not counted in db_queries_total
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.query_counters = {}
+        if asyncio.iscoroutinefunction(get_response):
+            # what Django checks to await this middleware, see MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        IN_PROGRESS.inc()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    counter = self.query_counters.get(connection.alias)
+                    if counter is None:
+                        counter = QueryCounter(connection.alias)
+                        self.query_counters[connection.alias] = counter
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = self.get_response(request)
+        finally:
+            IN_PROGRESS.dec()
+        self.observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        IN_PROGRESS.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            IN_PROGRESS.dec()
+        self.observe(request, response, started)
+        return response
+
+    def observe(self, request, response, started):
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        method = request.method if request.method in METHODS else "other"
+        REQUEST_LATENCY.labels(view, method).observe(time.perf_counter() - started)
+        REQUESTS.labels(view, method, response.status_code).inc()
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:46
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Recipe = apps.get_model("core", "Recipe")
+    Review = apps.get_model("core", "Review")
+    reviews = Review.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+
+    def aggregate(expression, default):
+        return Coalesce(
+            Subquery(reviews.annotate(value=expression).values("value")), default
+        )
+
+    Recipe.objects.update(
+        review_count=aggregate(models.Count("pk"), 0),
+        rating_sum=aggregate(models.Sum("rating"), 0),
+        rating_avg=aggregate(
+            models.Avg("rating", output_field=models.FloatField()), Value(0.0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0010_auto_20230323_2128"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="rating_avg",
+            field=models.FloatField(default=0, verbose_name="Average rating"),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, verbose_name="Sum of ratings"),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="review_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Number of reviews"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-rating_avg", "-review_count", "-id"],
+                name="recipe_top_rated_idx",
+            ),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
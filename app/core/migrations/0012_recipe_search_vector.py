@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:47
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+import core.db
+
+POPULATE_SEARCH_VECTOR = """
+UPDATE core_recipe r SET search_vector =
+    setweight(to_tsvector('english', coalesce(r.title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(r.description, '')), 'B')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(i.name, ' ')
+        FROM core_ingredient i
+        JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+        WHERE ri.recipe_id = r.id
+    ), '')), 'C')
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_recipe_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        core.db.RunPostgreSQL(
+            "CREATE INDEX recipe_search_vector_gin ON core_recipe "
+            "USING gin (search_vector)",
+            "DROP INDEX recipe_search_vector_gin",
+        ),
+        core.db.RunPostgreSQL(POPULATE_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0012_recipe_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="instruction",
+            field=models.TextField(default="", verbose_name="Detailed instructions"),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="public",
+            field=models.BooleanField(default=False, verbose_name="Is Public"),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="time",
+            field=models.IntegerField(default=0, verbose_name="Time in minutes"),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["public", "difficulty"], name="recipe_public_difficulty_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "public"], name="recipe_author_public_idx"
+            ),
+        ),
+        # dropped only once recipe_author_public_idx can serve author lookups
+        migrations.AlterField(
+            model_name="recipe",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="recipes",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Author",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["time"], name="recipe_time_idx"),
+        ),
+    ]
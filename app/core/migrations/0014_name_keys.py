@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+from core.names import merge_duplicates, update_name_keys
+
+
+def normalize_names(apps, schema_editor):
+    Recipe = apps.get_model("core", "Recipe")
+    for model_name, through, field_name in (
+        ("Ingredient", Recipe.ingredients.through, "ingredient"),
+        ("Tag", Recipe.tags.through, "tag"),
+    ):
+        model = apps.get_model("core", model_name)
+        merge_duplicates(model, through, field_name)
+        update_name_keys(model)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0013_recipe_instruction_time_public"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="name_key",
+            field=models.CharField(editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="name_key",
+            field=models.CharField(editable=False, max_length=100, null=True),
+        ),
+        migrations.RunPython(normalize_names, migrations.RunPython.noop),
+    ]
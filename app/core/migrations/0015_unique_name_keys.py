@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:10
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+import core.db
+
+# in their own migration: PostgreSQL refuses to ALTER a table with pending
+# deferred foreign key checks, which the merge of 0014 leaves behind
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0014_name_keys"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ingredient",
+            name="name_key",
+            field=models.CharField(editable=False, max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="tag",
+            name="name_key",
+            field=models.CharField(editable=False, max_length=100, unique=True),
+        ),
+        TrigramExtension(),
+        core.db.RunPostgreSQL(
+            "CREATE INDEX ingredient_name_key_trgm ON core_ingredient "
+            "USING gin (name_key gin_trgm_ops)",
+            "DROP INDEX ingredient_name_key_trgm",
+        ),
+        core.db.RunPostgreSQL(
+            "CREATE INDEX tag_name_key_trgm ON core_tag "
+            "USING gin (name_key gin_trgm_ops)",
+            "DROP INDEX tag_name_key_trgm",
+        ),
+    ]
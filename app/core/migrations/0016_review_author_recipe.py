@@ -0,0 +1,182 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:02
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+
+
+def batches(queryset, batch_size=BATCH_SIZE):
+    """
+    Primary key ranges of `queryset`, each handled in its own transaction:
+    the migration is not atomic, so no lock is held for the whole table.
+    Rows created while walking the ranges are not visited
+    """
+    bounds = queryset.aggregate(low=Min("pk"), high=Max("pk"))
+    if bounds["low"] is None:
+        return
+    last = bounds["low"] - 1
+    while last < bounds["high"]:
+        with transaction.atomic(using=queryset.db):
+            yield queryset.filter(pk__gt=last, pk__lte=last + batch_size)
+        last += batch_size
+
+
+def copy_links(apps, schema_editor):
+    """
+    Move the review author and recipe links to the new foreign keys. A
+    review linked to several recipes is copied once per extra recipe; with
+    several authors, the first one keeps it
+    """
+    db = schema_editor.connection.alias
+    Review = apps.get_model("core", "Review")
+    ReviewUser = Review.user.through
+    RecipeReview = apps.get_model("core", "Recipe").reviews.through
+
+    for reviews in batches(Review.objects.using(db)):
+        authors, recipes = {}, defaultdict(list)
+        links = ReviewUser.objects.using(db).filter(review__in=reviews)
+        for review_id, user_id in links.order_by("-user_id").values_list(
+            "review_id", "user_id"
+        ):
+            authors[review_id] = user_id
+        links = RecipeReview.objects.using(db).filter(review__in=reviews)
+        for review_id, recipe_id in links.order_by("recipe_id").values_list(
+            "review_id", "recipe_id"
+        ):
+            recipes[review_id].append(recipe_id)
+
+        updated, copies = [], []
+        for review in reviews:
+            review.author_id = authors.get(review.pk)
+            review.recipe_id, *others = recipes.get(review.pk) or [None]
+            updated.append(review)
+            copies.extend(
+                Review(
+                    title=review.title,
+                    body=review.body,
+                    rating=review.rating,
+                    author_id=review.author_id,
+                    recipe_id=recipe_id,
+                )
+                for recipe_id in others
+            )
+        Review.objects.using(db).bulk_update(updated, ["author", "recipe"])
+        Review.objects.using(db).bulk_create(copies)
+
+
+def delete_invalid_reviews(apps, schema_editor):
+    """
+    Reviews without an author or a recipe cannot be kept, and an author
+    keeps only their latest review of a recipe. The rating aggregates of
+    the recipes losing reviews are recomputed
+    """
+    db = schema_editor.connection.alias
+    Recipe = apps.get_model("core", "Recipe")
+    Review = apps.get_model("core", "Review")
+
+    orphans = Review.objects.using(db).filter(Q(author=None) | Q(recipe=None))
+    recipe_ids = set(orphans.exclude(recipe=None).values_list("recipe_id", flat=True))
+    orphans.delete()
+
+    duplicates = (
+        Review.objects.using(db)
+        .values("author", "recipe")
+        .annotate(count=Count("pk"), latest=Max("pk"))
+        .filter(count__gt=1)
+    )
+    for group in duplicates.iterator():
+        Review.objects.using(db).filter(
+            author=group["author"], recipe=group["recipe"], pk__lt=group["latest"]
+        ).delete()
+        recipe_ids.add(group["recipe"])
+
+    reviews = Review.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+
+    def aggregate(expression, default):
+        return Coalesce(
+            Subquery(reviews.annotate(value=expression).values("value")), default
+        )
+
+    recipe_ids = sorted(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        Recipe.objects.using(db).filter(
+            pk__in=recipe_ids[start : start + BATCH_SIZE]
+        ).update(
+            review_count=aggregate(models.Count("pk"), 0),
+            rating_sum=aggregate(models.Sum("rating"), 0),
+            rating_avg=aggregate(
+                models.Avg("rating", output_field=models.FloatField()), Value(0.0)
+            ),
+        )
+
+
+def restore_links(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Review = apps.get_model("core", "Review")
+    ReviewUser = Review.user.through
+    RecipeReview = apps.get_model("core", "Recipe").reviews.through
+
+    for reviews in batches(Review.objects.using(db)):
+        rows = list(reviews.values_list("pk", "author_id", "recipe_id"))
+        ReviewUser.objects.using(db).bulk_create(
+            ReviewUser(review_id=pk, user_id=author_id)
+            for pk, author_id, _ in rows
+            if author_id is not None
+        )
+        RecipeReview.objects.using(db).bulk_create(
+            RecipeReview(review_id=pk, recipe_id=recipe_id)
+            for pk, _, recipe_id in rows
+            if recipe_id is not None
+        )
+
+
+class Migration(migrations.Migration):
+    # every batch commits on its own
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0015_unique_name_keys"),
+    ]
+
+    operations = [
+        # frees the reverse name `recipe` for the new foreign key
+        migrations.AlterField(
+            model_name="recipe",
+            name="reviews",
+            field=models.ManyToManyField(
+                related_name="+", to="core.Review", verbose_name="Reviews"
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Author",
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="recipe",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="core.recipe",
+                verbose_name="Recipe",
+            ),
+        ),
+        migrations.RunPython(copy_links, restore_links),
+        migrations.RunPython(delete_invalid_reviews, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0016_review_author_recipe"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="recipe",
+            name="reviews",
+        ),
+        migrations.RemoveField(
+            model_name="review",
+            name="user",
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reviews",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Author",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="recipe",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reviews",
+                to="core.recipe",
+                verbose_name="Recipe",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["author", "-id"],
+                include=("recipe", "title", "rating"),
+                name="review_author_listing_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="review",
+            constraint=models.UniqueConstraint(
+                fields=("author", "recipe"), name="review_author_recipe_unique"
+            ),
+        ),
+    ]
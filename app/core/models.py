@@ -1,4 +1,14 @@
-from django.db import models
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
+from django.db import connections, models, transaction
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -6,6 +16,14 @@ from django.contrib.auth.models import (
 )
 from django.utils.translation import ugettext_lazy as _
 
+from .db import is_postgresql
+from .hashers import rehash_password
+from .names import clean_name, normalize_name
+from .pools import PoolSaturated, get_pool
+
+# text search configuration used to build and query Recipe.search_vector
+SEARCH_CONFIG = "english"
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password, **extra_args):
@@ -39,12 +57,106 @@ class User(AbstractBaseUser, PermissionsMixin):
     username = models.CharField(_("Username"), max_length=50, null=True)
     is_staff = models.BooleanField(_("Staff"), default=False)
     is_active = models.BooleanField(_("Active"), default=True)
+    # version stamp of the profile, see user.views.profile_etag
+    updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
 
     objects = UserManager()
 
     USERNAME_FIELD = "email"
 
-class Ingredient(models.Model):
+    def check_password(self, raw_password):
+        """
+        Like AbstractBaseUser.check_password, but a hash made with outdated
+        hasher settings is replaced on the "hashing" pool instead of on the
+        caller's thread, so a login never pays for two hashes. The instance
+        keeps the old hash: a session opened by this login is asked to log
+        in again once, as after any password change
+        """
+
+        def setter(raw_password):
+            try:
+                get_pool("hashing").submit(
+                    rehash_password, self.pk, self.password, raw_password
+                )
+            except PoolSaturated:
+                pass  # upgraded on a later login
+
+        return check_password(raw_password, self.password, setter)
+
+class NameQuerySet(models.QuerySet):
+    def get_or_create_by_name(self, name):
+        """Case and whitespace insensitive get_or_create, one unique index probe"""
+        return self.get_or_create(
+            name_key=normalize_name(name), defaults={"name": clean_name(name)}
+        )
+
+    def resolve_names(self, names):
+        """
+        {name_key: pk} for `names`, creating the missing rows: one query when
+        they all exist, three otherwise, however many names there are
+        """
+        keys = {}
+        for name in names:
+            # the first spelling of a name is the one created
+            keys.setdefault(normalize_name(name), clean_name(name))
+        pks = dict(self.filter(name_key__in=keys).values_list("name_key", "pk"))
+        missing = [key for key in keys if key not in pks]
+        if missing:
+            self.bulk_create(
+                [self.model(name=keys[key], name_key=key) for key in missing],
+                # rows created concurrently are picked up by the next query
+                ignore_conflicts=True,
+            )
+            pks.update(self.filter(name_key__in=missing).values_list("name_key", "pk"))
+        return pks
+
+    def autocomplete(self, text, limit=10):
+        """
+        Up to `limit` (pk, name) whose name starts with `text`, then, for
+        three characters or more, whose name contains it. Prefix matches
+        use the name_key index; on PostgreSQL infix ones use the pg_trgm
+        index of migration 0015
+        """
+        key = normalize_name(text)
+        if is_postgresql(connections[self.db]):
+            # served by the varchar_pattern_ops index Django adds to name_key
+            prefixed = self.filter(name_key__startswith=key)
+        else:
+            # SQLite only uses an index for LIKE on NOCASE columns
+            prefixed = self.filter(name_key__gte=key, name_key__lt=key + "\uffff")
+        matches = list(prefixed.order_by("name_key").values_list("pk", "name")[:limit])
+        if len(matches) < limit and len(key) >= 3:
+            matches += (
+                self.filter(name_key__contains=key)
+                .exclude(pk__in=[pk for pk, _ in matches])
+                .order_by("name_key")
+                .values_list("pk", "name")[: limit - len(matches)]
+            )
+        return matches
+
+
+class NamedModel(models.Model):
+    """
+    Base of the models identified by a name (see core.names): `name_key`
+    is unique, so names differing only by case or spacing are the same row
+    """
+
+    name_key = models.CharField(max_length=100, unique=True, editable=False)
+
+    objects = NameQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.name = clean_name(self.name)
+        self.name_key = normalize_name(self.name)
+        if "update_fields" in kwargs and "name" in kwargs["update_fields"]:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "name_key"}
+        super().save(*args, **kwargs)
+
+
+class Ingredient(NamedModel):
     name = models.CharField(_("Ingredient"), max_length=50)
 
     class Meta:
@@ -55,20 +167,64 @@ class Ingredient(models.Model):
         return self.name
 
 class Review(models.Model):
+    """
+    One review per author and recipe. A new review adds its rating to the
+    aggregates of its recipe in the same transaction as the INSERT; an edit
+    enqueues core.tasks.refresh_recipe_ratings instead, so the aggregates of
+    the old and new recipe catch up once a worker runs it (straight away
+    with the eager broker). Deletions, cascades included, are handled by
+    core.signals. Bulk `QuerySet.update()`/`delete()` bypass all this: run
+    `rebuild_ratings` after.
+    """
 
     title = models.CharField(_("Title"), max_length=140)
     body = models.TextField(_("Body"))
     rating = models.IntegerField(_("Rating 1-5"))
-    user = models.ManyToManyField(User, verbose_name=_("Author"))
+    # no index of its own: review_author_listing_idx starts with author
+    author = models.ForeignKey(User, verbose_name=_("Author"), on_delete=models.CASCADE, related_name='reviews', db_index=False)
+    recipe = models.ForeignKey("Recipe", verbose_name=_("Recipe"), on_delete=models.CASCADE, related_name='reviews')
 
     class Meta:
         verbose_name = _("Review")
         verbose_name_plural = _("Reviews")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["author", "recipe"], name="review_author_recipe_unique"
+            ),
+        ]
+        indexes = [
+            # covers the /user/self/reviews listing: an index-only scan on
+            # PostgreSQL (SQLite ignores INCLUDE)
+            models.Index(
+                fields=["author", "-id"],
+                include=["recipe", "title", "rating"],
+                name="review_author_listing_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
-class Tag(models.Model):
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            if self._state.adding:
+                super().save(*args, **kwargs)
+                Recipe.objects.filter(pk=self.recipe_id).apply_rating_delta(
+                    1, self.rating
+                )
+                return
+            # the rating, or the recipe itself, may have changed
+            recipe_ids = {self.recipe_id}
+            recipe_ids.update(
+                Review.objects.filter(pk=self.pk).values_list("recipe", flat=True)
+            )
+            super().save(*args, **kwargs)
+            from .tasks import refresh_recipe_ratings
+
+            # queued in the same transaction, so it runs only once committed
+            refresh_recipe_ratings.enqueue([sorted(recipe_ids)])
+
+class Tag(NamedModel):
 
     name = models.CharField(_("Tag name"), max_length=50)
 
@@ -79,6 +235,88 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+class RecipeQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Public recipes plus the user's own: an OR of two index scans, on
+        recipe_public_difficulty_idx and recipe_author_public_idx
+        """
+        return self.filter(Q(public=True) | Q(author=user))
+
+    def apply_rating_delta(self, count, total):
+        """
+        Add `count` reviews whose ratings sum to `total` to every recipe in the
+        queryset (negative values remove them). A single UPDATE built on F()
+        expressions, so concurrent writers never lose an increment
+        """
+        new_count = F("review_count") + count
+        return self.update(
+            review_count=new_count,
+            rating_sum=F("rating_sum") + total,
+            rating_avg=Case(
+                When(**{"review_count__lte": -count}, then=Value(0.0)),
+                default=Cast(F("rating_sum") + total, FloatField())
+                / Cast(new_count, FloatField()),
+                output_field=FloatField(),
+            ),
+        )
+
+    def refresh_ratings(self):
+        """Recompute the rating aggregates of every recipe in the queryset from scratch"""
+        reviews = Review.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+
+        def aggregate(expression, default):
+            return Coalesce(
+                Subquery(reviews.annotate(value=expression).values("value")), default
+            )
+
+        return self.update(
+            review_count=aggregate(models.Count("pk"), 0),
+            rating_sum=aggregate(models.Sum("rating"), 0),
+            rating_avg=aggregate(
+                models.Avg("rating", output_field=FloatField()), Value(0.0)
+            ),
+        )
+
+
+    def update_search_vector(self):
+        """
+        Rebuild the full-text document (title, description, ingredient names,
+        in decreasing weight) of every recipe in the queryset. Only PostgreSQL
+        has tsvectors: on other backends this is a no-op
+        """
+        if not is_postgresql(connections[self.db]):
+            return 0
+        names = (
+            Ingredient.objects.filter(recipe=OuterRef("pk"))
+            .order_by()
+            .values("recipe")
+            .annotate(names=StringAgg("name", delimiter=" "))
+            .values("names")
+        )
+        return self.update(
+            search_vector=SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+            + SearchVector(Subquery(names), weight="C", config=SEARCH_CONFIG)
+        )
+
+    def search(self, text):
+        """Recipes matching `text` (web search syntax), best ranked first"""
+        if not is_postgresql(connections[self.db]):
+            # development fallback for backends without full-text search
+            return self.filter(
+                Q(title__icontains=text)
+                | Q(description__icontains=text)
+                | Q(ingredients__name__icontains=text)
+            ).distinct()
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            self.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-id")
+        )
+
+
 class Recipe(models.Model):
     
     class DifficultyChoices(models.TextChoices):
@@ -90,17 +328,36 @@ class Recipe(models.Model):
     description = models.TextField(_("Brief description"))
     # photo for later implementation
     difficulty = models.CharField(max_length=1, choices=DifficultyChoices.choices, default=DifficultyChoices.EASY)
-    instruction = models.TextField(_("Detailed instructions")),
-    time = models.IntegerField(_("Time in minutes")),
-    public = models.BooleanField(_("Is Public"), default=False),
-    author = models.ForeignKey(User, verbose_name=_("Author"), on_delete=models.CASCADE, related_name='recipes')
+    instruction = models.TextField(_("Detailed instructions"))
+    time = models.IntegerField(_("Time in minutes"))
+    public = models.BooleanField(_("Is Public"), default=False)
+    # no index of its own: recipe_author_public_idx starts with author
+    author = models.ForeignKey(User, verbose_name=_("Author"), on_delete=models.CASCADE, related_name='recipes', db_index=False)
     ingredients = models.ManyToManyField(Ingredient, verbose_name=_("Ingredients"))
     tags = models.ManyToManyField(Tag, verbose_name=_("Tags"))
-    reviews = models.ManyToManyField(Review, verbose_name=_("Reviews"))
+    # denormalised from `reviews`, see core.signals and Review.save
+    review_count = models.PositiveIntegerField(_("Number of reviews"), default=0)
+    rating_sum = models.PositiveIntegerField(_("Sum of ratings"), default=0)
+    rating_avg = models.FloatField(_("Average rating"), default=0)
+    # maintained by core.signals, GIN indexed by migration 0012
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Recipe")
         verbose_name_plural = _("Recipes")
+        indexes = [
+            models.Index(
+                fields=["-rating_avg", "-review_count", "-id"],
+                name="recipe_top_rated_idx",
+            ),
+            models.Index(
+                fields=["public", "difficulty"], name="recipe_public_difficulty_idx"
+            ),
+            models.Index(fields=["author", "public"], name="recipe_author_public_idx"),
+            models.Index(fields=["time"], name="recipe_time_idx"),
+        ]
 
     def __str__(self):
         return self.title
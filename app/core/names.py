@@ -0,0 +1,77 @@
+"""
+Normalised names of ingredients and tags: the display name keeps its case
+but has its whitespace collapsed, and `name_key`, its lower case form, is
+what uniqueness, lookups and autocomplete run on
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+
+
+def clean_name(name: str) -> str:
+    return " ".join(name.split())
+
+
+def normalize_name(name: str) -> str:
+    return clean_name(name).lower()
+
+
+def find_duplicates(model):
+    """{pk of the oldest row: [pks of the rows with the same normalised name]}"""
+    groups = defaultdict(list)
+    rows = model._default_manager.order_by("pk").values_list("pk", "name")
+    for pk, name in rows.iterator(chunk_size=5000):
+        groups[normalize_name(name)].append(pk)
+    return {pks[0]: pks[1:] for pks in groups.values() if len(pks) > 1}
+
+
+def merge_duplicates(model, through, field_name, batch_size=500):
+    """
+    Merge the rows of `model` whose names only differ by case or whitespace
+    into the oldest one. The recipe links (`through` rows, `field_name`
+    pointing at `model`) of the duplicates are repointed with one INSERT
+    and one DELETE per batch of names, then the duplicates are deleted.
+    Takes the models as arguments so migrations can pass historical ones.
+    Returns the number of rows merged away
+    """
+    duplicates = list(find_duplicates(model).items())
+    merged = 0
+    for start in range(0, len(duplicates), batch_size):
+        keep = {
+            duplicate: kept
+            for kept, pks in duplicates[start : start + batch_size]
+            for duplicate in pks
+        }
+        links = through._default_manager.filter(**{f"{field_name}__in": list(keep)})
+        with transaction.atomic(using=through._default_manager.db):
+            through._default_manager.bulk_create(
+                (
+                    through(recipe_id=recipe_id, **{f"{field_name}_id": keep[pk]})
+                    for recipe_id, pk in links.values_list("recipe_id", field_name)
+                ),
+                batch_size=1000,
+                # recipes linked to several of the duplicates
+                ignore_conflicts=True,
+            )
+            links.delete()
+            merged += (
+                model._default_manager.filter(pk__in=list(keep))
+                .delete()[1]
+                .get(model._meta.label, 0)
+            )
+    return merged
+
+
+def update_name_keys(model, batch_size=1000):
+    """Set the cleaned name and `name_key` of every row, returns how many changed"""
+    changed = []
+    for row in model._default_manager.order_by("pk").iterator(chunk_size=5000):
+        name, name_key = clean_name(row.name), normalize_name(row.name)
+        if (row.name, row.name_key) != (name, name_key):
+            row.name, row.name_key = name, name_key
+            changed.append(row)
+    model._default_manager.bulk_update(
+        changed, ["name", "name_key"], batch_size=batch_size
+    )
+    return len(changed)
@@ -0,0 +1,178 @@
+"""
+Bounded thread pools for blocking work (ORM queries, password hashing),
+so async views never block the event loop and CPU heavy work cannot grow
+without limit. Pools are declared in settings.BLOCKING_POOLS:
+
+    BLOCKING_POOLS = {"hashing": {"MAX_WORKERS": 4, "MAX_PENDING": 32}}
+
+MAX_PENDING caps the tasks waiting for a worker: past it submit() raises
+PoolSaturated instead of queueing, so callers can shed load. MAX_WORKERS = 0
+turns a pool off: work runs in the calling thread, or for
+async callers through asgiref's thread sensitive sync_to_async (the thread
+Django uses for sync code, which is what tests need to see their data)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+
+from .metrics import POOL_IN_FLIGHT, POOL_TASKS, POOL_WAIT
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the queue is full"""
+
+
+# the pool whose worker thread this is, see BlockingPool.run
+_worker = threading.local()
+
+
+class BlockingPool:
+    """
+    Fixed number of worker threads plus instrumentation: tasks submitted,
+    completed, failed and rejected, tasks in flight, time spent queued and
+    running, in stats() for this process and in the blocking_pool_*
+    metrics (core.metrics) for all of them.
+    Tasks on worker threads are bracketed by close_old_connections(), like
+    a request, so the threads honour CONN_MAX_AGE and drop broken connections
+    """
+
+    def __init__(
+        self, name: str, max_workers: int, max_pending: Optional[int] = None
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor = (
+            ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+            if max_workers > 0
+            else None
+        )
+        self._lock = threading.Lock()
+        self.submitted = self.completed = self.failed = self.rejected = 0
+        self.in_flight = 0
+        self.wait_time = self.run_time = 0.0
+
+    def _enter(self):
+        with self._lock:
+            if (
+                self.max_pending is not None
+                and self.in_flight >= self.max_workers + self.max_pending
+            ):
+                self.rejected += 1
+                POOL_TASKS.labels(self.name, "rejected").inc()
+                raise PoolSaturated(self.name)
+            self.submitted += 1
+            self.in_flight += 1
+        POOL_IN_FLIGHT.labels(self.name).inc()
+        return time.perf_counter()
+
+    def _run(self, queued_at, fn, args, kwargs):
+        started = time.perf_counter()
+        POOL_WAIT.labels(self.name).observe(started - queued_at)
+        # a disabled pool runs in a thread whose connection Django manages
+        own_thread = self.executor is not None
+        if own_thread:
+            _worker.pool = self
+            close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            POOL_TASKS.labels(self.name, "failed").inc()
+            raise
+        finally:
+            if own_thread:
+                close_old_connections()
+            finished = time.perf_counter()
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.wait_time += started - queued_at
+                self.run_time += finished - started
+            POOL_IN_FLIGHT.labels(self.name).dec()
+            POOL_TASKS.labels(self.name, "completed").inc()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        queued_at = self._enter()
+        if self.executor is not None:
+            return self.executor.submit(self._run, queued_at, fn, args, kwargs)
+        future = Future()
+        try:
+            future.set_result(self._run(queued_at, fn, args, kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """
+        `fn(*args, **kwargs)` run on the pool, waiting for the result. On a
+        worker of this pool it runs right away: queueing it would have the
+        worker wait on the pool it occupies
+        """
+        if getattr(_worker, "pool", None) is self:
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run_async(self, fn, *args, **kwargs):
+        """Await `fn(*args, **kwargs)` run on the pool"""
+        if self.executor is None:
+            run = sync_to_async(self._run, thread_sensitive=True)
+            return await run(self._enter(), fn, args, kwargs)
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "in_flight": self.in_flight,
+                "wait_time": self.wait_time,
+                "run_time": self.run_time,
+            }
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> BlockingPool:
+    """The pool called `name`, created on first use from settings.BLOCKING_POOLS"""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                options = getattr(settings, "BLOCKING_POOLS", {}).get(name, {})
+                max_workers = options.get("MAX_WORKERS", os.cpu_count() or 1)
+                pool = _pools[name] = BlockingPool(
+                    name, max_workers, options.get("MAX_PENDING")
+                )
+    return pool
+
+
+@receiver(setting_changed)
+def reset_pools(*, setting, **kwargs):
+    if setting == "BLOCKING_POOLS":
+        with _pools_lock:
+            for pool in _pools.values():
+                pool.shutdown()
+            _pools.clear()
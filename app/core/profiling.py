@@ -0,0 +1,168 @@
+"""
+Per request SQL profiling, enabled by QUERY_PROFILING["ENABLED"]. Every
+query run by the request thread goes through a connection.execute_wrapper
+that counts it, times it and groups it by fingerprint (its SQL with the
+parameters left out, so the same statement run for different rows shares
+one). The totals are returned in a Server-Timing header and logged as one
+JSON record per request on the "core.profiling" logger; a fingerprint run
+N1_THRESHOLD times or more is flagged as a likely N+1.
+
+Views declare the queries they are allowed with a `query_budget` class
+attribute (or the query_budget decorator for function views). A view over
+its budget is logged, or, with QUERY_PROFILING["STRICT"] (the test
+profile), fails the request with QueryBudgetExceeded.
+
+Only the request thread is seen: queries run on core.pools worker threads
+(by the async views, unless the pools run inline) or while a streaming
+response is consumed are not counted
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# IN (%s, %s, ...) lists of any length are the same statement
+IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(budget):
+    """Declare the query budget of a function view"""
+
+    def decorator(view):
+        view.query_budget = budget
+        return view
+
+    return decorator
+
+
+def get_query_budget(view):
+    """The budget of a resolved view function, None when it has none"""
+    budget = getattr(view, "query_budget", None)
+    if budget is None:
+        budget = getattr(getattr(view, "view_class", None), "query_budget", None)
+    return budget
+
+
+def fingerprint(sql):
+    return IN_LIST.sub("(...)", sql)
+
+
+class QueryProfile:
+    """execute_wrapper recording the queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold):
+        """Fingerprints run at least `threshold` times, most run first"""
+        return [
+            (sql, count)
+            for sql, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryProfilingMiddleware:
+    """
+    See the module docstring. Goes first, to also see the middleware
+    queries. Async capable, so ASGI requests are not funnelled through one
+    thread; their queries all run on other threads, so only their total
+    time is reported and their budgets are not checked
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = settings.QUERY_PROFILING
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.n1_threshold = options["N1_THRESHOLD"]
+        self.strict = options["STRICT"]
+        if asyncio.iscoroutinefunction(get_response):
+            # what Django checks to await this middleware, see MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        response["Server-Timing"] = (
+            f'db;dur={profile.duration * 1000:.2f};desc="{profile.count} queries", '
+            f"total;dur={elapsed * 1000:.2f}"
+        )
+        match = request.resolver_match
+        view = match.view_name if match else None
+        budget = get_query_budget(match.func) if match else None
+        n_plus_one = profile.repeated(self.n1_threshold)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "queries": profile.count,
+            "db_ms": round(profile.duration * 1000, 2),
+            "total_ms": round(elapsed * 1000, 2),
+            "budget": budget,
+            "duplicates": {sql: count for sql, count in profile.repeated(2)[:10]},
+            "n_plus_one": [sql for sql, _ in n_plus_one],
+        }
+        over_budget = budget is not None and profile.count > budget
+        if over_budget and self.strict:
+            raise QueryBudgetExceeded(
+                f"{view} ran {profile.count} queries, its budget is {budget}: "
+                f"{json.dumps(profile.fingerprints, indent=2)}"
+            )
+        level = logging.WARNING if n_plus_one or over_budget else logging.INFO
+        logger.log(level, json.dumps(record))
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        response["Server-Timing"] = f"total;dur={elapsed * 1000:.2f}"
+        match = request.resolver_match
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(elapsed * 1000, 2),
+        }
+        logger.info(json.dumps(record))
+        return response
@@ -0,0 +1,89 @@
+from rest_framework import serializers
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from .export import FORMATS
+
+
+class ExportParamsSerializer(serializers.Serializer):
+    # not `format`, DRF reads it to pick a renderer
+    file_format = serializers.ChoiceField(choices=FORMATS, default="jsonl")
+    since_id = serializers.IntegerField(min_value=0, default=0)
+
+
+class ValuesSerializer:
+    """
+    Read-only, many=True stand-in for `serializer_class` on large listings:
+    rows come from QuerySet.values() (see rows()), so no model instance is
+    built, and each value goes through the to_representation() of the
+    serializer_class field of the same name, so the output is the same.
+
+    `columns` maps the fields to values() lookups, a dict of them for a
+    nested serializer. Many-related fields are left to get_related()
+    """
+
+    serializer_class = None
+    columns = {}
+
+    def __init__(self, instance=None, many=True, context=None, **kwargs):
+        assert many, f"{type(self).__name__} only serializes lists"
+        self.instance = instance
+        self.context = context or {}
+
+    @classmethod
+    def rows(cls, queryset):
+        """`queryset` as the values() rows this serializer reads"""
+        lookups = []
+        for column in cls.columns.values():
+            lookups.extend(column.values() if isinstance(column, dict) else [column])
+        return queryset.prefetch_related(None).values(*lookups)
+
+    @classmethod
+    def get_fields(cls):
+        # bound once per class, fields keep no per-object state when reading
+        if "_fields" not in cls.__dict__:
+            cls._fields = cls.serializer_class().fields
+        return cls._fields
+
+    def get_related(self, pks):
+        """{field: {pk: representation}} of the fields not in `columns`"""
+        return {}
+
+    @property
+    def data(self):
+        rows = list(self.instance)
+        if not rows:
+            return ReturnList(serializer=self)
+        related = self.get_related([row["id"] for row in rows])
+        plan = []
+        for name, field in self.get_fields().items():
+            column = self.columns.get(name)
+            if isinstance(column, dict):
+                nested = [
+                    (key, field.fields[key].to_representation, column[key])
+                    for key in field.fields
+                ]
+                plan.append((name, None, nested))
+            elif column is not None:
+                plan.append((name, field.to_representation, column))
+            else:
+                plan.append((name, None, related[name]))
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, represent, source in plan:
+                if represent is not None:
+                    value = row[source]
+                    # fields skip to_representation() for None
+                    item[name] = None if value is None else represent(value)
+                elif isinstance(source, dict):
+                    item[name] = source.get(row["id"], [])
+                elif all(row[column] is None for _, _, column in source):
+                    item[name] = None  # a null foreign key
+                else:
+                    item[name] = {
+                        key: None if row[column] is None else represent(row[column])
+                        for key, represent, column in source
+                    }
+            data.append(item)
+        return ReturnList(data, serializer=self)
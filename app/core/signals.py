@@ -0,0 +1,78 @@
+"""
+Signal handlers keeping denormalised Recipe columns in sync
+"""
+
+from django.db import connections, router
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .db import is_postgresql
+from .models import Ingredient, Recipe, Review
+from .tasks import reindex_ingredient_recipes, reindex_recipes
+
+
+@receiver(post_delete, sender=Review)
+def remove_deleted_review_rating(sender, instance, **kwargs):
+    """
+    Also sent for reviews deleted in cascade (their author or recipe was
+    deleted), inside the transaction of the deletion
+    """
+    Recipe.objects.filter(pk=instance.recipe_id).apply_rating_delta(
+        -1, -instance.rating
+    )
+
+
+def search_enabled():
+    """Recipe.search_vector is only maintained on PostgreSQL"""
+    return is_postgresql(connections[router.db_for_write(Recipe)])
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Recipe.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_search_vector_on_ingredients(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Ingredient names are part of the search document of their recipes"""
+    if not search_enabled():
+        return
+    if action == "pre_clear" and reverse:
+        instance._cleared_recipe_pks = set(
+            instance.recipe_set.values_list("pk", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif action == "post_clear":
+        recipes = Recipe.objects.filter(
+            pk__in=instance.__dict__.pop("_cleared_recipe_pks")
+        )
+    else:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    recipes.update_search_vector()
+
+
+@receiver(post_save, sender=Ingredient)
+def update_search_vector_on_rename(sender, instance, created, raw=False, **kwargs):
+    # a common ingredient is in many recipes, they are reindexed in the
+    # background
+    if not created and not raw and search_enabled():
+        reindex_ingredient_recipes.enqueue([instance.pk])
+
+
+@receiver(pre_delete, sender=Ingredient)
+def remember_ingredient_recipes(sender, instance, **kwargs):
+    if search_enabled():
+        instance._recipe_pks = list(instance.recipe_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Ingredient)
+def update_search_vector_on_delete(sender, instance, **kwargs):
+    recipe_pks = instance.__dict__.pop("_recipe_pks", None)
+    if recipe_pks:
+        reindex_recipes.enqueue([recipe_pks])
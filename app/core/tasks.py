@@ -0,0 +1,34 @@
+"""
+Background jobs (see jobs.registry) keeping denormalised Recipe columns in
+sync when the work is too large for the request making the change
+"""
+
+from django.dispatch import Signal
+
+from jobs.registry import task
+
+from .models import Recipe
+
+# sent with `recipe_ids` once a job rewrote columns of those recipes, or
+# only changed the search results when empty: queryset updates send no
+# post_save for the response cache (recipe.signals) to act on
+recipes_refreshed = Signal()
+
+
+@task
+def refresh_recipe_ratings(recipe_ids):
+    Recipe.objects.filter(pk__in=recipe_ids).refresh_ratings()
+    recipes_refreshed.send(sender=Recipe, recipe_ids=recipe_ids)
+
+
+@task
+def reindex_recipes(recipe_ids):
+    Recipe.objects.filter(pk__in=recipe_ids).update_search_vector()
+    recipes_refreshed.send(sender=Recipe, recipe_ids=[])
+
+
+@task
+def reindex_ingredient_recipes(ingredient_id):
+    """Reindex the recipes using an ingredient, once renamed"""
+    Recipe.objects.filter(ingredients=ingredient_id).update_search_vector()
+    recipes_refreshed.send(sender=Recipe, recipe_ids=[])
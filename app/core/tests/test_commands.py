@@ -2,41 +2,334 @@
 All tests for commands in this project
 """
 
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.utils import OperationalError
 from django.core.management import call_command
-from django.test import SimpleTestCase
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from core.models import Ingredient, Recipe, Review
+
 
 # This decorator will get used by all functions in the class
-# will add an argument to every function to simulate the built-in
-# method check of the Command class
-@patch("core.management.commands.wait_for_db.Command.check")
+# will add an argument to every function to simulate the database probe
+# used by the command
+@patch("core.management.commands.wait_for_db.ping")
 class CommandTests(SimpleTestCase):
     """Tests for commands"""
 
-    def test_db_is_available(self, patched_check):
+    def test_db_is_available(self, patched_ping):
         """Test and make sure the command to wait for DB works"""
-        patched_check.return_value = True
+        patched_ping.return_value = None
 
-        call_command("wait_for_db")
+        call_command("wait_for_db", stdout=StringIO())
 
-        # check that the check command is being called with the default DB
-        patched_check.assert_called_once_with(databases=["default"])
+        # check that the probe is being called with the default DB
+        patched_ping.assert_called_once_with("default")
 
     # This mimicks the behaviour of the sleep function.
     # We don't want to wait in the test so this will catch the sleep and carry on
     @patch("time.sleep")
-    def test_wait_for_unavailable_db(self, patched_sleep, patched_check):
+    def test_wait_for_unavailable_db(self, patched_sleep, patched_ping):
         """Test and make sure we're catching errors and wait"""
-        patched_check.side_effect = (
-            [Psycopg2Error] * 2 + [OperationalError] * 3 + [True]
+        patched_ping.side_effect = [Psycopg2Error] * 2 + [OperationalError] * 3 + [None]
+
+        call_command("wait_for_db", stdout=StringIO())
+
+        self.assertEqual(patched_ping.call_count, 6)
+        self.assertEqual(patched_sleep.call_count, 5)
+
+    @patch("time.sleep")
+    def test_delays_back_off_exponentially(self, patched_sleep, patched_ping):
+        patched_ping.side_effect = [OperationalError] * 8 + [None]
+
+        call_command("wait_for_db", "--max-delay", "2", stdout=StringIO())
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        # jitter keeps each delay between half and all of 0.1 * 2 ** attempt
+        for attempt, delay in enumerate(delays):
+            ceiling = min(2, 0.1 * 2**attempt)
+            self.assertGreaterEqual(delay, ceiling / 2)
+            self.assertLessEqual(delay, ceiling)
+        self.assertLess(delays[0], delays[-1])
+
+    @patch("time.sleep")
+    def test_gives_up_after_timeout(self, patched_sleep, patched_ping):
+        patched_ping.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", "--timeout", "0", stdout=StringIO())
+
+        patched_sleep.assert_not_called()
+
+
+class RebuildRatingsCommandTests(TestCase):
+    """Tests for the rebuild_ratings command"""
+
+    def test_aggregates_are_recomputed(self):
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="123456"
+        )
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="123456"
+        )
+        recipes = [
+            Recipe.objects.create(
+                title=f"recipe {i}", description="desc", time=15, author=user
+            )
+            for i in range(3)
+        ]
+        # reviews written in bulk skip the code that maintains aggregates
+        Review.objects.bulk_create(
+            Review(
+                title="review",
+                body="body",
+                rating=rating,
+                author=author,
+                recipe=recipes[0],
+            )
+            for rating, author in ((2, user), (5, other))
+        )
+
+        out = StringIO()
+        call_command("rebuild_ratings", batch_size=2, stdout=out)
+
+        self.assertIn("3 recipes", out.getvalue())
+        recipes[0].refresh_from_db()
+        self.assertEqual(recipes[0].review_count, 2)
+        self.assertEqual(recipes[0].rating_sum, 7)
+        self.assertAlmostEqual(recipes[0].rating_avg, 3.5)
+        recipes[1].refresh_from_db()
+        self.assertEqual(recipes[1].review_count, 0)
+
+
+class ImportUsersCommandTests(TestCase):
+    """Tests for the import_users command"""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.rejects = os.path.join(self.tmpdir.name, "rejects.csv")
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def import_users(self, path, **options):
+        out = StringIO()
+        call_command("import_users", path, rejects=self.rejects, stdout=out, **options)
+        with open(self.rejects) as f:
+            rejects = list(csv.DictReader(f))
+        return out.getvalue(), rejects
+
+    def test_import_csv(self):
+        get_user_model().objects.create_user("taken@example.com", "Pass123!")
+        path = self.write(
+            "users.csv",
+            "email,password,username,first_name\n"
+            "one@EXAMPLE.com,Pass123!,one,Uno\n"
+            "two@example.com,Pass456!,,\n"
+            "not-an-email,Pass123!,,\n"
+            "three@example.com,,,\n"
+            "one@example.com,Pass789!,,\n"
+            "taken@example.com,Pass123!,,\n",
+        )
+
+        out, rejects = self.import_users(path, workers=0, batch_size=2)
+
+        self.assertIn("Imported 2 users, rejected 4 rows", out)
+        user = get_user_model().objects.get(email="one@example.com")
+        self.assertEqual(user.username, "one")
+        self.assertEqual(user.first_name, "Uno")
+        self.assertTrue(user.check_password("Pass123!"))
+        self.assertEqual(
+            [(row["line"], row["email"]) for row in rejects],
+            [
+                ("4", "not-an-email"),
+                ("5", "three@example.com"),
+                ("6", "one@example.com"),
+                ("7", "taken@example.com"),
+            ],
+        )
+
+    def test_import_jsonl_with_process_pool(self):
+        path = self.write(
+            "users.jsonl",
+            '{"email": "one@example.com", "password": "Pass123!"}\n'
+            "not json\n"
+            '{"email": "two@example.com", "password": "Pass456!"}\n',
+        )
+
+        out, rejects = self.import_users(path, workers=2)
+
+        self.assertIn("Imported 2 users, rejected 1 rows", out)
+        self.assertTrue(
+            get_user_model()
+            .objects.get(email="two@example.com")
+            .check_password("Pass456!")
+        )
+        self.assertEqual(rejects[0]["line"], "2")
+
+
+class BenchHashersCommandTests(SimpleTestCase):
+    def test_times_each_cost(self):
+        out = StringIO()
+        call_command(
+            "bench_hashers",
+            hashers=["core.hashers.TunablePBKDF2PasswordHasher"],
+            costs=[1000, 2000],
+            samples=1,
+            target_ms=100,
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn("pbkdf2_sha256            iterations=1000 ", lines[0])
+        self.assertIn("iterations for 100ms", lines[1])
+        self.assertIn("iterations=2000 ", lines[2])
+
+    def test_hasher_without_cost(self):
+        out = StringIO()
+        call_command(
+            "bench_hashers",
+            hashers=["django.contrib.auth.hashers.MD5PasswordHasher"],
+            samples=1,
+            stdout=out,
+        )
+
+        self.assertIn("md5                      fixed cost", out.getvalue())
+
+    def test_rejects_zero_samples(self):
+        with self.assertRaises(CommandError):
+            call_command("bench_hashers", samples=0, stdout=StringIO())
+
+
+class DedupNamesCommandTests(TestCase):
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="123456"
+        )
+        self.recipes = [
+            Recipe.objects.create(
+                title=f"recipe {i}", description="desc", time=15, author=user
+            )
+            for i in range(2)
+        ]
+        # bulk_create skips save(), like raw imports: duplicates get through
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, name_key=f"legacy-{i}")
+            for i, name in enumerate(["Pasta", "pasta ", "PASTA", "salt"])
+        )
+        self.ingredients = list(Ingredient.objects.order_by("pk"))
+        pasta, lower, upper, salt = self.ingredients
+        self.recipes[0].ingredients.add(pasta, lower, salt)
+        self.recipes[1].ingredients.add(upper)
+
+    def test_dry_run_only_reports(self):
+        out = StringIO()
+        call_command("dedup_names", dry_run=True, stdout=out)
+
+        self.assertIn("ingredients: 2 duplicates of 1 names", out.getvalue())
+        self.assertEqual(Ingredient.objects.count(), 4)
+
+    def test_duplicates_merged_into_oldest(self):
+        out = StringIO()
+        call_command("dedup_names", stdout=out)
+
+        pasta, salt = self.ingredients[0], self.ingredients[3]
+        self.assertEqual(
+            list(Ingredient.objects.order_by("pk").values_list("pk", "name_key")),
+            [(pasta.pk, "pasta"), (salt.pk, "salt")],
+        )
+        self.assertEqual(set(self.recipes[0].ingredients.all()), {pasta, salt})
+        self.assertEqual(list(self.recipes[1].ingredients.all()), [pasta])
+        self.assertIn("ingredients: merged 2 duplicates, normalised 2", out.getvalue())
+        self.assertIn("tags: merged 0 duplicates", out.getvalue())
+
+
+class ExportCommandTests(TestCase):
+    """Tests for the export command"""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{i}@example.com", password="123456", username=f"u{i}"
+            )
+            for i in range(5)
+        ]
+
+    def export(self, dataset, fmt="jsonl", **options):
+        output = os.path.join(self.tmpdir.name, f"{dataset}.{fmt}.gz")
+        call_command(
+            "export", dataset, format=fmt, output=output, stderr=StringIO(), **options
+        )
+        with gzip.open(output, "rt", newline="") as f:
+            if fmt == "csv":
+                return list(csv.DictReader(f))
+            return [json.loads(line) for line in f]
+
+    def test_jsonl_export(self):
+        rows = self.export("users", chunk_size=2)
+
+        self.assertEqual(
+            [row["email"] for row in rows], [f"user{i}@example.com" for i in range(5)]
+        )
+        self.assertEqual(rows[0]["username"], "u0")
+        self.assertNotIn("password", rows[0])
+
+    def test_csv_export_of_foreign_keys(self):
+        recipe = Recipe.objects.create(
+            title="soup", description="desc", time=10, author=self.users[1]
+        )
+
+        rows = self.export("recipes", fmt="csv")
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(recipe.pk))
+        self.assertEqual(rows[0]["author"], str(self.users[1].pk))
+        self.assertEqual(rows[0]["public"], "False")
+
+    def test_incremental_export_with_state(self):
+        state = os.path.join(self.tmpdir.name, "state.json")
+
+        self.assertEqual(len(self.export("users", state=state)), 5)
+        self.assertEqual(self.export("users", state=state), [])
+        new = get_user_model().objects.create_user("new@example.com", "123456")
+        self.assertEqual(
+            [row["id"] for row in self.export("users", state=state)], [new.pk]
+        )
+
+        with open(state) as f:
+            self.assertEqual(json.load(f), {"users": new.pk})
+
+    def test_since_id(self):
+        rows = self.export("users", since_id=self.users[2].pk)
+
+        self.assertEqual(
+            [row["id"] for row in rows], [user.pk for user in self.users[3:]]
         )
 
-        call_command("wait_for_db")
+    def test_keyset_pages_without_server_side_cursors(self):
+        # what DB_PGBOUNCER sets: every chunk is its own query, the last
+        # one short (or empty)
+        with patch.dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True):
+            with self.assertNumQueries(3):
+                rows = self.export("users", chunk_size=2)
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.called_with(databases=["default"])
+        self.assertEqual(len(rows), 5)
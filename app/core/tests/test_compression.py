@@ -0,0 +1,123 @@
+"""
+All the tests about the response compression middleware
+"""
+
+import asyncio
+import gzip
+import random
+from unittest import mock
+
+import brotli
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import parse_etags
+
+from core.compression import (
+    CompressionMiddleware,
+    accepted_encodings,
+    weak_etag_match,
+)
+
+BODY = b'{"results": [' + b'{"title": "pasta al pomodoro"},' * 100 + b"{}]}"
+
+
+@override_settings(
+    COMPRESSION={
+        "ENABLED": True,
+        "MIN_SIZE": 200,
+        "CONTENT_TYPES": ["application/json"],
+        "GZIP_LEVEL": 6,
+        "BROTLI_QUALITY": 4,
+    }
+)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def respond(self, response, accept_encoding="gzip, deflate, br"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=BODY, **kwargs):
+        return HttpResponse(body, content_type="application/json", **kwargs)
+
+    def test_brotli_preferred(self):
+        response = self.respond(self.json_response())
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), BODY)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_gzip(self):
+        for accept_encoding in ("gzip", "gzip;q=1, br;q=0.5", "br;q=0, gzip"):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.respond(self.json_response(), accept_encoding)
+
+                self.assertEqual(response["Content-Encoding"], "gzip")
+                self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_gzip_without_brotli(self):
+        with mock.patch("core.compression.brotli", None):
+            response = self.respond(self.json_response())
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_identity(self):
+        for accept_encoding in ("", "identity", "gzip;q=0"):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.respond(self.json_response(), accept_encoding)
+
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(response.content, BODY)
+                # caches must still tell the encodings apart
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_passed_through(self):
+        responses = {
+            "small": self.json_response(b'{"id": 1}'),
+            "other type": HttpResponse(BODY, content_type="application/gzip"),
+            "encoded": self.json_response(headers={"Content-Encoding": "gzip"}),
+            "streaming": StreamingHttpResponse([BODY], content_type="application/json"),
+        }
+        for label, response in responses.items():
+            with self.subTest(label):
+                self.assertFalse(self.respond(response).has_header("Vary"))
+
+    def test_incompressible(self):
+        body = random.Random(42).randbytes(1000)
+
+        response = self.respond(self.json_response(body))
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, body)
+
+    def test_async_get_response(self):
+        async def view(request):
+            await asyncio.sleep(0)
+            return self.json_response()
+
+        middleware = CompressionMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+
+        response = async_to_sync(middleware)(request)
+
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_etag_made_weak(self):
+        response = self.respond(self.json_response(headers={"ETag": '"abc"'}))
+
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+
+class HelpersTests(SimpleTestCase):
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings("GZIP;q=0.8, br , deflate;q=0, *;q=oops"),
+            {"gzip": 0.8, "br": 1.0},
+        )
+
+    def test_weak_etag_match(self):
+        self.assertTrue(weak_etag_match('"a"', parse_etags('W/"a"')))
+        self.assertTrue(weak_etag_match('W/"a"', parse_etags('"b", "a"')))
+        self.assertTrue(weak_etag_match('"a"', parse_etags("*")))
+        self.assertFalse(weak_etag_match('"a"', parse_etags('"b"')))
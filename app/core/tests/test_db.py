@@ -0,0 +1,48 @@
+"""
+All the tests about the database helpers
+"""
+
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from core.db import close_unusable_connections
+
+
+def fake_connection(health_checks=True, connected=True, usable=True):
+    connection = Mock(settings_dict={"CONN_HEALTH_CHECKS": health_checks})
+    connection.connection = object() if connected else None
+    connection.is_usable.return_value = usable
+    return connection
+
+
+class CloseUnusableConnectionsTests(SimpleTestCase):
+    def run_handler(self, connection):
+        with patch("core.db.connections") as patched_connections:
+            patched_connections.all.return_value = [connection]
+            close_unusable_connections()
+
+    def test_dead_connection_is_closed(self):
+        connection = fake_connection(usable=False)
+
+        self.run_handler(connection)
+
+        connection.close.assert_called_once_with()
+
+    def test_live_connection_is_kept(self):
+        connection = fake_connection()
+
+        self.run_handler(connection)
+
+        connection.is_usable.assert_called_once_with()
+        connection.close.assert_not_called()
+
+    def test_nothing_is_checked_when_disabled_or_not_connected(self):
+        for connection in (
+            fake_connection(health_checks=False, usable=False),
+            fake_connection(connected=False, usable=False),
+        ):
+            self.run_handler(connection)
+
+            connection.is_usable.assert_not_called()
+            connection.close.assert_not_called()
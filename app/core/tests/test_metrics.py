@@ -0,0 +1,220 @@
+"""
+All the tests about the Prometheus metrics and their endpoint
+"""
+
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from core.metrics import MetricsMiddleware
+from core.pools import BlockingPool, PoolSaturated
+
+METRICS_URL = reverse("metrics")
+TOKEN_URL = reverse("user:token")
+ASYNC_TOKEN_URL = reverse("user:async-token")
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsEndpointTests(TestCase):
+    @override_settings(DEBUG=True)
+    def test_exposition(self):
+        self.client.get(reverse("healthz"))
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        content = res.content.decode()
+        for name in (
+            "http_request_duration_seconds_bucket",
+            "http_requests_total",
+            "http_requests_in_progress",
+            "db_queries_total",
+        ):
+            self.assertIn(name, content)
+        self.assertIn(
+            'http_requests_total{method="GET",status="200",view="healthz"}', content
+        )
+
+    def test_request_metrics(self):
+        labels = {"view": "healthz", "method": "GET"}
+        count = sample("http_request_duration_seconds_count", **labels)
+        served = sample("http_requests_total", status="200", **labels)
+
+        self.client.get(reverse("healthz"))
+
+        self.assertEqual(
+            sample("http_request_duration_seconds_count", **labels), count + 1
+        )
+        self.assertEqual(
+            sample("http_requests_total", status="200", **labels), served + 1
+        )
+        self.assertEqual(sample("http_requests_in_progress"), 0)
+
+    def test_unresolved_and_unknown_method_labels(self):
+        before = sample(
+            "http_requests_total", view="<unresolved>", method="other", status="404"
+        )
+
+        self.client.generic("PROPFIND", "/no/such/page")
+
+        self.assertEqual(
+            sample(
+                "http_requests_total", view="<unresolved>", method="other", status="404"
+            ),
+            before + 1,
+        )
+
+    def test_queries_counted(self):
+        before = sample("db_queries_total", alias="default")
+
+        self.client.get(reverse("readyz"))
+
+        self.assertEqual(sample("db_queries_total", alias="default"), before + 1)
+
+    @override_settings(METRICS={"ENABLED": True, "TOKEN": "s3cret"})
+    def test_token_required(self):
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res["WWW-Authenticate"], "Bearer")
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(res.status_code, 401)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(res.status_code, 200)
+
+    def test_token_required_without_debug(self):
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 404)
+
+    @override_settings(METRICS={"ENABLED": False, "TOKEN": None})
+    def test_disabled(self):
+        before = sample(
+            "http_requests_total", view="healthz", method="GET", status="200"
+        )
+
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+        self.client.get(reverse("healthz"))
+
+        self.assertEqual(
+            sample("http_requests_total", view="healthz", method="GET", status="200"),
+            before,
+        )
+
+
+class AsyncMetricsMiddlewareTests(SimpleTestCase):
+    def test_async_requests_run_concurrently(self):
+        async def view(request):
+            await asyncio.sleep(0.2)
+            return HttpResponse("ok")
+
+        middleware = MetricsMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        served = sample(
+            "http_requests_total", view="<unresolved>", method="GET", status="200"
+        )
+
+        async def serve():
+            request = RequestFactory().get("/")
+            return await asyncio.gather(*(middleware(request) for _ in range(4)))
+
+        started = time.perf_counter()
+        responses = async_to_sync(serve)()
+
+        self.assertLess(time.perf_counter() - started, 0.6)
+        self.assertEqual([res.status_code for res in responses], [200] * 4)
+        self.assertEqual(
+            sample(
+                "http_requests_total", view="<unresolved>", method="GET", status="200"
+            ),
+            served + 4,
+        )
+        self.assertEqual(sample("http_requests_in_progress"), 0)
+
+
+# disabled pools run their work on the thread holding the test transaction
+@override_settings(
+    BLOCKING_POOLS={"database": {"MAX_WORKERS": 0}, "hashing": {"MAX_WORKERS": 0}}
+)
+class LoginMetricsTests(TestCase):
+    def setUp(self) -> None:
+        caches["throttle"].clear()
+        get_user_model().objects.create_user("test@example.com", "45Egd!!94")
+
+    def assert_logins(self, url, password, result):
+        before = sample("auth_logins_total", result=result)
+        self.client.post(url, {"email": "test@example.com", "password": password})
+        self.assertEqual(sample("auth_logins_total", result=result), before + 1)
+
+    def test_success_and_failure(self):
+        for url in (TOKEN_URL, ASYNC_TOKEN_URL):
+            with self.subTest(url=url):
+                self.assert_logins(url, "45Egd!!94", "success")
+                self.assert_logins(url, "wrong", "failure")
+
+    @override_settings(
+        REST_FRAMEWORK={
+            "DEFAULT_THROTTLE_RATES": {"login_ip": "100/min", "login_email": "1/min"}
+        }
+    )
+    def test_throttled(self):
+        self.assert_logins(TOKEN_URL, "wrong", "failure")
+        self.assert_logins(TOKEN_URL, "wrong", "throttled")
+
+
+class BlockingMetricsTests(SimpleTestCase):
+    @override_settings(PASSWORD_HASHERS=["core.hashers.TunablePBKDF2PasswordHasher"])
+    def test_password_hash_time(self):
+        hasher = get_hasher()
+        before = sample(
+            "password_hash_duration_seconds_count", algorithm=hasher.algorithm
+        )
+
+        encoded = hasher.encode("45Egd!!94", hasher.salt(), iterations=1000)
+        hasher.verify("45Egd!!94", encoded)
+
+        self.assertEqual(
+            sample("password_hash_duration_seconds_count", algorithm=hasher.algorithm),
+            before + 2,
+        )
+
+    def test_pool_tasks(self):
+        pool = BlockingPool("metrics-test", max_workers=1, max_pending=0)
+        self.addCleanup(pool.shutdown)
+
+        def fail():
+            raise ValueError
+
+        pool.submit(lambda: None).result()
+        with self.assertRaises(ValueError):
+            pool.submit(fail).result()
+
+        pool._enter()  # holds the only worker
+        with self.assertRaises(PoolSaturated):
+            pool.submit(lambda: None)
+
+        labels = {"pool": "metrics-test"}
+        self.assertEqual(
+            sample("blocking_pool_tasks_total", outcome="completed", **labels), 2
+        )
+        self.assertEqual(
+            sample("blocking_pool_tasks_total", outcome="failed", **labels), 1
+        )
+        self.assertEqual(
+            sample("blocking_pool_tasks_total", outcome="rejected", **labels), 1
+        )
+        self.assertEqual(sample("blocking_pool_in_flight", **labels), 1)
+        self.assertEqual(sample("blocking_pool_wait_seconds_count", **labels), 2)
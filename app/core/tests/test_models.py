@@ -1,9 +1,11 @@
 """
 All the tests about the models
 """
-from django.test import TestCase
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from core.hashers import rehash_password
 from core.models import Ingredient, Review, Tag, Recipe
 
 
@@ -62,6 +64,98 @@ class UserModelTests(TestCase):
         with self.assertRaises(ValueError):
             get_user_model().objects.create_superuser("email@example.com", "")
 
+# the rehash runs inline on a disabled pool, inside the test transaction
+@override_settings(
+    PASSWORD_HASHERS=["core.hashers.TunablePBKDF2PasswordHasher"],
+    PASSWORD_HASH_ITERATIONS=1000,
+    BLOCKING_POOLS={"hashing": {"MAX_WORKERS": 0}},
+)
+class PasswordRehashTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@example.com", "123Pass!"
+        )
+
+    def stored_password(self):
+        return get_user_model().objects.get(pk=self.user.pk).password
+
+    def test_outdated_hash_upgraded_after_login(self):
+        self.assertTrue(self.stored_password().startswith("pbkdf2_sha256$1000$"))
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=1200):
+            self.assertTrue(self.user.check_password("123Pass!"))
+
+        stored = self.stored_password()
+        self.assertTrue(stored.startswith("pbkdf2_sha256$1200$"))
+        self.assertTrue(get_user_model()(password=stored).check_password("123Pass!"))
+
+    def test_wrong_password_not_upgraded(self):
+        before = self.stored_password()
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=1200):
+            self.assertFalse(self.user.check_password("wrong"))
+
+        self.assertEqual(self.stored_password(), before)
+
+    def test_rehash_keeps_a_newer_password(self):
+        outdated = self.user.password
+        self.user.set_password("Changed123!")
+        self.user.save()
+
+        self.assertFalse(rehash_password(self.user.pk, outdated, "123Pass!"))
+        self.assertTrue(
+            get_user_model()(password=self.stored_password()).check_password(
+                "Changed123!"
+            )
+        )
+
+
+class NamedModelTests(TestCase):
+    """Tests about the normalised names of ingredients and tags"""
+
+    def test_name_normalised_on_save(self):
+        ingredient = Ingredient.objects.create(name="  Olive   Oil ")
+
+        self.assertEqual(ingredient.name, "Olive Oil")
+        self.assertEqual(ingredient.name_key, "olive oil")
+
+    def test_names_unique_ignoring_case(self):
+        Tag.objects.create(name="Vegan")
+
+        with self.assertRaises(IntegrityError):
+            Tag.objects.create(name="vegan ")
+
+    def test_get_or_create_by_name(self):
+        tag, created = Tag.objects.get_or_create_by_name("Quick")
+        same, created_again = Tag.objects.get_or_create_by_name(" QUICK")
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(same, tag)
+        self.assertEqual(same.name, "Quick")
+
+    def test_rename_updates_key(self):
+        tag = Tag.objects.create(name="quick")
+        tag.name = "Fast"
+        tag.save(update_fields=["name"])
+
+        self.assertEqual(Tag.objects.get(name_key="fast").pk, tag.pk)
+
+    def test_autocomplete_prefix_then_infix(self):
+        for name in ("Pasta", "Paprika", "Puff pastry", "Salt", "pastis"):
+            Ingredient.objects.create(name=name)
+
+        self.assertEqual(
+            [name for _, name in Ingredient.objects.autocomplete("pa")],
+            ["Paprika", "Pasta", "pastis"],
+        )
+        self.assertEqual(
+            [name for _, name in Ingredient.objects.autocomplete("PAST")],
+            ["Pasta", "pastis", "Puff pastry"],
+        )
+        self.assertEqual(len(Ingredient.objects.autocomplete("pa", limit=1)), 1)
+
+
 class RecipeRelatedModelTest(TestCase):
     
     def create_new_recipe(self):
@@ -86,10 +180,14 @@ class RecipeRelatedModelTest(TestCase):
 
     def test_create_new_review(self):
         rtitle = "pasta"
+        user = get_user_model().objects.create_user(email="test@example.com", password="123456")
+        recipe = Recipe.objects.create(title="test", description="test", time=15, author=user)
         review = Review.objects.create(
             title = rtitle,
             body = "lorem ipsum blah blah",
-            rating = 5
+            rating = 5,
+            author = user,
+            recipe = recipe,
         )
         
         self.assertEqual(str(review), rtitle)
@@ -99,3 +197,81 @@ class RecipeRelatedModelTest(TestCase):
         tag = Tag.objects.create(name=ttitle)
         
         self.assertEqual(str(tag), ttitle)
+
+
+class RecipeRatingAggregateTests(TestCase):
+    """Tests about the denormalised rating columns on Recipe"""
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="123456"
+        )
+        self.recipe = Recipe.objects.create(
+            title="test", description="test description", time=15, author=self.user
+        )
+
+    def create_review(self, rating, recipe=None):
+        author = get_user_model().objects.create_user(
+            email=f"reviewer{Review.objects.count()}@example.com", password="123456"
+        )
+        return Review.objects.create(
+            title="review",
+            body="lorem ipsum",
+            rating=rating,
+            author=author,
+            recipe=recipe or self.recipe,
+        )
+
+    def assertAggregates(self, count, total, avg, recipe=None):
+        recipe = recipe or self.recipe
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.review_count, count)
+        self.assertEqual(recipe.rating_sum, total)
+        self.assertAlmostEqual(recipe.rating_avg, avg)
+
+    def test_adding_and_deleting_reviews(self):
+        first, second = self.create_review(5), self.create_review(2)
+        self.assertAggregates(2, 7, 3.5)
+
+        first.delete()
+        self.assertAggregates(1, 2, 2.0)
+
+        second.delete()
+        self.assertAggregates(0, 0, 0.0)
+
+    def test_changing_rating_updates_aggregates(self):
+        review = self.create_review(1)
+        self.create_review(3)
+
+        review.rating = 5
+        review.save()
+
+        self.assertAggregates(2, 8, 4.0)
+
+    def test_moving_review_updates_both_recipes(self):
+        other = Recipe.objects.create(
+            title="other", description="desc", time=15, author=self.user
+        )
+        review = self.create_review(4)
+
+        review.recipe = other
+        review.save()
+
+        self.assertAggregates(0, 0, 0.0)
+        self.assertAggregates(1, 4, 4.0, recipe=other)
+
+    def test_deleting_reviewer_updates_aggregates(self):
+        review = self.create_review(1)
+        self.create_review(3)
+
+        review.author.delete()
+
+        self.assertAggregates(1, 3, 3.0)
+
+    def test_one_review_per_author_and_recipe(self):
+        review = self.create_review(4)
+
+        with self.assertRaises(IntegrityError):
+            Review.objects.create(
+                title="again", body="b", rating=1, author=review.author, recipe=self.recipe
+            )
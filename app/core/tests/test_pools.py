@@ -0,0 +1,96 @@
+"""
+All the tests about the blocking thread pools
+"""
+
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from core.pools import BlockingPool, PoolSaturated, get_pool
+
+
+class BlockingPoolTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.pool = BlockingPool("test", max_workers=2)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_concurrency_is_bounded(self):
+        running, peak = 0, 0
+        lock = threading.Lock()
+
+        def task():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+
+        for future in [self.pool.submit(task) for _ in range(8)]:
+            future.result()
+
+        self.assertEqual(peak, 2)
+        stats = self.pool.stats()
+        self.assertEqual(stats["submitted"], 8)
+        self.assertEqual(stats["completed"], 8)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_run_async_off_the_event_loop(self):
+        async def main():
+            loop_thread = threading.get_ident()
+            worker_thread = await self.pool.run_async(threading.get_ident)
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(main())
+
+        self.assertNotEqual(loop_thread, worker_thread)
+
+    def test_failures_are_counted_and_raised(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.pool.submit(lambda: 1 / 0).result()
+
+        self.assertEqual(self.pool.stats()["failed"], 1)
+
+    def test_full_queue_rejects(self):
+        pool = BlockingPool("bounded", max_workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+        running = pool.submit(release.wait)
+        queued = pool.submit(release.wait)
+
+        with self.assertRaises(PoolSaturated):
+            pool.submit(release.wait)
+
+        release.set()
+        self.assertTrue(running.result() and queued.result())
+        self.assertEqual(pool.stats()["rejected"], 1)
+        self.assertEqual(pool.stats()["submitted"], 2)
+
+    def test_run_on_own_worker_runs_inline(self):
+        pool = BlockingPool("nested", max_workers=1)
+        self.addCleanup(pool.shutdown)
+
+        def task():
+            return threading.get_ident(), pool.run(threading.get_ident)
+
+        outer, inner = pool.submit(task).result(timeout=1)
+
+        self.assertEqual(outer, inner)
+        self.assertNotEqual(pool.run(threading.get_ident), threading.get_ident())
+
+    def test_disabled_pool_runs_inline(self):
+        pool = BlockingPool("inline", max_workers=0)
+
+        self.assertEqual(
+            pool.submit(threading.get_ident).result(), threading.get_ident()
+        )
+
+    @override_settings(BLOCKING_POOLS={"test": {"MAX_WORKERS": 3}})
+    def test_get_pool_reads_settings(self):
+        pool = get_pool("test")
+
+        self.assertEqual(pool.max_workers, 3)
+        self.assertIs(get_pool("test"), pool)
@@ -0,0 +1,105 @@
+"""
+All the tests about the query profiling middleware
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import path
+
+from core.profiling import (
+    QueryBudgetExceeded,
+    QueryProfilingMiddleware,
+    fingerprint,
+    get_query_budget,
+    query_budget,
+)
+from user import urls as user_urls
+
+
+@query_budget(1)
+def lookups(request, count):
+    for pk in range(count):
+        get_user_model().objects.filter(pk=pk).exists()
+    return HttpResponse("ok")
+
+
+urlpatterns = [path("lookups/<int:count>", lookups, name="lookups")]
+
+PROFILING = {"ENABLED": True, "N1_THRESHOLD": 3, "STRICT": False}
+
+
+@override_settings(ROOT_URLCONF=__name__, QUERY_PROFILING=PROFILING)
+class QueryProfilingMiddlewareTests(TestCase):
+    def get_logged(self, url):
+        with self.assertLogs("core.profiling", "INFO") as logs:
+            res = self.client.get(url)
+        return res, logs.records[0].levelname, json.loads(logs.records[0].getMessage())
+
+    def test_server_timing_and_log_record(self):
+        res, level, record = self.get_logged("/lookups/1")
+
+        self.assertRegex(
+            res["Server-Timing"], r'^db;dur=[\d.]+;desc="1 queries", total;dur=[\d.]+$'
+        )
+        self.assertEqual(level, "INFO")
+        self.assertEqual(record["view"], "lookups")
+        self.assertEqual(record["queries"], 1)
+        self.assertEqual(record["budget"], 1)
+        self.assertEqual(record["n_plus_one"], [])
+
+    def test_repeated_statement_flagged(self):
+        res, level, record = self.get_logged("/lookups/3")
+
+        self.assertEqual(level, "WARNING")
+        self.assertEqual(record["queries"], 3)
+        [sql] = record["n_plus_one"]
+        self.assertIn("core_user", sql)
+        self.assertEqual(record["duplicates"], {sql: 3})
+
+    @override_settings(QUERY_PROFILING={**PROFILING, "STRICT": True})
+    def test_strict_mode_fails_over_budget(self):
+        self.client.get("/lookups/1")
+
+        with self.assertRaisesRegex(QueryBudgetExceeded, "ran 2 queries"):
+            self.client.get("/lookups/2")
+
+    def test_async_get_response(self):
+        async def view(request):
+            await asyncio.sleep(0)
+            return HttpResponse("ok")
+
+        middleware = QueryProfilingMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        with self.assertLogs("core.profiling", "INFO") as logs:
+            res = async_to_sync(middleware)(RequestFactory().get("/lookups/1"))
+
+        self.assertRegex(res["Server-Timing"], r"^total;dur=[\d.]+$")
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], "/lookups/1")
+        self.assertNotIn("queries", record)
+
+    @override_settings(QUERY_PROFILING={**PROFILING, "ENABLED": False})
+    def test_disabled(self):
+        res = self.client.get("/lookups/1")
+
+        self.assertNotIn("Server-Timing", res)
+
+
+class QueryBudgetTests(SimpleTestCase):
+    def test_in_lists_share_a_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s)'),
+        )
+
+    def test_every_user_view_has_a_budget(self):
+        # the test profile fails the tests of a view running over its budget
+        for pattern in user_urls.urlpatterns:
+            with self.subTest(view=pattern.name):
+                self.assertIsNotNone(get_query_budget(pattern.callback))
@@ -0,0 +1,141 @@
+"""
+All the tests about the query plans of the hot recipe filters
+"""
+
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Recipe, Review
+
+# enough rows, of a realistic width, for a full scan to cost more than
+# fetching the few matching rows through an index
+RECIPE_COUNT = 30_000
+AUTHOR_COUNT = 500
+INSTRUCTION = "Stir and simmer until done. " * 12
+
+
+class RecipeIndexUsageTests(TestCase):
+    """
+    The filters of the recipe endpoints run as index scans on the indexes
+    declared in Recipe.Meta, on SQLite and on PostgreSQL
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.bulk_create(
+            get_user_model()(email=f"author{i}@example.com", password="!")
+            for i in range(AUTHOR_COUNT)
+        )
+        cls.author = get_user_model().objects.order_by("pk").first()
+        # generated by the database, much faster than building models: about
+        # one recipe in 100 is public, each author has RECIPE_COUNT /
+        # AUTHOR_COUNT recipes and cook times are spread over 5-600 minutes
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH RECURSIVE n(i) AS (
+                    SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %s
+                )
+                INSERT INTO core_recipe (
+                    title, description, instruction, difficulty, time, public,
+                    author_id, review_count, rating_sum, rating_avg
+                )
+                SELECT
+                    'recipe', 'description', %s,
+                    CAST(i %% 3 + 1 AS VARCHAR(1)), 5 + i * 37 %% 596,
+                    i %% 100 = 0, %s + i %% %s, 0, 0, 0
+                FROM n
+                """,
+                [RECIPE_COUNT, INSTRUCTION, cls.author.pk, AUTHOR_COUNT],
+            )
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+        else:
+            self.assertNotRegex(plan, r"SCAN (TABLE )?core_recipe\b(?! USING)")
+
+    def test_public_difficulty_filter(self):
+        self.assertUsesIndex(
+            Recipe.objects.filter(public=True, difficulty="3"),
+            "recipe_public_difficulty_idx",
+        )
+
+    # SQLite only keeps the average number of rows per value, it cannot tell
+    # that public=True is rare
+    @skipUnless(connection.vendor == "postgresql", "needs PostgreSQL statistics")
+    def test_public_filter(self):
+        self.assertUsesIndex(
+            Recipe.objects.filter(public=True), "recipe_public_difficulty_idx"
+        )
+
+    def test_author_public_filter(self):
+        self.assertUsesIndex(
+            Recipe.objects.filter(author=self.author, public=False),
+            "recipe_author_public_idx",
+        )
+
+    def test_author_filter(self):
+        self.assertUsesIndex(
+            Recipe.objects.filter(author=self.author), "recipe_author_public_idx"
+        )
+
+    def test_time_filter(self):
+        self.assertUsesIndex(Recipe.objects.filter(time__lte=10), "recipe_time_idx")
+
+    @skipUnless(connection.vendor == "postgresql", "needs PostgreSQL statistics")
+    def test_visible_to_uses_both_indexes(self):
+        plan = Recipe.objects.visible_to(self.author).explain()
+
+        self.assertIn("recipe_public_difficulty_idx", plan)
+        self.assertIn("recipe_author_public_idx", plan)
+
+
+class ReviewIndexUsageTests(TestCase):
+    """The /user/self/reviews listing reads review_author_listing_idx, no sort"""
+
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.bulk_create(
+            get_user_model()(email=f"reviewer{i}@example.com", password="!")
+            for i in range(AUTHOR_COUNT)
+        )
+        cls.author = get_user_model().objects.order_by("pk").first()
+        Recipe.objects.bulk_create(
+            Recipe(
+                title="recipe", description="description", time=10, author=cls.author
+            )
+            for _ in range(10)
+        )
+        # every reviewer reviews every recipe
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO core_review (title, body, rating, author_id, recipe_id)
+                SELECT 'review', %s, 4, u.id, r.id
+                FROM core_user u CROSS JOIN core_recipe r
+                """,
+                [INSTRUCTION],
+            )
+            cursor.execute("ANALYZE")
+
+    def test_listing_uses_covering_index(self):
+        plan = (
+            Review.objects.filter(author=self.author)
+            .only("id", "recipe", "title", "rating")
+            .order_by("-id")[:20]
+            .explain()
+        )
+
+        self.assertIn("review_author_listing_idx", plan)
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+            self.assertNotIn("Sort", plan)
+        else:
+            self.assertNotIn("TEMP B-TREE", plan)
@@ -0,0 +1,96 @@
+"""
+All the tests about the orjson renderer and parser
+"""
+
+import datetime
+import decimal
+import io
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+PAYLOAD = {
+    "count": 2,
+    "results": [
+        {
+            "id": 1,
+            "title": "Crème brûlée",
+            "rating_avg": 4.5,
+            "price": decimal.Decimal("3.20"),
+            "created": datetime.datetime(2023, 2, 16, 21, 18, 5, 123456, timezone.utc),
+            "day": datetime.date(2023, 2, 16),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "label": gettext_lazy("Name"),
+            "tags": ("dessert", None, True),
+            "notes": "line\u2028separator\u2029",
+        },
+        {1: "non string key", "empty": {}},
+    ],
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_output_as_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD)
+        )
+
+    def test_indent_falls_back(self):
+        rendered = FastJSONRenderer().render(
+            {"a": [1]}, "application/json; indent=4", {}
+        )
+
+        self.assertEqual(
+            rendered,
+            JSONRenderer().render({"a": [1]}, "application/json; indent=4", {}),
+        )
+        self.assertIn(b"\n    ", rendered)
+
+    def test_big_integers_fall_back(self):
+        self.assertEqual(
+            FastJSONRenderer().render({"n": 2**70}), b'{"n":%d}' % 2**70
+        )
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_without_orjson(self):
+        with mock.patch("core.renderers.orjson", None):
+            rendered = FastJSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(rendered, JSONRenderer().render(PAYLOAD))
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, body, parser=None, **context):
+        return (parser or FastJSONParser()).parse(
+            io.BytesIO(body), parser_context=context
+        )
+
+    def test_same_result_as_json_parser(self):
+        body = '{"title": "Crème brûlée", "ids": [1, 2.5, null, true]}'.encode()
+
+        self.assertEqual(self.parse(body), self.parse(body, JSONParser()))
+
+    def test_invalid_json(self):
+        for body in (b"{", b'{"rating": NaN}', b"\xff"):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                self.parse(body)
+
+    def test_other_encoding_falls_back(self):
+        body = '{"title": "Crème"}'.encode("latin-1")
+
+        self.assertEqual(self.parse(body, encoding="latin-1"), {"title": "Crème"})
+
+    def test_without_orjson(self):
+        with mock.patch("core.parsers.orjson", None):
+            self.assertEqual(self.parse(b'{"a": 1}'), {"a": 1})
@@ -0,0 +1,91 @@
+"""
+All the tests about the health and export endpoints
+"""
+
+import gzip
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+class HealthEndpointTests(TestCase):
+    def test_healthz_does_not_touch_database(self):
+        with self.assertNumQueries(0):
+            res = self.client.get(reverse("healthz"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {"status": "ok"})
+
+    def test_readyz_with_database_up(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("readyz"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["database"], "up")
+
+    @patch("core.views.ping", side_effect=OperationalError)
+    def test_readyz_with_database_down(self, patched_ping):
+        res = self.client.get(reverse("readyz"))
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()["database"], "down")
+
+    def test_write_methods_not_allowed(self):
+        res = self.client.post(reverse("readyz"))
+
+        self.assertEqual(res.status_code, 405)
+
+
+class ExportEndpointTests(TestCase):
+    def setUp(self) -> None:
+        self.staff = get_user_model().objects.create_superuser(
+            "admin@example.com", "45Egd!!94"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def download(self, res):
+        return gzip.decompress(b"".join(res.streaming_content)).decode()
+
+    def test_streams_gzip_jsonl(self):
+        user = get_user_model().objects.create_user("user@example.com", "45Egd!!94")
+
+        res = self.client.get(
+            reverse("export", args=["users"]), {"since_id": self.staff.pk}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/gzip")
+        self.assertIn('filename="users.jsonl.gz"', res["Content-Disposition"])
+        rows = [json.loads(line) for line in self.download(res).splitlines()]
+        self.assertEqual([row["email"] for row in rows], [user.email])
+
+    def test_csv(self):
+        res = self.client.get(
+            reverse("export", args=["reviews"]), {"file_format": "csv"}
+        )
+
+        self.assertEqual(
+            self.download(res).splitlines(),
+            ["id,author,recipe,title,body,rating"],
+        )
+
+    def test_staff_only(self):
+        user = get_user_model().objects.create_user("user@example.com", "45Egd!!94")
+        self.client.force_authenticate(user)
+
+        res = self.client.get(reverse("export", args=["users"]))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_dataset(self):
+        res = self.client.get(reverse("export", args=["tokens"]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
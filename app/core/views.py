@@ -0,0 +1,86 @@
+"""
+Health and metrics endpoints for orchestrators and scrapers, plain Django
+views on purpose: no authentication, throttling or content negotiation to
+go through. And the staff data export, an API view
+"""
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import (
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from user.authentication import CachedTokenAuthentication
+
+from .db import ping
+from .export import DATASETS, Export
+from .metrics import get_registry
+from .serializers import ExportParamsSerializer
+
+
+@never_cache
+@require_safe
+def healthz(request):
+    """Liveness: the process is up and serving requests"""
+    return JsonResponse({"status": "ok"})
+
+
+@never_cache
+@require_safe
+def readyz(request):
+    """Readiness: the process can reach the database"""
+    try:
+        ping()
+    except DatabaseError:
+        return JsonResponse({"status": "unavailable", "database": "down"}, status=503)
+    return JsonResponse({"status": "ok", "database": "up"})
+
+
+@never_cache
+@require_safe
+def metrics(request):
+    """
+    The metrics of core.metrics, summed over the worker processes, in the
+    Prometheus text format. Scrapers must send METRICS["TOKEN"] as a bearer
+    token; without one, the endpoint is only served with DEBUG on
+    """
+    token = settings.METRICS["TOKEN"]
+    if not settings.METRICS["ENABLED"] or not (token or settings.DEBUG):
+        raise Http404
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+class ExportView(APIView):
+    """
+    GET a dataset as a gzip-compressed JSONL or CSV download, streamed while
+    it is read from the database (see core.export), for staff only
+    """
+
+    permission_classes = [IsAdminUser]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            raise Http404
+        params = ExportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        fmt = params.validated_data["file_format"]
+        export = Export(dataset, fmt, params.validated_data["since_id"])
+        response = StreamingHttpResponse(export.gzip(), content_type="application/gzip")
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{fmt}.gz"'
+        return response
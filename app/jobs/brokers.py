@@ -0,0 +1,155 @@
+"""
+Brokers store enqueued jobs until a worker runs them, picked with
+settings.JOBS["BROKER"]:
+
+- DatabaseBroker, the default: jobs are rows of the jobs_job table, so no
+  other service is needed. A job enqueued inside a transaction is only
+  seen by the workers once it commits, and disappears if it rolls back,
+  like the change that caused it
+- EagerBroker runs every job right away in the caller, with no retries,
+  and lets its exceptions through (the test profile uses it, so tests see
+  the effects of their jobs)
+
+A broker is built with settings.JOBS and implements enqueue(), and
+claim(), complete(), fail() and purge() for the worker (jobs.worker)
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+class EagerBroker:
+    def __init__(self, options):
+        pass
+
+    def enqueue(self, task, args, kwargs, key=None, delay=0):
+        task(*args, **kwargs)
+
+
+class DatabaseBroker:
+    def __init__(self, options):
+        self.max_attempts = options["MAX_ATTEMPTS"]
+        self.retry_delay = options["RETRY_DELAY"]
+        self.lease = timedelta(seconds=options["LEASE"])
+        self.retention = timedelta(days=options["RETENTION_DAYS"])
+
+    def enqueue(self, task, args, kwargs, key=None, delay=0):
+        job = Job(
+            task=task.name,
+            args=args,
+            kwargs=kwargs,
+            queue=task.queue,
+            max_attempts=task.max_attempts or self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            idempotency_key=key,
+        )
+        # one INSERT ... ON CONFLICT DO NOTHING, a duplicate key is no error
+        Job.objects.bulk_create([job], ignore_conflicts=True)
+
+    def claim(self, queues):
+        """
+        The next due job of `queues`, marked running and leased to the
+        caller, None when there is none. Concurrent workers never claim the
+        same job: on PostgreSQL they skip the rows locked by the others, and
+        the UPDATE only succeeds if the job is still as it was read
+        """
+        due = Job.objects.filter(
+            queue__in=queues,
+            status__in=[Job.Status.QUEUED, Job.Status.RUNNING],
+            run_at__lte=timezone.now(),
+        ).order_by("run_at", "pk")
+        while True:
+            with transaction.atomic():
+                job = due.select_for_update(skip_locked=True).first()
+                if job is None:
+                    return None
+                claimed = Job.objects.filter(
+                    pk=job.pk, status=job.status, attempts=job.attempts
+                )
+                if (
+                    job.status == Job.Status.RUNNING
+                    and job.attempts >= job.max_attempts
+                ):
+                    # its worker died during the last attempt
+                    claimed.update(
+                        status=Job.Status.FAILED,
+                        finished_at=timezone.now(),
+                        last_error="Lease expired",
+                    )
+                    continue
+                job.run_at = timezone.now() + self.lease
+                if claimed.update(
+                    status=Job.Status.RUNNING,
+                    attempts=F("attempts") + 1,
+                    run_at=job.run_at,
+                ):
+                    job.status = Job.Status.RUNNING
+                    job.attempts += 1
+                    return job
+
+    def complete(self, job):
+        self._attempt(job).update(
+            status=Job.Status.DONE, finished_at=timezone.now(), last_error=""
+        )
+
+    def fail(self, job, error, retry=True):
+        """
+        Record a failed attempt: the job is queued again after a delay
+        doubling with every attempt, unless `retry` is false or it had its
+        last attempt. Returns whether it will be retried
+        """
+        now = timezone.now()
+        attempt = self._attempt(job)
+        if retry and job.attempts < job.max_attempts:
+            delay = self.retry_delay * 2 ** (job.attempts - 1)
+            attempt.update(
+                status=Job.Status.QUEUED,
+                run_at=now + timedelta(seconds=delay),
+                last_error=error,
+            )
+            return True
+        attempt.update(status=Job.Status.FAILED, finished_at=now, last_error=error)
+        return False
+
+    def purge(self):
+        """
+        Delete the jobs done more than RETENTION_DAYS ago, which frees their
+        idempotency keys. Failed jobs are kept for inspection
+        """
+        deleted, _ = Job.objects.filter(
+            status=Job.Status.DONE, finished_at__lt=timezone.now() - self.retention
+        ).delete()
+        return deleted
+
+    def _attempt(self, job):
+        # a worker overrunning its lease no longer owns the job
+        return Job.objects.filter(
+            pk=job.pk, status=Job.Status.RUNNING, attempts=job.attempts
+        )
+
+
+_broker = None
+
+
+def get_broker():
+    """The broker of settings.JOBS, created on first use"""
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.JOBS["BROKER"])(settings.JOBS)
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(*, setting, **kwargs):
+    global _broker
+    if setting == "JOBS":
+        _broker = None
@@ -0,0 +1,68 @@
+"""
+Command running the background jobs queued in the database. Run as many
+workers as needed, on any host reaching the database: they never run the
+same job twice at once
+"""
+
+import signal
+from typing import Optional, Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.brokers import get_broker
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    """Django command to run background jobs until stopped"""
+
+    help = "Run the background jobs of the given queues"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Queue to take jobs from, repeatable (default: default)",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when no job is due (default: 1)",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            help="Exit after running this many jobs, e.g. to recycle the process",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> Optional[str]:
+        broker = get_broker()
+        if not hasattr(broker, "claim"):
+            raise CommandError(
+                f"{type(broker).__name__} runs jobs when they are enqueued, "
+                "there is no queue to work on"
+            )
+        worker = Worker(options["queues"] or ["default"], broker)
+        # a deploy stopping the worker lets the job in progress finish
+        handlers = {
+            signum: signal.signal(signum, worker.stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            worker.run(options["burst"], options["poll"], options["max_jobs"])
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Ran {worker.done + worker.failed} jobs, {worker.failed} failed"
+            )
+        )
@@ -0,0 +1,50 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+
+class Job(models.Model):
+    """
+    A call of a task (jobs.registry) queued by the database broker. Queued
+    jobs run once `run_at` has passed; a running job holds a lease until
+    `run_at`, after which it is considered abandoned by its worker and run
+    again
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", _("Queued")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    task = models.CharField(_("Task"), max_length=200)
+    args = models.JSONField(_("Arguments"), default=list)
+    kwargs = models.JSONField(_("Keyword arguments"), default=dict)
+    queue = models.CharField(_("Queue"), max_length=50, default="default")
+    status = models.CharField(
+        _("Status"), max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_("Max attempts"))
+    run_at = models.DateTimeField(_("Run at"), default=timezone.now)
+    # a second job enqueued with the key of an existing one is dropped
+    idempotency_key = models.CharField(
+        _("Idempotency key"), max_length=200, null=True, unique=True
+    )
+    last_error = models.TextField(_("Last error"), blank=True)
+    created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
+    finished_at = models.DateTimeField(_("Finished at"), null=True)
+
+    class Meta:
+        indexes = [
+            # what workers poll: the due jobs of a queue, finished ones left out
+            models.Index(
+                fields=["queue", "run_at"],
+                condition=Q(status__in=["queued", "running"]),
+                name="jobs_job_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,62 @@
+"""
+Tasks: functions that can run as background jobs. Declare them in a
+`tasks` module of an app (imported by JobsConfig.ready, so every worker
+knows them) and enqueue calls with JSON serializable arguments:
+
+    @task(max_attempts=3)
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.enqueue([user.pk], key=f"welcome-email:{user.pk}")
+
+A job may run more than once (a retry after a failure, or after its worker
+died mid-run), so tasks must be safe to repeat
+"""
+
+_tasks = {}
+
+
+class Task:
+    def __init__(self, func, name, queue, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        """Run the task now, in the caller"""
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, args=(), kwargs=None, key=None, delay=0):
+        """
+        Queue a run of the task on the configured broker. `key` makes the
+        call idempotent: it is dropped if a job with the same key exists.
+        `delay` is in seconds
+        """
+        from .brokers import get_broker
+
+        return get_broker().enqueue(
+            self, list(args), kwargs or {}, key=key, delay=delay
+        )
+
+    def __repr__(self):
+        return f"<Task {self.name}>"
+
+
+def task(func=None, *, queue="default", max_attempts=None):
+    """
+    Register `func` as a task. max_attempts defaults to
+    JOBS["MAX_ATTEMPTS"]
+    """
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        _tasks[name] = Task(func, name, queue, max_attempts)
+        return _tasks[name]
+
+    return decorator(func) if func is not None else decorator
+
+
+def get_task(name):
+    """The task registered as `name`, KeyError if there is none"""
+    return _tasks[name]
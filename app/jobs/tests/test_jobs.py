@@ -0,0 +1,217 @@
+"""
+All the tests about the background jobs: broker, worker and command
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.brokers import get_broker
+from jobs.models import Job
+from jobs.registry import task
+from jobs.worker import Worker
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise ValueError("boom")
+
+
+DATABASE_BROKER = {**settings.JOBS, "BROKER": "jobs.brokers.DatabaseBroker"}
+
+
+@override_settings(JOBS={**DATABASE_BROKER, "MAX_ATTEMPTS": 3, "RETRY_DELAY": 10})
+class DatabaseBrokerTests(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+        self.worker = Worker()
+
+    def make_due(self):
+        Job.objects.update(run_at=timezone.now())
+
+    def test_enqueue_and_run(self):
+        record.enqueue(["a"])
+
+        job = Job.objects.get()
+        self.assertEqual(job.task, f"{__name__}.record")
+        self.assertEqual(job.args, ["a"])
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.max_attempts, 3)
+
+        self.assertTrue(self.worker.run_once())
+        self.assertFalse(self.worker.run_once())
+
+        self.assertEqual(calls, ["a"])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_idempotency_key(self):
+        record.enqueue(["a"], key="once")
+        record.enqueue(["b"], key="once")
+        record.enqueue(["c"])
+
+        self.assertEqual(Job.objects.count(), 2)
+        self.worker.run(burst=True)
+        self.assertEqual(sorted(calls), ["a", "c"])
+
+        # the key still holds once the job is done
+        record.enqueue(["d"], key="once")
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_delay(self):
+        record.enqueue(["a"], delay=60)
+
+        self.assertFalse(self.worker.run_once())
+        self.make_due()
+        self.assertTrue(self.worker.run_once())
+        self.assertEqual(calls, ["a"])
+
+    def test_rolled_back_enqueue(self):
+        with transaction.atomic():
+            record.enqueue(["a"])
+            transaction.set_rollback(True)
+
+        self.assertFalse(Job.objects.exists())
+
+    def test_retries_with_backoff(self):
+        explode.enqueue()
+        job = Job.objects.get()
+
+        before = timezone.now()
+        self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("ValueError: boom", job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=10))
+
+        # not due yet
+        self.assertFalse(self.worker.run_once())
+        self.make_due()
+        self.worker.run_once()
+
+        # the task allows two attempts
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(self.worker.failed, 2)
+
+    def test_unknown_task_not_retried(self):
+        Job.objects.create(task="jobs.tests.nothing", max_attempts=3)
+
+        self.worker.run_once()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.last_error, "Unknown task jobs.tests.nothing")
+
+    def test_expired_lease_runs_again(self):
+        record.enqueue(["a"])
+        job = get_broker().claim(["default"])
+        self.assertIsNone(get_broker().claim(["default"]))
+
+        # its worker died: the lease runs out
+        self.make_due()
+        self.worker.run_once()
+
+        self.assertEqual(calls, ["a"])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(job.attempts, 2)
+
+        # the first worker coming back cannot overwrite the outcome
+        get_broker().fail(job, "late")
+        self.assertEqual(Job.objects.get().status, Job.Status.DONE)
+
+    def test_expired_last_lease_fails(self):
+        Job.objects.create(
+            task=f"{__name__}.record",
+            args=["a"],
+            status=Job.Status.RUNNING,
+            attempts=3,
+            max_attempts=3,
+        )
+
+        self.assertFalse(self.worker.run_once())
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.last_error, "Lease expired")
+        self.assertEqual(calls, [])
+
+    def test_queues(self):
+        Job.objects.create(
+            task=f"{__name__}.record", args=["a"], queue="mail", max_attempts=1
+        )
+
+        self.assertFalse(self.worker.run_once())
+        self.assertTrue(Worker(["default", "mail"]).run_once())
+
+    def test_purge(self):
+        old = timezone.now() - timedelta(days=30)
+        Job.objects.bulk_create(
+            [
+                Job(task="a", status=Job.Status.DONE, finished_at=old, max_attempts=1),
+                Job(
+                    task="b", status=Job.Status.FAILED, finished_at=old, max_attempts=1
+                ),
+                Job(
+                    task="c",
+                    status=Job.Status.DONE,
+                    finished_at=timezone.now(),
+                    max_attempts=1,
+                ),
+            ]
+        )
+
+        self.assertEqual(get_broker().purge(), 1)
+        self.assertEqual(sorted(Job.objects.values_list("task", flat=True)), ["b", "c"])
+
+
+class RunJobsCommandTests(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+
+    @override_settings(JOBS=DATABASE_BROKER)
+    def test_burst(self):
+        for value in "abc":
+            record.enqueue([value])
+        explode.enqueue()
+        stderr = StringIO()
+
+        call_command("run_jobs", "--burst", stderr=stderr)
+
+        self.assertEqual(calls, ["a", "b", "c"])
+        self.assertIn("Ran 4 jobs, 1 failed", stderr.getvalue())
+
+    @override_settings(JOBS=DATABASE_BROKER)
+    def test_max_jobs(self):
+        for value in "abc":
+            record.enqueue([value])
+
+        call_command("run_jobs", "--max-jobs", "2", stderr=StringIO())
+
+        self.assertEqual(calls, ["a", "b"])
+
+    @override_settings(JOBS={**settings.JOBS, "BROKER": "jobs.brokers.EagerBroker"})
+    def test_eager_broker(self):
+        record.enqueue(["a"])
+
+        self.assertEqual(calls, ["a"])
+        self.assertFalse(Job.objects.exists())
+        with self.assertRaises(CommandError):
+            call_command("run_jobs", "--burst")
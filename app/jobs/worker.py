@@ -0,0 +1,90 @@
+"""
+The loop run by `manage.py run_jobs`: claim a due job, run its task,
+record the outcome, and poll the broker again when there is nothing to do
+"""
+
+import logging
+import time
+import traceback
+
+from django.db import close_old_connections
+
+from .brokers import get_broker
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+# seconds between two purges of the finished jobs
+PURGE_INTERVAL = 3600
+
+
+class Worker:
+    def __init__(self, queues=("default",), broker=None):
+        self.queues = list(queues)
+        self.broker = broker or get_broker()
+        self.stopping = False
+        self.done = 0
+        self.failed = 0
+
+    def stop(self, *args):
+        """Finish the job in progress, then leave run(). A signal handler"""
+        self.stopping = True
+
+    def run_once(self):
+        """Run one due job, returns False when there was none"""
+        # a job is a request of sorts: the connection may have been closed
+        # by the server or outlived CONN_MAX_AGE in between
+        close_old_connections()
+        try:
+            job = self.broker.claim(self.queues)
+            if job is None:
+                return False
+            self.execute(job)
+            return True
+        finally:
+            close_old_connections()
+
+    def execute(self, job):
+        try:
+            task = get_task(job.task)
+        except KeyError:
+            self.failed += 1
+            self.broker.fail(job, f"Unknown task {job.task}", retry=False)
+            logger.error("%s: unknown task, not retried", job)
+            return
+        started = time.perf_counter()
+        try:
+            task(*job.args, **job.kwargs)
+        except Exception:
+            self.failed += 1
+            retried = self.broker.fail(job, traceback.format_exc())
+            logger.log(
+                logging.WARNING if retried else logging.ERROR,
+                "%s: attempt %d/%d failed%s",
+                job,
+                job.attempts,
+                job.max_attempts,
+                ", retried later" if retried else "",
+                exc_info=True,
+            )
+            return
+        self.done += 1
+        self.broker.complete(job)
+        logger.info("%s: done in %.3fs", job, time.perf_counter() - started)
+
+    def run(self, burst=False, poll=1.0, max_jobs=None):
+        """
+        Run jobs until stopped, or until the queues are empty with `burst`,
+        or `max_jobs` jobs ran
+        """
+        next_purge = time.monotonic()
+        while not self.stopping:
+            if time.monotonic() >= next_purge:
+                self.broker.purge()
+                next_purge = time.monotonic() + PURGE_INTERVAL
+            if max_jobs is not None and self.done + self.failed >= max_jobs:
+                return
+            if not self.run_once():
+                if burst:
+                    return
+                time.sleep(poll)
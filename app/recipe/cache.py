@@ -0,0 +1,94 @@
+"""
+Response cache of the recipe read endpoints, invalidated with versioned
+tags. Every entry key embeds the current version of the tags its response
+depends on, and the signal handlers in recipe.signals replace the version
+of the tags a write touches, so stale entries are never read again and
+simply expire. Tags:
+
+    "recipes"       any change to any recipe (lists and search)
+    "recipe:<pk>"   one recipe, its links and its reviews
+    "ingredients", "tags", "authors"
+                    renames shown inside every recipe
+
+Responses are cached per user, except the ones every user sees the same way
+(public recipes), which are shared. The versions double as ETags: a matching
+If-None-Match is answered 304 before the database is queried. Disabled while
+RECIPE_CACHE["CACHE_ALIAS"] is unset; the alias must be shared by all
+workers (memcached, ...), or a worker would keep serving what another one
+invalidated
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_KEY = "recipe-cache:version:{}"
+RESPONSE_KEY = "recipe-cache:response:{}"
+
+
+def get_cache():
+    """The cache holding versions and responses, None when disabled"""
+    alias = settings.RECIPE_CACHE["CACHE_ALIAS"]
+    return caches[alias] if alias else None
+
+
+def get_versions(cache, tags):
+    """Current version of each tag, creating the missing ones"""
+    keys = [VERSION_KEY.format(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # add() so concurrent readers agree on the first version
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*tags):
+    """Give the tags new versions, orphaning every entry made with the old ones"""
+    cache = get_cache()
+    if cache is not None:
+        cache.set_many(
+            {VERSION_KEY.format(tag): uuid.uuid4().hex for tag in tags}, None
+        )
+
+
+def invalidate(*tags):
+    """
+    Bump the tags once the current transaction commits: bumping earlier
+    would let a concurrent request cache the old rows under the new version
+    """
+    if get_cache() is not None:
+        transaction.on_commit(lambda: bump(*tags))
+
+
+def invalidate_recipes(pks):
+    if get_cache() is not None:
+        invalidate("recipes", *(f"recipe:{pk}" for pk in pks))
+
+
+def response_keys(cache, tags, *variants):
+    """
+    Digest of the tag versions and of each variant of what identifies the
+    response (path, query parameters, media type, user). Used as cache keys
+    and as ETags
+    """
+    versions = get_versions(cache, tags)
+    return [
+        hashlib.sha1(repr((versions, parts)).encode()).hexdigest() for parts in variants
+    ]
+
+
+def get_response(cache, digest):
+    return cache.get(RESPONSE_KEY.format(digest))
+
+
+def set_response(cache, digest, content, content_type):
+    cache.set(
+        RESPONSE_KEY.format(digest),
+        (content, content_type),
+        settings.RECIPE_CACHE["TIMEOUT"],
+    )
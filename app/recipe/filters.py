@@ -0,0 +1,33 @@
+from rest_framework.filters import BaseFilterBackend
+
+from .serializers import RecipeFilterParamsSerializer
+
+# query parameter -> Recipe lookup
+LOOKUPS = {
+    "public": "public",
+    "difficulty": "difficulty",
+    "author": "author",
+    "min_time": "time__gte",
+    "max_time": "time__lte",
+}
+
+
+def get_filters(request):
+    """The Recipe lookups asked for by the query parameters"""
+    params = RecipeFilterParamsSerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    return {
+        LOOKUPS[name]: value
+        for name, value in params.validated_data.items()
+        if value is not None
+    }
+
+
+class RecipeFilterBackend(BaseFilterBackend):
+    """
+    ?public=, ?difficulty=, ?author=, ?min_time= and ?max_time=, each backed
+    by one of the Recipe indexes
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset.filter(**get_filters(request))
@@ -0,0 +1,108 @@
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key: every page is a
+    `WHERE id > cursor ORDER BY id LIMIT n`, so deep pages cost the same as
+    the first one instead of growing with an OFFSET
+    """
+
+    ordering = "id"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class MultiColumnCursorPagination(RecipeCursorPagination):
+    """
+    Keyset pagination on every column of `ordering`, which must end with a
+    unique one. DRF's CursorPagination only filters on the first column and
+    steps over rows sharing its value with an OFFSET, so pages deep into a
+    run of ties (every unreviewed recipe has a 0.0 rating) would scan all
+    the rows before them. Here the cursor holds the whole row position, and
+    pages start after it: `a < x OR (a = x AND (b < y OR (b = y AND ...)))`
+    """
+
+    separator = "|"
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [order.lstrip("-") for order in ordering]
+        if isinstance(instance, dict):
+            values = [instance[field] for field in fields]
+        else:
+            values = [getattr(instance, field) for field in fields]
+        return self.separator.join(str(value) for value in values)
+
+    def after(self, position, reverse):
+        """Q of the rows following `position`, or preceding it when `reverse`"""
+        values = position.split(self.separator)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = None
+        for order, value in reversed(list(zip(self.ordering, values))):
+            field = order.lstrip("-")
+            lookup = "lt" if order.startswith("-") != reverse else "gt"
+            past = Q(**{f"{field}__{lookup}": value})
+            if condition is not None:
+                past |= Q(**{field: value}) & condition
+            condition = past
+        # bounds the index scan on the first column
+        first = self.ordering[0]
+        lookup = "lte" if first.startswith("-") != reverse else "gte"
+        return Q(**{f"{first.lstrip('-')}__{lookup}": values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset, with the position filter above;
+        # positions are unique, so no offset is ever needed
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.after(current_position, reverse))
+
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = results[: self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        has_current = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = has_current, bool(following_position)
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next, self.has_previous = bool(following_position), has_current
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class TopRatedCursorPagination(MultiColumnCursorPagination):
+    """Walks recipe_top_rated_idx; the trailing id makes the ordering unique"""
+
+    ordering = ("-rating_avg", "-review_count", "-id")
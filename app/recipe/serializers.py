@@ -0,0 +1,138 @@
+from rest_framework import serializers
+from django.contrib.auth import get_user_model
+
+from core.models import Recipe, Review
+from core.serializers import ValuesSerializer
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ["id", "username"]
+        read_only_fields = fields
+
+
+class RecipeSerializer(serializers.ModelSerializer):
+    author = AuthorSerializer(read_only=True)
+    ingredients = serializers.SlugRelatedField(
+        many=True, read_only=True, slug_field="name"
+    )
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field="name")
+    reviews = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = Recipe
+        fields = [
+            "id",
+            "title",
+            "description",
+            "difficulty",
+            "instruction",
+            "time",
+            "public",
+            "author",
+            "ingredients",
+            "tags",
+            "reviews",
+            "review_count",
+            "rating_avg",
+        ]
+        read_only_fields = fields
+
+
+class RecipeValuesSerializer(ValuesSerializer):
+    """
+    RecipeSerializer output for the list endpoints, from values() rows and
+    one values_list() query per M2M relation, in the order of
+    RecipeQuerysetMixin's prefetches
+    """
+
+    serializer_class = RecipeSerializer
+    columns = {
+        "id": "id",
+        "title": "title",
+        "description": "description",
+        "difficulty": "difficulty",
+        "instruction": "instruction",
+        "time": "time",
+        "public": "public",
+        "author": {"id": "author_id", "username": "author__username"},
+        "review_count": "review_count",
+        "rating_avg": "rating_avg",
+    }
+
+    def get_related(self, pks):
+        ingredients = Recipe.ingredients.through.objects.filter(
+            recipe_id__in=pks
+        ).order_by("ingredient__name")
+        tags = Recipe.tags.through.objects.filter(recipe_id__in=pks).order_by(
+            "tag__name"
+        )
+        reviews = Review.objects.filter(recipe_id__in=pks).order_by("id")
+        return {
+            "ingredients": group(
+                ingredients.values_list("recipe_id", "ingredient__name")
+            ),
+            "tags": group(tags.values_list("recipe_id", "tag__name")),
+            "reviews": group(reviews.values_list("recipe_id", "id")),
+        }
+
+
+def group(pairs):
+    """{key: [values]} of (key, value) pairs, keeping their order"""
+    groups = {}
+    for key, value in pairs:
+        groups.setdefault(key, []).append(value)
+    return groups
+
+
+class RecipeWriteSerializer(serializers.ModelSerializer):
+    """One recipe of a bulk write, see recipe.services.upsert_recipes"""
+
+    id = serializers.IntegerField(min_value=1, required=False)
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=50), max_length=100, default=list
+    )
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50), max_length=20, default=list
+    )
+
+    class Meta:
+        model = Recipe
+        fields = [
+            "id",
+            "title",
+            "description",
+            "instruction",
+            "difficulty",
+            "time",
+            "public",
+            "ingredients",
+            "tags",
+        ]
+        extra_kwargs = {"instruction": {"required": False}}
+
+
+class RecipeSearchParamsSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class QueryBooleanField(serializers.BooleanField):
+    # a missing query parameter is no filter, not False like an HTML checkbox
+    default_empty_html = serializers.empty
+
+
+class RecipeFilterParamsSerializer(serializers.Serializer):
+    public = QueryBooleanField(required=False)
+    difficulty = serializers.ChoiceField(
+        choices=Recipe.DifficultyChoices.choices, required=False
+    )
+    author = serializers.IntegerField(min_value=1, required=False)
+    min_time = serializers.IntegerField(min_value=0, required=False)
+    max_time = serializers.IntegerField(min_value=0, required=False)
+
+
+class AutocompleteParamsSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=50)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
@@ -0,0 +1,96 @@
+"""
+Recipe writes in bulk: a constant number of queries per batch, whatever
+the number of recipes and of ingredient and tag links
+"""
+
+from django.db import connections, transaction
+
+from core.models import Ingredient, Recipe, Tag
+from core.names import normalize_name
+
+from .cache import invalidate_recipes
+
+# Recipe columns written from the recipe data
+FIELDS = ["title", "description", "instruction", "difficulty", "time", "public"]
+
+
+def upsert_recipes(author, recipes):
+    """
+    Create or update recipes of `author` in one transaction. `recipes` are
+    dicts of FIELDS plus `ingredients` and `tags` (lists of names, created
+    when unknown) and, to update a recipe, its `id`; an update replaces the
+    recipe's ingredients and tags. Raises Recipe.DoesNotExist when an id is
+    not one of the author's recipes. Returns the recipes, in input order.
+
+    Bulk queries skip the model signals, so the search vectors and the
+    response cache are refreshed here. Backends that cannot return primary
+    keys from a bulk INSERT (SQLite) insert the new recipes one by one.
+    """
+    db = Recipe.objects.db
+    with transaction.atomic(using=db):
+        ingredient_pks = Ingredient.objects.resolve_names(
+            name for recipe in recipes for name in recipe.get("ingredients", ())
+        )
+        tag_pks = Tag.objects.resolve_names(
+            name for recipe in recipes for name in recipe.get("tags", ())
+        )
+
+        update_ids = [recipe["id"] for recipe in recipes if recipe.get("id")]
+        existing = (
+            Recipe.objects.select_for_update().filter(author=author).in_bulk(update_ids)
+        )
+        unknown = set(update_ids) - set(existing)
+        if unknown:
+            raise Recipe.DoesNotExist(f"No recipes {sorted(unknown)} by {author}")
+
+        objects, created = [], []
+        for data in recipes:
+            if data.get("id"):
+                recipe = existing[data["id"]]
+                for field in FIELDS:
+                    if field in data:
+                        setattr(recipe, field, data[field])
+            else:
+                recipe = Recipe(
+                    author=author, **{f: data[f] for f in FIELDS if f in data}
+                )
+                created.append(recipe)
+            objects.append(recipe)
+
+        if connections[db].features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(created)
+        else:
+            for recipe in created:
+                recipe.save(force_insert=True)
+        if existing:
+            Recipe.objects.bulk_update(existing.values(), FIELDS)
+            Recipe.ingredients.through.objects.filter(recipe_id__in=existing).delete()
+            Recipe.tags.through.objects.filter(recipe_id__in=existing).delete()
+
+        Recipe.ingredients.through.objects.bulk_create(
+            [
+                Recipe.ingredients.through(
+                    recipe_id=recipe.pk,
+                    ingredient_id=ingredient_pks[normalize_name(name)],
+                )
+                for recipe, data in zip(objects, recipes)
+                for name in data.get("ingredients", ())
+            ],
+            # the same ingredient listed twice in one recipe
+            ignore_conflicts=True,
+        )
+        Recipe.tags.through.objects.bulk_create(
+            [
+                Recipe.tags.through(
+                    recipe_id=recipe.pk, tag_id=tag_pks[normalize_name(name)]
+                )
+                for recipe, data in zip(objects, recipes)
+                for name in data.get("tags", ())
+            ],
+            ignore_conflicts=True,
+        )
+
+        pks = [recipe.pk for recipe in objects]
+        Recipe.objects.filter(pk__in=pks).update_search_vector()
+        invalidate_recipes(pks)
+    return objects
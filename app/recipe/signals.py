@@ -0,0 +1,83 @@
+"""
+Signal handlers invalidating the recipe response cache (see recipe.cache)
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.models import Ingredient, Recipe, Review, Tag
+from core.tasks import recipes_refreshed
+
+from .cache import invalidate, invalidate_recipes
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_recipes([instance.pk])
+    elif action == "pre_clear":
+        # the recipes are unknown once the links are gone
+        invalidate_recipes(instance.recipe_set.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        invalidate_recipes(pk_set)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_recipe(sender, instance, **kwargs):
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(recipes_refreshed)
+def invalidate_refreshed_recipes(sender, recipe_ids, **kwargs):
+    invalidate_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, instance, created=False, **kwargs):
+    # a new ingredient is in no recipe until linked
+    if not created:
+        invalidate("recipes", "ingredients")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, instance, created=False, **kwargs):
+    if not created:
+        invalidate("recipes", "tags")
+
+
+# the username a User instance was loaded or last saved with
+SAVED_USERNAME = "_recipe_cache_username"
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_username(sender, instance, **kwargs):
+    # __dict__, so a deferred username is not loaded
+    if "username" in instance.__dict__:
+        instance.__dict__[SAVED_USERNAME] = instance.username
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_authors(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Recipes show their author's username: only a change of it retires the
+    cached recipes, not profile or password updates, nor logins (which only
+    save last_login)
+    """
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    saved = instance.__dict__.get(SAVED_USERNAME, SAVED_USERNAME)
+    if saved != instance.username:
+        invalidate("recipes", "authors")
+    instance.__dict__[SAVED_USERNAME] = instance.username
@@ -0,0 +1,142 @@
+"""
+All the tests about bulk recipe writes
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+from recipe.views import RecipeBulkWriteView
+
+BULK_URL = reverse("recipe:bulk")
+
+
+def recipe_payload(title, ingredients=(), tags=(), **fields):
+    return {
+        "title": title,
+        "description": "desc",
+        "time": 20,
+        "ingredients": list(ingredients),
+        "tags": list(tags),
+        **fields,
+    }
+
+
+class RecipeBulkWriteTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, payload):
+        return self.client.post(BULK_URL, payload, format="json")
+
+    def test_create_recipes(self):
+        Ingredient.objects.create(name="Salt")
+
+        res = self.post(
+            [
+                recipe_payload("carbonara", ["pasta", "salt ", "Pasta"], ["quick"]),
+                recipe_payload("soup", ["SALT", "leek"], public=True),
+            ]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        carbonara, soup = (Recipe.objects.get(pk=pk) for pk in res.data["ids"])
+        self.assertEqual(carbonara.author, self.user)
+        self.assertEqual(
+            sorted(carbonara.ingredients.values_list("name", flat=True)),
+            ["Salt", "pasta"],
+        )
+        self.assertEqual(list(carbonara.tags.values_list("name", flat=True)), ["quick"])
+        self.assertTrue(soup.public)
+        self.assertEqual(Ingredient.objects.count(), 3)
+
+    def test_update_replaces_fields_and_links(self):
+        recipe_id = self.post(
+            [recipe_payload("stew", ["beef", "wine"], ["slow"])]
+        ).data["ids"][0]
+
+        res = self.post(
+            [recipe_payload("beef stew", ["beef", "carrot"], id=recipe_id, time=180)]
+        )
+
+        self.assertEqual(res.data["ids"], [recipe_id])
+        recipe = Recipe.objects.get(pk=recipe_id)
+        self.assertEqual((recipe.title, recipe.time), ("beef stew", 180))
+        self.assertEqual(
+            sorted(recipe.ingredients.values_list("name", flat=True)),
+            ["beef", "carrot"],
+        )
+        self.assertFalse(recipe.tags.exists())
+
+    def test_other_users_recipe_rejected_atomically(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="45Egd!!94"
+        )
+        theirs = Recipe.objects.create(
+            title="theirs", description="desc", time=10, author=other
+        )
+
+        res = self.post(
+            [recipe_payload("new", ["egg"]), recipe_payload("mine", id=theirs.pk)]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id", res.data)
+        self.assertEqual(Recipe.objects.get(pk=theirs.pk).title, "theirs")
+        self.assertFalse(Recipe.objects.filter(title="new").exists())
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_invalid_recipe_rejected(self):
+        res = self.post([recipe_payload("ok"), {"title": "no time"}])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("time", res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    @patch.object(RecipeBulkWriteView, "max_recipes", 2)
+    def test_too_many_recipes(self):
+        res = self.post([recipe_payload(f"r{i}") for i in range(3)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_per_batch_size(self):
+        """
+        Savepoint and release, three queries per name model (look up, insert
+        the new names, read their keys back), the recipes, one INSERT per
+        through table and, on PostgreSQL, the search vector update. Without
+        pks returned by bulk INSERTs the recipes are inserted one by one
+        """
+        bulk_insert = connection.features.can_return_rows_from_bulk_insert
+        search = 1 if connection.vendor == "postgresql" else 0
+        for batch_size in (1, 5, 20):
+            payload = [
+                recipe_payload(
+                    f"recipe {i}",
+                    [f"ingredient {batch_size}-{j}" for j in range(20)],
+                    [f"tag {batch_size}-{j}" for j in range(5)],
+                )
+                for i in range(batch_size)
+            ]
+            recipe_inserts = 1 if bulk_insert else batch_size
+            with self.subTest(batch_size=batch_size), self.assertNumQueries(
+                2 + 3 + 3 + recipe_inserts + 2 + search
+            ):
+                res = self.post(payload)
+            self.assertEqual(len(res.data["ids"]), batch_size)
+            self.assertEqual(
+                Recipe.ingredients.through.objects.filter(
+                    recipe_id__in=res.data["ids"]
+                ).count(),
+                batch_size * 20,
+            )
@@ -0,0 +1,201 @@
+"""
+All the tests about the recipe response cache
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Review
+from jobs.worker import Worker
+
+from .test_recipe_api import RECIPES_URL, create_recipes, detail_url
+
+TOP_URL = reverse("recipe:top")
+
+
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "recipes": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "recipe-cache-tests",
+        },
+    },
+    RECIPE_CACHE={"CACHE_ALIAS": "recipes", "TIMEOUT": 60},
+)
+class RecipeResponseCacheTests(TestCase):
+    def setUp(self) -> None:
+        caches["recipes"].clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94"
+        )
+        self.client = APIClient()
+        # no authentication queries, only what the views run is counted
+        self.client.force_authenticate(self.user)
+        self.recipe_ids = create_recipes(self.user, 3)
+
+    def test_cached_list_served_without_queries(self):
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_query_params_are_part_of_the_key(self):
+        full = self.client.get(RECIPES_URL)
+        page = self.client.get(RECIPES_URL, {"page_size": 1})
+
+        self.assertNotEqual(full["ETag"], page["ETag"])
+        self.assertEqual(len(page.json()["results"]), 1)
+
+    def test_if_none_match_returns_304_without_queries(self):
+        etag = self.client.get(TOP_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TOP_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(res["ETag"], etag)
+
+    def test_review_change_invalidates_lists_and_detail(self):
+        list_etag = self.client.get(RECIPES_URL)["ETag"]
+        detail_etag = self.client.get(detail_url(self.recipe_ids[0]))["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.get(recipe=self.recipe_ids[0])
+            review.rating = 2
+            review.save()
+
+        res = self.client.get(detail_url(self.recipe_ids[0]))
+        self.assertNotEqual(res["ETag"], detail_etag)
+        self.assertEqual(res.json()["rating_avg"], 2)
+        self.assertNotEqual(self.client.get(RECIPES_URL)["ETag"], list_etag)
+
+    @override_settings(JOBS={**settings.JOBS, "BROKER": "jobs.brokers.DatabaseBroker"})
+    def test_background_rating_refresh_invalidates_detail(self):
+        url = detail_url(self.recipe_ids[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.get(recipe=self.recipe_ids[0])
+            review.rating = 2
+            review.save()
+        # cached before the queued refresh ran
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(Worker().run_once())
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["rating_avg"], 2)
+
+    def test_ingredient_rename_invalidates_detail(self):
+        url = detail_url(self.recipe_ids[0])
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingredient = Ingredient.objects.get(name="salt")
+            ingredient.name = "sea salt"
+            ingredient.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("sea salt", res.json()["ingredients"])
+
+    def test_other_recipe_change_keeps_detail(self):
+        url = detail_url(self.recipe_ids[0])
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Recipe.objects.get(pk=self.recipe_ids[1])
+            other.title = "renamed"
+            other.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_username_change_invalidates_lists(self):
+        etag = self.client.get(RECIPES_URL)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Test"
+            self.user.set_password("NewPasw123!!")
+            self.user.save()
+        self.assertEqual(
+            self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = "renamed"
+            self.user.save()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"][0]["author"]["username"], "renamed")
+
+    def test_errors_are_not_cached(self):
+        url = detail_url(max(self.recipe_ids) + 1)
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", self.client.get(url))
+
+    def test_private_responses_cached_per_user(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="45Egd!!94"
+        )
+        self.client.get(RECIPES_URL)
+
+        self.client.force_authenticate(other)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.json()["results"], [])
+
+    def test_public_responses_shared_between_users(self):
+        Recipe.objects.filter(pk=self.recipe_ids[0]).update(public=True)
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="45Egd!!94"
+        )
+        first = self.client.get(detail_url(self.recipe_ids[0]))
+        self.client.get(RECIPES_URL, {"public": "true"})
+
+        self.client.force_authenticate(other)
+        with self.assertNumQueries(0):
+            detail = self.client.get(detail_url(self.recipe_ids[0]))
+            self.client.get(RECIPES_URL, {"public": "true"})
+
+        self.assertEqual(detail["ETag"], first["ETag"])
+
+    def test_making_a_recipe_private_hides_the_shared_entry(self):
+        recipe = Recipe.objects.get(pk=self.recipe_ids[0])
+        recipe.public = True
+        recipe.save()
+        self.client.get(detail_url(recipe.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.public = False
+            recipe.save()
+
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@example.com", password="45Egd!!94"
+            )
+        )
+        res = self.client.get(detail_url(recipe.pk))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(RECIPE_CACHE={"CACHE_ALIAS": None, "TIMEOUT": 60})
+    def test_disabled_cache(self):
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
@@ -0,0 +1,424 @@
+"""
+All the tests about the recipe API
+"""
+
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Review, Tag, Recipe
+from recipe.serializers import RecipeSerializer, RecipeValuesSerializer
+from recipe.views import RecipeQuerysetMixin
+
+RECIPES_URL = reverse("recipe:list")
+
+
+def detail_url(recipe_id):
+    return reverse("recipe:detail", args=[recipe_id])
+
+
+def create_recipes(author, count):
+    """Create `count` recipes, each linked to two ingredients, a tag and a review"""
+    Recipe.objects.bulk_create(
+        Recipe(
+            title=f"recipe {i}", description="test description", time=30, author=author
+        )
+        for i in range(count)
+    )
+    ingredients = [Ingredient.objects.create(name=name) for name in ("pasta", "salt")]
+    tag = Tag.objects.create(name="quick")
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(recipe_id=recipe_id, ingredient_id=ingredient.id)
+        for recipe_id in recipe_ids
+        for ingredient in ingredients
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag.id)
+        for recipe_id in recipe_ids
+    )
+    Review.objects.bulk_create(
+        Review(
+            title="good",
+            body="lorem ipsum",
+            rating=4,
+            author=author,
+            recipe_id=recipe_id,
+        )
+        for recipe_id in recipe_ids
+    )
+    return recipe_ids
+
+
+class PublicRecipeApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_authentication_required(self):
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateRecipeApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94", username="test.user"
+        )
+        cls.recipe_ids = create_recipes(cls.user, 1000)
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_recipes(self):
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        recipe = res.data["results"][0]
+        self.assertEqual(recipe["id"], self.recipe_ids[0])
+        self.assertEqual(recipe["author"]["username"], "test.user")
+        self.assertEqual(sorted(recipe["ingredients"]), ["pasta", "salt"])
+        self.assertEqual(recipe["tags"], ["quick"])
+        self.assertEqual(len(recipe["reviews"]), 1)
+
+    def test_cursor_pagination_walks_all_recipes(self):
+        seen = []
+        url = RECIPES_URL + "?page_size=300"
+        while url:
+            res = self.client.get(url)
+            seen.extend(recipe["id"] for recipe in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, self.recipe_ids)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for page_size in (10, 1000):
+            # recipes joined with authors, then one query per M2M relation
+            with self.subTest(page_size=page_size), self.assertNumQueries(4):
+                res = self.client.get(RECIPES_URL, {"page_size": page_size})
+                self.assertEqual(len(res.data["results"]), page_size)
+
+    def test_retrieve_recipe(self):
+        recipe_id = self.recipe_ids[5]
+
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["title"], "recipe 5")
+
+    def test_write_methods_not_allowed(self):
+        res = self.client.post(RECIPES_URL, {"title": "new"})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class RecipeValuesSerializerTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94", username="test.user"
+        )
+        anonymous = get_user_model().objects.create_user(
+            email="nameless@example.com", password="45Egd!!94"
+        )
+        bare = Recipe.objects.create(
+            title="bare", description="", time=0, author=anonymous, public=True
+        )
+        full = Recipe.objects.create(
+            title="Crème brûlée",
+            description="desc",
+            instruction="bake\nthen chill",
+            difficulty=Recipe.DifficultyChoices.HARD,
+            time=90,
+            author=self.user,
+        )
+        # linked out of name order
+        for name in ("sugar", "cream", "egg"):
+            full.ingredients.add(Ingredient.objects.create(name=name))
+        for name in ("sweet", "french"):
+            full.tags.add(Tag.objects.create(name=name))
+        bare.tags.add(Tag.objects.get(name="sweet"))
+        for author, rating in ((anonymous, 5), (self.user, 2)):
+            Review.objects.create(
+                title="r", body="b", rating=rating, author=author, recipe=full
+            )
+
+    def recipes(self):
+        view = RecipeQuerysetMixin()
+        view.request = SimpleNamespace(user=self.user)
+        return view.get_queryset().order_by("id")
+
+    def test_same_output_as_recipe_serializer(self):
+        expected = RecipeSerializer(self.recipes(), many=True).data
+
+        with self.assertNumQueries(4):
+            data = RecipeValuesSerializer(
+                RecipeValuesSerializer.rows(self.recipes()), many=True
+            ).data
+
+        self.assertEqual(data, expected)
+        self.assertEqual(
+            [list(recipe) for recipe in data], [list(recipe) for recipe in expected]
+        )
+        self.assertEqual(data[1]["ingredients"], ["cream", "egg", "sugar"])
+        self.assertEqual(data[1]["rating_avg"], 3.5)
+        self.assertIsNone(data[0]["author"]["username"])
+
+    def test_list_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        expected = RecipeSerializer(self.recipes(), many=True).data
+
+        res = client.get(RECIPES_URL)
+        self.assertEqual(res.data["results"], expected)
+
+        res = client.get(reverse("recipe:top"))
+        self.assertEqual(res.data["results"], expected[::-1])
+
+    def test_no_recipes(self):
+        with self.assertNumQueries(1):
+            data = RecipeValuesSerializer(
+                RecipeValuesSerializer.rows(Recipe.objects.filter(time__lt=0)),
+                many=True,
+            ).data
+
+        self.assertEqual(data, [])
+
+
+class RecipeVisibilityAndFilterTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94"
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@example.com", password="45Egd!!94"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_recipe(self, title, author, **kwargs):
+        fields = {"description": "desc", "time": 30, **kwargs}
+        return Recipe.objects.create(title=title, author=author, **fields)
+
+    def titles(self, params=None):
+        res = self.client.get(RECIPES_URL, params or {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(recipe["title"] for recipe in res.data["results"])
+
+    def test_public_and_own_recipes_visible(self):
+        self.create_recipe("mine", self.user)
+        self.create_recipe("shared", self.other, public=True)
+        hidden = self.create_recipe("hidden", self.other)
+
+        self.assertEqual(self.titles(), ["mine", "shared"])
+        res = self.client.get(detail_url(hidden.pk))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filters(self):
+        self.create_recipe("quick", self.user, time=10, difficulty="1")
+        self.create_recipe("slow", self.user, time=120, difficulty="3")
+        self.create_recipe("public", self.other, time=45, public=True)
+
+        self.assertEqual(self.titles({"public": "true"}), ["public"])
+        self.assertEqual(self.titles({"public": "false"}), ["quick", "slow"])
+        self.assertEqual(self.titles({"difficulty": "3"}), ["slow"])
+        self.assertEqual(self.titles({"max_time": 45}), ["public", "quick"])
+        self.assertEqual(self.titles({"min_time": 45, "max_time": 60}), ["public"])
+        self.assertEqual(self.titles({"author": self.other.pk}), ["public"])
+
+    def test_invalid_filter(self):
+        res = self.client.get(RECIPES_URL, {"difficulty": "9"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("difficulty", res.data)
+
+
+class TopRatedRecipeApiTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_best_rated_recipes_come_first(self):
+        reviewers = [
+            get_user_model().objects.create_user(
+                email=f"reviewer{i}@example.com", password="45Egd!!94"
+            )
+            for i in range(2)
+        ]
+        ratings = {"average": [3], "best": [5, 5], "unrated": [], "worst": [1, 2]}
+        for title, values in ratings.items():
+            recipe = Recipe.objects.create(
+                title=title, description="desc", time=15, author=self.user
+            )
+            for reviewer, rating in zip(reviewers, values):
+                Review.objects.create(
+                    title="r", body="b", rating=rating, author=reviewer, recipe=recipe
+                )
+
+        res = self.client.get(reverse("recipe:top"))
+
+        titles = [recipe["title"] for recipe in res.data["results"]]
+        self.assertEqual(titles, ["best", "average", "worst", "unrated"])
+        self.assertEqual(res.data["results"][0]["rating_avg"], 5.0)
+        self.assertEqual(res.data["results"][0]["review_count"], 2)
+
+    def test_pages_walk_ties_without_offset(self):
+        Recipe.objects.bulk_create(
+            Recipe(title=f"r{i}", description="d", time=5, author=self.user)
+            for i in range(7)
+        )
+        Recipe.objects.filter(title__in=["r2", "r5"]).update(
+            rating_avg=4.5, review_count=2
+        )
+        expected = list(
+            Recipe.objects.order_by("-rating_avg", "-review_count", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+        seen, pages = [], []
+        url = reverse("recipe:top") + "?page_size=3"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url)
+            for query in queries:
+                self.assertNotIn("OFFSET", query["sql"])
+            pages.append(res.data)
+            seen.extend(recipe["id"] for recipe in res.data["results"])
+            url = res.data["next"]
+        self.assertEqual(seen, expected)
+
+        # and back from the last page
+        res = self.client.get(pages[-1]["previous"])
+        self.assertEqual(res.data["results"], pages[-2]["results"])
+        res = self.client.get(res.data["previous"])
+        self.assertEqual(res.data["results"], pages[0]["results"])
+        self.assertIsNone(res.data["previous"])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(reverse("recipe:top"), {"cursor": "cD0x"})  # p=1
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecipeSearchApiTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_recipe(self, title, description, ingredients=()):
+        recipe = Recipe.objects.create(
+            title=title, description=description, time=15, author=self.user
+        )
+        for name in ingredients:
+            recipe.ingredients.add(Ingredient.objects.create(name=name))
+        return recipe
+
+    def search(self, **params):
+        return self.client.get(reverse("recipe:search"), params)
+
+    def test_search_matches_title_description_and_ingredients(self):
+        by_title = self.create_recipe("Tomato soup", "warm and cosy")
+        by_description = self.create_recipe("Bruschetta", "bread with tomato")
+        by_ingredient = self.create_recipe("Salad", "fresh", ["tomato"])
+        self.create_recipe("Carbonara", "eggs and cheese", ["guanciale"])
+
+        res = self.search(q="tomato")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [recipe["id"] for recipe in res.data],
+            [by_title.id, by_description.id, by_ingredient.id],
+        )
+
+    def test_limit(self):
+        for i in range(3):
+            self.create_recipe(f"Soup {i}", "soup")
+
+        res = self.search(q="soup", limit=2)
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_query_is_required(self):
+        res = self.search(q="")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", res.data)
+
+    @skipUnless(connection.vendor == "postgresql", "full-text search needs PostgreSQL")
+    def test_title_matches_rank_first(self):
+        by_ingredient = self.create_recipe("Salad", "fresh", ["tomatoes"])
+        by_description = self.create_recipe("Bruschetta", "bread with tomatoes")
+        by_title = self.create_recipe("Tomato soup", "warm and cosy")
+
+        res = self.search(q="tomato")
+
+        self.assertEqual(
+            [recipe["id"] for recipe in res.data],
+            [by_title.id, by_description.id, by_ingredient.id],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "full-text search needs PostgreSQL")
+    def test_search_vector_follows_ingredient_changes(self):
+        recipe = self.create_recipe("Salad", "fresh", ["rocket"])
+        ingredient = recipe.ingredients.get()
+
+        ingredient.name = "arugula"
+        ingredient.save()
+
+        self.assertEqual(len(self.search(q="arugula").data), 1)
+        self.assertEqual(len(self.search(q="rocket").data), 0)
+
+
+class AutocompleteApiTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_ingredient_autocomplete(self):
+        for name in ("Pasta", "Paprika", "Salt"):
+            Ingredient.objects.create(name=name)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                reverse("recipe:ingredient-autocomplete"), {"q": "pa"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["name"] for item in res.data], ["Paprika", "Pasta"])
+
+    def test_tag_autocomplete_limit(self):
+        for name in ("quick", "quiche", "quinoa"):
+            Tag.objects.create(name=name)
+
+        res = self.client.get(
+            reverse("recipe:tag-autocomplete"), {"q": "QUI", "limit": 2}
+        )
+
+        self.assertEqual([item["name"] for item in res.data], ["quiche", "quick"])
+
+    def test_query_required(self):
+        res = self.client.get(reverse("recipe:tag-autocomplete"))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
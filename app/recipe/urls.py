@@ -0,0 +1,30 @@
+from django.urls import path
+from .views import (
+    IngredientAutocompleteView,
+    RecipeBulkWriteView,
+    RecipeListView,
+    RecipeDetailView,
+    RecipeSearchView,
+    TagAutocompleteView,
+    TopRatedRecipeListView,
+)
+
+app_name = "recipe"
+
+urlpatterns = [
+    path("recipes/", RecipeListView.as_view(), name="list"),
+    path("recipes/bulk/", RecipeBulkWriteView.as_view(), name="bulk"),
+    path("recipes/top/", TopRatedRecipeListView.as_view(), name="top"),
+    path("recipes/search/", RecipeSearchView.as_view(), name="search"),
+    path("recipes/<int:pk>/", RecipeDetailView.as_view(), name="detail"),
+    path(
+        "ingredients/autocomplete/",
+        IngredientAutocompleteView.as_view(),
+        name="ingredient-autocomplete",
+    ),
+    path(
+        "tags/autocomplete/",
+        TagAutocompleteView.as_view(),
+        name="tag-autocomplete",
+    ),
+]
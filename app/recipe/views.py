@@ -0,0 +1,240 @@
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils.translation import ugettext_lazy as _
+from django.utils.http import parse_etags
+from rest_framework import exceptions, generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.compression import weak_etag_match
+from core.models import Ingredient, Recipe, Review, Tag
+from user.authentication import CachedTokenAuthentication
+
+from .cache import get_cache, get_response, response_keys, set_response
+from .filters import RecipeFilterBackend, get_filters
+from .pagination import RecipeCursorPagination, TopRatedCursorPagination
+from .serializers import (
+    AutocompleteParamsSerializer,
+    RecipeSerializer,
+    RecipeSearchParamsSerializer,
+    RecipeValuesSerializer,
+    RecipeWriteSerializer,
+)
+from .services import upsert_recipes
+
+
+class RecipeQuerysetMixin:
+    """
+    One query for the recipes and their authors plus one per M2M relation,
+    whatever the number of recipes on the page. Only public recipes and the
+    user's own are visible
+    """
+
+    serializer_class = RecipeSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+
+    def get_queryset(self):
+        return (
+            Recipe.objects.select_related("author")
+            .prefetch_related(
+                # ordered, so RecipeValuesSerializer lists them the same way
+                Prefetch("ingredients", queryset=Ingredient.objects.order_by("name")),
+                Prefetch("tags", queryset=Tag.objects.order_by("name")),
+                # only their ids are shown
+                Prefetch(
+                    "reviews",
+                    queryset=Review.objects.only("id", "recipe").order_by("id"),
+                ),
+            )
+            .defer("search_vector")
+            .visible_to(self.request.user)
+        )
+
+
+class CachedResponseMixin:
+    """
+    GET through the recipe response cache (see recipe.cache). The ETag is
+    known before any query, so a matching If-None-Match costs no database
+    work and a cache hit no serialization. Responses are cached per user,
+    except those is_shared() says every user sees the same way
+    """
+
+    cache_tags = ["recipes"]
+
+    def get_cache_tags(self):
+        return self.cache_tags
+
+    def is_shared(self, response):
+        return False
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        if cache is None:
+            return super().get(request, *args, **kwargs)
+
+        parts = (
+            request.path,
+            sorted(request.query_params.lists()),
+            request.accepted_media_type,
+        )
+        digests = response_keys(
+            cache, self.get_cache_tags(), parts, (*parts, request.user.pk)
+        )
+        etags = parse_etags(request.headers.get("If-None-Match", ""))
+        for digest in digests:
+            if weak_etag_match(f'"{digest}"', etags):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response["ETag"] = f'"{digest}"'
+                return response
+        for digest in digests:
+            cached = get_response(cache, digest)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response["ETag"] = f'"{digest}"'
+                return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            shared, private = digests
+            digest = shared if self.is_shared(response) else private
+            response.add_post_render_callback(
+                lambda rendered: set_response(
+                    cache, digest, rendered.content, rendered["Content-Type"]
+                )
+            )
+            response["ETag"] = f'"{digest}"'
+        return response
+
+
+class ValuesListMixin:
+    """
+    Lists serialized from values() rows by a ValuesSerializer (see
+    core.serializers): same output, without a model instance per recipe
+    """
+
+    values_serializer_class = RecipeValuesSerializer
+
+    def get_queryset(self):
+        return self.values_serializer_class.rows(super().get_queryset())
+
+    def get_serializer_class(self):
+        return self.values_serializer_class
+
+
+class FilteredListMixin:
+    """
+    Index backed filters (see recipe.filters). Goes before CachedResponseMixin
+    so its is_shared() wins
+    """
+
+    filter_backends = [RecipeFilterBackend]
+
+    def is_shared(self, response):
+        # only public recipes, whoever asks
+        return get_filters(self.request).get("public") is True
+
+
+class RecipeListView(
+    FilteredListMixin,
+    CachedResponseMixin,
+    ValuesListMixin,
+    RecipeQuerysetMixin,
+    generics.ListAPIView,
+):
+    pagination_class = RecipeCursorPagination
+
+
+class TopRatedRecipeListView(
+    FilteredListMixin,
+    CachedResponseMixin,
+    ValuesListMixin,
+    RecipeQuerysetMixin,
+    generics.ListAPIView,
+):
+    """Best rated first, read from the denormalised aggregates"""
+
+    pagination_class = TopRatedCursorPagination
+
+
+class RecipeSearchView(
+    CachedResponseMixin, ValuesListMixin, RecipeQuerysetMixin, generics.ListAPIView
+):
+    """
+    Ranked full-text search over title, description and ingredient names,
+    served by the GIN index on Recipe.search_vector. Ranked results cannot
+    be keyset paginated, so only the `limit` best matches are returned
+    """
+
+    def get_queryset(self):
+        params = RecipeSearchParamsSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        recipes = super().get_queryset().search(params.validated_data["q"])
+        return recipes[: params.validated_data["limit"]]
+
+
+class RecipeDetailView(
+    CachedResponseMixin, RecipeQuerysetMixin, generics.RetrieveAPIView
+):
+    def get_cache_tags(self):
+        return [f"recipe:{self.kwargs['pk']}", "ingredients", "tags", "authors"]
+
+    def is_shared(self, response):
+        # any change to `public` bumps recipe:<pk>, retiring this entry
+        return response.data["public"]
+
+
+class RecipeBulkWriteView(APIView):
+    """
+    POST a list of recipes: those without an `id` are created, the others
+    (which must be the user's) are replaced. All or nothing, in a number of
+    queries that does not grow with the size of the list
+    """
+
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+    max_recipes = 500
+
+    def post(self, request):
+        if not isinstance(request.data, list):
+            raise exceptions.ValidationError(_("Expected a list of recipes."))
+        if len(request.data) > self.max_recipes:
+            raise exceptions.ValidationError(
+                _("At most %d recipes per request.") % self.max_recipes
+            )
+        serializer = RecipeWriteSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            recipes = upsert_recipes(request.user, serializer.validated_data)
+        except Recipe.DoesNotExist as e:
+            raise exceptions.ValidationError({"id": [str(e)]})
+        return Response({"ids": [recipe.pk for recipe in recipes]})
+
+
+class NameAutocompleteView(APIView):
+    """
+    Names starting with (then containing) `q`, answered from the name_key
+    indexes without building model instances (see NameQuerySet.autocomplete)
+    """
+
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+    model = None
+
+    def get(self, request):
+        params = AutocompleteParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        matches = self.model.objects.autocomplete(
+            params.validated_data["q"], params.validated_data["limit"]
+        )
+        return Response([{"id": pk, "name": name} for pk, name in matches])
+
+
+class IngredientAutocompleteView(NameAutocompleteView):
+    model = Ingredient
+
+
+class TagAutocompleteView(NameAutocompleteView):
+    model = Tag
@@ -0,0 +1,186 @@
+"""
+Async variants of the user endpoints for the ASGI application (app.asgi).
+DRF 3.12 has no async views, so these are plain Django coroutines reusing
+the DRF serializers and authentication. Everything that blocks runs on the
+bounded pools of core.pools: ORM calls on "database", anything hashing or
+checking a password on "hashing", so a slow PBKDF2 round never stalls the
+event loop and hashing concurrency cannot exceed the pool size
+"""
+
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import (
+    HttpResponseNotAllowed,
+    HttpResponseNotModified,
+    JsonResponse,
+    QueryDict,
+)
+from rest_framework import exceptions, status
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core.metrics import record_login
+from core.pools import PoolSaturated, get_pool
+from core.profiling import query_budget
+
+from .authentication import CachedTokenAuthentication
+from .serializers import LoginUnavailable, UserSerializer, AuthUserSerializer
+from .views import (
+    CreateTokenView,
+    CreateUserView,
+    RetrieveUpdateSelfView,
+    profile_etag,
+    profile_not_modified,
+)
+
+
+def parse_body(request):
+    """JSON or form request data, for any method (Django only parses POST)"""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            raise exceptions.ParseError()
+        if not isinstance(data, dict):
+            raise exceptions.ParseError()
+        return data
+    if request.method == "POST":
+        return request.POST
+    return QueryDict(request.body, encoding=request.encoding)
+
+
+def error_response(exc):
+    """What DRF's default exception handler would answer"""
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    response = JsonResponse(data, status=exc.status_code, safe=False)
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        response["WWW-Authenticate"] = CachedTokenAuthentication.keyword
+    return response
+
+
+def api_view(methods):
+    """
+    require_http_methods for coroutines (Django 3.2 decorators only wrap sync
+    views). Also turns DRF exceptions into responses and exempts the view
+    from CSRF, like DRF's APIView
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapped(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            try:
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(exc)
+
+        wrapped.csrf_exempt = True
+        return wrapped
+
+    return decorator
+
+
+def records_login(view):
+    """Count the responses of a login view, like CreateTokenView does"""
+
+    @functools.wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        response = await view(request, *args, **kwargs)
+        record_login(response.status_code)
+        return response
+
+    return wrapped
+
+
+def check_throttles(request, throttle_classes):
+    """APIView.check_throttles: the throttles only touch the cache"""
+    drf_request = Request(
+        request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+    )
+    waits = [
+        throttle.wait()
+        for throttle in (throttle_class() for throttle_class in throttle_classes)
+        if not throttle.allow_request(drf_request, None)
+    ]
+    if waits:
+        raise exceptions.Throttled(max(wait or 0 for wait in waits))
+    return drf_request.data
+
+
+async def authenticate(request):
+    """The user of a Token authorization header, raising NotAuthenticated without one"""
+    auth = get_authorization_header(request).split()
+    if (
+        not auth
+        or auth[0].lower() != CachedTokenAuthentication.keyword.lower().encode()
+    ):
+        raise exceptions.NotAuthenticated()
+    authenticator = CachedTokenAuthentication()
+    user, _ = await get_pool("database").run_async(authenticator.authenticate, request)
+    return user
+
+
+@query_budget(CreateUserView.query_budget)
+@api_view(["POST"])
+async def create_user(request):
+    """Async CreateUserView"""
+    serializer = UserSerializer(data=parse_body(request))
+    await get_pool("database").run_async(serializer.is_valid, raise_exception=True)
+    # UserSerializer.create hashes the password: the INSERT rides along
+    await get_pool("hashing").run_async(serializer.save)
+    return JsonResponse(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@query_budget(CreateTokenView.query_budget)
+@records_login
+@api_view(["POST"])
+async def create_token(request):
+    """Async CreateTokenView"""
+    data = await sync_to_async(check_throttles)(
+        request, CreateTokenView.throttle_classes
+    )
+    serializer = AuthUserSerializer(data=data, context={"request": request})
+    # the whole of authenticate() runs on "hashing": a "database" worker
+    # waiting for a password check would be lost to queries meanwhile
+    try:
+        await get_pool("hashing").run_async(serializer.is_valid, raise_exception=True)
+    except PoolSaturated:
+        raise LoginUnavailable()
+    token, _ = await get_pool("database").run_async(
+        Token.objects.get_or_create, user=serializer.validated_data["user"]
+    )
+    return JsonResponse({"token": token.key})
+
+
+@query_budget(RetrieveUpdateSelfView.query_budget)
+@api_view(["GET", "PUT", "PATCH"])
+async def retrieve_update_self(request):
+    """Async RetrieveUpdateSelfView"""
+    user = await authenticate(request)
+    if request.method == "GET":
+        etag = profile_etag(user, "json")
+        if profile_not_modified(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse(UserSerializer(user).data)
+        response["ETag"] = etag
+        return response
+
+    data = parse_body(request)
+    serializer = UserSerializer(user, data=data, partial=request.method == "PATCH")
+    await get_pool("database").run_async(serializer.is_valid, raise_exception=True)
+    pool = get_pool(
+        "hashing" if "password" in serializer.validated_data else "database"
+    )
+    await pool.run_async(serializer.save)
+    response = JsonResponse(serializer.data)
+    response["ETag"] = profile_etag(user, "json")
+    return response
@@ -0,0 +1,165 @@
+"""
+Token authentication that keeps resolved tokens in a shared Django cache or,
+without one, in a process-local LRU, so most requests never touch the database
+"""
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+
+
+DEFAULTS = {
+    "MAXSIZE": 1024,
+    "LOCAL_TIMEOUT": 5,
+    "CACHE_ALIAS": None,
+    "TIMEOUT": 300,
+    "KEY_PREFIX": "authtoken",
+}
+
+
+class LRUCache:
+    """
+    Thread-safe mapping bounded in size whose entries expire after `timeout`
+    seconds
+    """
+
+    def __init__(self, maxsize: int, timeout: float) -> None:
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TokenCache:
+    """
+    Cache of authenticated tokens keyed on the token key: in the shared
+    Django cache when CACHE_ALIAS names one, else in a process-local LRU.
+    Tokens are stored pickled so every request gets its own copy of the user
+    and mutations made by a view never leak into other requests.
+
+    Invalidation (see user.signals) reaches the shared cache, so a revoked
+    token stops working on every worker at once; that is why no local layer
+    sits in front of it. The LRU alone is only invalidated in the process
+    that made the change: the other workers accept a revoked token, or serve
+    a stale user, for up to LOCAL_TIMEOUT seconds
+    """
+
+    def __init__(self, options: dict) -> None:
+        self.options = {**DEFAULTS, **options}
+        alias = self.options["CACHE_ALIAS"]
+        self.shared = caches[alias] if alias else None
+        self.local = (
+            None
+            if self.shared is not None
+            else LRUCache(self.options["MAXSIZE"], self.options["LOCAL_TIMEOUT"])
+        )
+
+    def _shared_key(self, key: str) -> str:
+        # never put raw credentials in a cache that other services can read
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f"{self.options['KEY_PREFIX']}:{digest}"
+
+    def get(self, key: str):
+        if self.shared is not None:
+            blob = self.shared.get(self._shared_key(key))
+        else:
+            blob = self.local.get(key)
+        if blob is None:
+            return None
+        return pickle.loads(blob)
+
+    def set(self, key: str, token) -> None:
+        blob = pickle.dumps(token, pickle.HIGHEST_PROTOCOL)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), blob, self.options["TIMEOUT"])
+        else:
+            self.local.set(key, blob)
+
+    def delete(self, *keys: str) -> None:
+        if self.shared is not None:
+            if keys:
+                self.shared.delete_many([self._shared_key(key) for key in keys])
+        else:
+            for key in keys:
+                self.local.delete(key)
+
+    def clear(self) -> None:
+        if self.local is not None:
+            self.local.clear()
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TokenCache(getattr(settings, "TOKEN_AUTH_CACHE", {}))
+    return _token_cache
+
+
+@receiver(setting_changed)
+def reset_token_cache(*, setting, **kwargs):
+    global _token_cache
+    if setting == "TOKEN_AUTH_CACHE":
+        _token_cache = None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication that only queries the
+    Token + User join on a cache miss. Entries are invalidated by the signal
+    handlers in user.signals when a token is deleted or a user is saved.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(key, token)
+        return (token.user, token)
@@ -0,0 +1,35 @@
+"""
+Authentication backend checking passwords on the bounded "hashing" pool
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from core.pools import get_pool
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend whose password check runs on core.pools' "hashing" pool:
+    however many requests try to log in at once, at most MAX_WORKERS hashes
+    are computed at a time. Raises core.pools.PoolSaturated when the pool
+    queue is full
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        pool = get_pool("hashing")
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # hash anyway, so unknown emails take as long as wrong passwords
+            pool.run(UserModel().set_password, password)
+            return None
+        if pool.run(user.check_password, password):
+            if self.user_can_authenticate(user):
+                return user
+        return None
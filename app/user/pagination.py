@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ReviewCursorPagination(CursorPagination):
+    """Newest reviews first, `WHERE id < cursor` keyset pages"""
+
+    ordering = "-id"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class UserCursorPagination(CursorPagination):
+    """Oldest accounts first, `WHERE id > cursor` keyset pages"""
+
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
@@ -1,46 +1,102 @@
+from types import SimpleNamespace
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions
+from rest_framework.exceptions import APIException
+from rest_framework import status
+
+from core.models import Review
+from core.pools import PoolSaturated
+from core.serializers import ValuesSerializer
+
+from .tasks import send_password_changed_email, send_welcome_email
+
+
+class LoginUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many logins in progress, try again later.")
+    default_code = "login_unavailable"
 
 
 class UserSerializer(serializers.ModelSerializer):
+    # declared rather than generated: ModelSerializer introspects the model
+    # again for every generated field of every new serializer, which took
+    # most of the time of a validation. No UniqueValidator on email, see
+    # validate_email
+    email = serializers.EmailField(max_length=254)
+    first_name = serializers.CharField(
+        label=_("Name"), max_length=50, allow_null=True, required=False
+    )
+    last_name = serializers.CharField(
+        label=_("Surname"), max_length=50, allow_null=True, required=False
+    )
+    username = serializers.CharField(max_length=50, allow_null=True, required=False)
+    password = serializers.CharField(max_length=128, min_length=6, write_only=True)
+
+    # what UserAttributeSimilarityValidator compares a password to
+    SIMILARITY_FIELDS = ["email", "username", "first_name", "last_name"]
+
     class Meta:
         model = get_user_model()
         fields = ["email", "first_name", "last_name", "username", "password"]
-        extra_kwargs = {"password": {"write_only": True, "min_length": 6}}
 
     def create(self, validated_data):
-        return get_user_model().objects.create_user(**validated_data)
-    
+        user = get_user_model().objects.create_user(**validated_data)
+        send_welcome_email.enqueue([user.pk], key=f"welcome-email:{user.pk}")
+        return user
+
     def update(self, instance, validated_data):
-        password = validated_data.pop('password', None)
+        password = validated_data.pop("password", None)
+        if password:
+            # hashed here: a raw password is never written to the job queue
+            instance.set_password(password)
+        # one UPDATE for the password and the other fields
         user = super().update(instance, validated_data)
         if password:
-            user.set_password(password)
-            user.save()
+            send_password_changed_email.enqueue([user.pk])
         return user
-        
-    
-    def validate(self, data):
-        user = self.Meta.model(**data)
 
+    def validate_email(self, value):
+        """
+        Normalized as create_user() stores it, so an address differing only
+        in the case of its domain is caught here rather than by the unique
+        index on INSERT. One query, on that index
+        """
+        email = get_user_model().objects.normalize_email(value)
+        users = get_user_model().objects.filter(email=email)
+        if self.instance is not None:
+            users = users.exclude(pk=self.instance.pk)
+        if users.exists():
+            raise serializers.ValidationError(
+                _("A user with this email address already exists."), code="unique"
+            )
+        return email
+
+    def validate(self, data):
         password = data.get("password")
+        if password is None:
+            # a partial update leaving the password alone
+            return data
 
-        errors = dict()
+        # the user as it will be saved, enough of it for the validators:
+        # the submitted fields, else the current ones
+        user = SimpleNamespace(
+            _meta=self.Meta.model._meta,
+            **{
+                field: data.get(field, getattr(self.instance, field, None))
+                for field in self.SIMILARITY_FIELDS
+            },
+        )
         try:
-            # validate the password and catch the exception
             validate_password(password=password, user=user)
-
         # the exception raised here is different than serializers.ValidationError
         except exceptions.ValidationError as e:
-            errors["password"] = list(e.messages)
-
-        if errors:
-            raise serializers.ValidationError(errors)
+            raise serializers.ValidationError({"password": list(e.messages)})
 
-        return super(UserSerializer, self).validate(data)
+        return data
 
 
 class AuthUserSerializer(serializers.Serializer):
@@ -52,9 +108,12 @@ class AuthUserSerializer(serializers.Serializer):
     def validate(self, data):
         email = data.get("email")
         password = data.get("password")
-        user = authenticate(
-            request=self.context.get("request"), username=email, password=password
-        )
+        try:
+            user = authenticate(
+                request=self.context.get("request"), username=email, password=password
+            )
+        except PoolSaturated:
+            raise LoginUnavailable()
         if not user:
             msg = _("No user has been found with the provided credentials")
             raise serializers.ValidationError(msg, code="authorization")
@@ -62,3 +121,37 @@ class AuthUserSerializer(serializers.Serializer):
         data["user"] = user
 
         return super(AuthUserSerializer, self).validate(data)
+
+
+class OwnReviewSerializer(serializers.ModelSerializer):
+    """A review in its author's listing: the columns review_author_listing_idx covers"""
+
+    class Meta:
+        model = Review
+        fields = ["id", "recipe", "title", "rating"]
+        read_only_fields = fields
+
+
+class StaffUserSerializer(serializers.ModelSerializer):
+    """A user in the staff listing"""
+
+    class Meta:
+        model = get_user_model()
+        fields = [
+            "id",
+            "email",
+            "username",
+            "first_name",
+            "last_name",
+            "is_active",
+            "is_staff",
+            "last_login",
+        ]
+        read_only_fields = fields
+
+
+class StaffUserValuesSerializer(ValuesSerializer):
+    """StaffUserSerializer output from values() rows"""
+
+    serializer_class = StaffUserSerializer
+    columns = {name: name for name in StaffUserSerializer.Meta.fields}
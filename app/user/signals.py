@@ -0,0 +1,27 @@
+"""
+Keep the token authentication cache consistent with the database
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import get_token_cache
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """A rotated or revoked token must stop authenticating straight away"""
+    get_token_cache().delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """
+    Cached tokens carry a copy of the user, so any change (is_active,
+    profile fields, password) drops them to avoid serving stale data
+    """
+    keys = Token.objects.filter(user_id=instance.pk).values_list("key", flat=True)
+    get_token_cache().delete(*keys)
@@ -0,0 +1,43 @@
+"""
+Background jobs (see jobs.registry) sending the account emails, so signing
+up or changing a password never waits for the mail server
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+
+from jobs.registry import task
+
+WELCOME_BODY = """Hi {name},
+
+your meal planner account is ready, log in with {email} to start planning.
+"""
+
+PASSWORD_CHANGED_BODY = """Hi {name},
+
+the password of your meal planner account was just changed. If it was not
+you, reset it right away.
+"""
+
+
+def mail_user(user_id, subject, body):
+    user = (
+        get_user_model()
+        .objects.filter(pk=user_id, is_active=True)
+        .only("email", "username")
+        .first()
+    )
+    if user is None:
+        return  # deleted or deactivated since
+    name = user.username or user.email
+    send_mail(subject, body.format(name=name, email=user.email), None, [user.email])
+
+
+@task
+def send_welcome_email(user_id):
+    mail_user(user_id, "Welcome to the meal planner", WELCOME_BODY)
+
+
+@task
+def send_password_changed_email(user_id):
+    mail_user(user_id, "Your password was changed", PASSWORD_CHANGED_BODY)
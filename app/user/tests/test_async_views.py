@@ -0,0 +1,124 @@
+"""
+All the tests about the async user endpoints
+"""
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.pools import get_pool
+from user.authentication import get_token_cache
+
+CREATE_USER_URL = reverse("user:async-create")
+TOKEN_URL = reverse("user:async-token")
+SELF_URL = reverse("user:async-self")
+
+
+# disabled pools run their work on the thread holding the test transaction
+@override_settings(
+    BLOCKING_POOLS={"database": {"MAX_WORKERS": 0}, "hashing": {"MAX_WORKERS": 0}}
+)
+class AsyncUserEndpointsTests(TestCase):
+    def setUp(self) -> None:
+        get_token_cache().clear()
+
+    def create_user(self, **kwargs):
+        return get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94", **kwargs
+        )
+
+    def test_create_user(self):
+        payload = {
+            "email": "test@example.com",
+            "username": "test.user",
+            "password": "45Egd!!94",
+        }
+        hashing = get_pool("hashing")
+        completed = hashing.stats()["completed"]
+
+        res = self.client.post(
+            CREATE_USER_URL, payload, content_type="application/json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()["username"], "test.user")
+        self.assertNotIn("password", res.json())
+        user = get_user_model().objects.get(email=payload["email"])
+        self.assertTrue(user.check_password(payload["password"]))
+        self.assertEqual(hashing.stats()["completed"], completed + 1)
+
+    def test_create_user_with_easy_password_fail(self):
+        payload = {"email": "test@example.com", "password": "123456789"}
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("password", res.json())
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_create_token(self):
+        self.create_user()
+
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@example.com", "password": "45Egd!!94"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["token"], Token.objects.get().key)
+
+    def test_bad_password_no_token(self):
+        self.create_user()
+
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@example.com", "password": "badpass"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("token", res.json())
+
+    def test_non_object_body_is_invalid(self):
+        res = self.client.post(TOKEN_URL, [1, 2], content_type="application/json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_and_update_self(self):
+        token = Token.objects.create(user=self.create_user(username="test.user"))
+        auth = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        res = self.client.get(SELF_URL, **auth)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["username"], "test.user")
+
+        res = self.client.patch(
+            SELF_URL,
+            {"username": "new.name", "password": "NewPasw123!!"},
+            content_type="application/json",
+            **auth,
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = get_user_model().objects.get()
+        self.assertEqual(user.username, "new.name")
+        self.assertTrue(user.check_password("NewPasw123!!"))
+
+    def test_retrieve_self_not_modified(self):
+        token = Token.objects.create(user=self.create_user())
+        auth = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+        etag = self.client.get(SELF_URL, **auth)["ETag"]
+
+        res = self.client.get(SELF_URL, HTTP_IF_NONE_MATCH=etag, **auth)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_unauthenticated_user_forbidden_access(self):
+        res = self.client.get(SELF_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+
+    def test_method_not_allowed(self):
+        res = self.client.get(CREATE_USER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,112 @@
+"""
+All the tests about the cached token authentication
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import LRUCache, TokenCache, get_token_cache
+
+SELF_URL = reverse("user:self")
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(maxsize=2, timeout=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    @patch("user.authentication.time.monotonic")
+    def test_entries_expire(self, patched_monotonic):
+        patched_monotonic.return_value = 100
+        cache = LRUCache(maxsize=2, timeout=10)
+        cache.set("a", 1)
+
+        patched_monotonic.return_value = 109
+        self.assertEqual(cache.get("a"), 1)
+        patched_monotonic.return_value = 111
+        self.assertIsNone(cache.get("a"))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self) -> None:
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="45Egd!!94", username="test.user"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_request_skips_database(self):
+        self.client.get(SELF_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SELF_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["username"], "test.user")
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(SELF_URL)
+        self.token.delete()
+
+        res = self.client.get(SELF_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(SELF_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(SELF_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_is_visible_on_next_read(self):
+        self.client.get(SELF_URL)
+        self.client.patch(
+            SELF_URL, {"username": "new.name", "password": "NewPasw123!!"}
+        )
+
+        res = self.client.get(SELF_URL)
+
+        self.assertEqual(res.data["username"], "new.name")
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "tokens": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        },
+        TOKEN_AUTH_CACHE={"CACHE_ALIAS": "tokens"},
+    )
+    def test_shared_cache_without_local_layer(self):
+        self.client.get(SELF_URL)
+        # another worker, on the same shared cache
+        other = TokenCache({"CACHE_ALIAS": "tokens"})
+        self.assertIsNone(get_token_cache().local)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SELF_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        key = self.token.key
+        self.assertIsNotNone(other.get(key))
+
+        # revoked here, revoked for the other worker too
+        self.token.delete()
+        self.assertIsNone(other.get(key))
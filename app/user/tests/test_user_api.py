@@ -2,16 +2,27 @@
 All the tests about the user API
 """
 
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import caches
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework.settings import api_settings
+
+from core.models import Recipe, Review
+from core.pools import get_pool
+from user.serializers import StaffUserSerializer, StaffUserValuesSerializer
+from jobs.models import Job
 
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token")
 SELF_URL = reverse("user:self")
+SELF_REVIEWS_URL = reverse("user:self-reviews")
+LIST_URL = reverse("user:list")
 
 
 def create_user(email="test@example.com", password="45Egd!!94", **kwargs):
@@ -21,6 +32,7 @@ def create_user(email="test@example.com", password="45Egd!!94", **kwargs):
 class PublicApiEndpoints(TestCase):
     def setUp(self) -> None:
         self.client = APIClient()
+        caches["throttle"].clear()
 
     def test_user_is_created(self):
         payload = {
@@ -37,6 +49,25 @@ class PublicApiEndpoints(TestCase):
         self.assertNotIn(payload["password"], res.data.values())
         self.assertNotIn("password", res.data.keys())
 
+    def test_welcome_email_sent(self):
+        payload = {"email": "test@example.com", "password": "45Egd!!94"}
+        self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [payload["email"]])
+        self.assertIn("Welcome", mail.outbox[0].subject)
+
+    @override_settings(JOBS={**settings.JOBS, "BROKER": "jobs.brokers.DatabaseBroker"})
+    def test_welcome_email_queued(self):
+        payload = {"email": "test@example.com", "password": "45Egd!!94"}
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(mail.outbox, [])
+        job = Job.objects.get()
+        self.assertEqual(job.task, "user.tasks.send_welcome_email")
+        self.assertEqual(job.idempotency_key, f"welcome-email:{job.args[0]}")
+
     def test_create_user_with_existing_email_field(self):
         create_user()
         payload = {
@@ -47,6 +78,23 @@ class PublicApiEndpoints(TestCase):
         res = self.client.post(CREATE_USER_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_user_with_existing_email_other_domain_case_fail(self):
+        create_user(email="test@example.com")
+        payload = {"email": "test@EXAMPLE.com", "password": "45Egd!!94"}
+
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", res.data)
+
+    def test_create_user_with_password_like_email_fail(self):
+        payload = {"email": "federico.lunardon@example.com", "password": "federicolunardon"}
+
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("password", res.data)
+
     def test_create_user_with_invalid_email_fail(self):
         payload = {
             "email": "test.example.com",
@@ -163,6 +211,91 @@ class PublicApiEndpoints(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+def throttle_rates(**rates):
+    return override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {**api_settings.DEFAULT_THROTTLE_RATES, **rates},
+        }
+    )
+
+
+class LoginProtectionTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        caches["throttle"].clear()
+        create_user()
+
+    @throttle_rates(login_email="2/min")
+    def test_email_throttled_before_password_check(self):
+        payload = {"email": "test@example.com", "password": "wrong"}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        submitted = get_pool("hashing").stats()["submitted"]
+
+        # the right password no longer helps, and costs no hash
+        res = self.client.post(
+            TOKEN_URL, {"email": "TEST@example.com", "password": "45Egd!!94"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(get_pool("hashing").stats()["submitted"], submitted)
+        # other accounts are unaffected
+        create_user(email="other@example.com")
+        res = self.client.post(
+            TOKEN_URL, {"email": "other@example.com", "password": "45Egd!!94"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @throttle_rates(login_ip="2/min")
+    def test_ip_throttled_across_emails(self):
+        for i in range(2):
+            payload = {"email": f"user{i}@example.com", "password": "wrong"}
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {"email": "test@example.com", "password": "45Egd!!94"},
+            REMOTE_ADDR="127.0.0.1",
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        res = self.client.post(
+            TOKEN_URL,
+            {"email": "test@example.com", "password": "45Egd!!94"},
+            REMOTE_ADDR="10.0.0.2",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_non_object_body_is_invalid(self):
+        res = self.client.post(TOKEN_URL, [1, 2], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @throttle_rates(login_ip="2/min")
+    def test_ip_throttle_ignores_forwarded_for(self):
+        payload = {"email": "test@example.com", "password": "wrong"}
+        for i in range(2):
+            res = self.client.post(
+                TOKEN_URL, payload, HTTP_X_FORWARDED_FOR=f"10.0.0.{i}"
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, payload, HTTP_X_FORWARDED_FOR="10.0.0.9")
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(BLOCKING_POOLS={"hashing": {"MAX_WORKERS": 0, "MAX_PENDING": 0}})
+    def test_saturated_hashing_pool_rejects_login(self):
+        payload = {"email": "test@example.com", "password": "45Egd!!94"}
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(get_pool("hashing").stats()["rejected"], 1)
+
+
 class PrivateEndpoints(TestCase):
     def setUp(self) -> None:
         self.client = APIClient()
@@ -186,6 +319,31 @@ class PrivateEndpoints(TestCase):
         self.assertIn('last_name', res.data.keys())
         self.assertNotIn('password', res.data.keys())
 
+    def test_retrieve_self_not_modified(self):
+        etag = self.client.get(SELF_URL)["ETag"]
+
+        # the version stamp is on the authenticated user: no query
+        with self.assertNumQueries(0):
+            res = self.client.get(SELF_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        # as sent back for a compressed response
+        res = self.client.get(SELF_URL, HTTP_IF_NONE_MATCH=f"W/{etag}")
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_changes_etag(self):
+        etag = self.client.get(SELF_URL)["ETag"]
+
+        res = self.client.patch(SELF_URL, {"first_name": "fede"})
+        self.assertNotEqual(res["ETag"], etag)
+
+        res = self.client.get(SELF_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["first_name"], "fede")
+        res = self.client.get(SELF_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_post_fails(self):
         res = self.client.post(SELF_URL, {})
 
@@ -202,4 +360,145 @@ class PrivateEndpoints(TestCase):
         self.user.refresh_from_db()
         
         self.assertEqual(self.user.username, payload["username"])
-        self.assertTrue(self.user.check_password(payload["password"]))
\ No newline at end of file
+        self.assertTrue(self.user.check_password(payload["password"]))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Your password was changed")
+
+    def test_partial_update_without_password(self):
+        # the UPDATE, then the token cache invalidation: no password check
+        with self.assertNumQueries(2):
+            res = self.client.patch(SELF_URL, {"first_name": "fede"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "fede")
+        self.assertTrue(self.user.check_password("123!!ABCabc"))
+
+    def test_update_password_similar_to_new_username_fail(self):
+        payload = {"username": "grandmascookbook", "password": "grandmascookbook1"}
+
+        res = self.client.patch(SELF_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("password", res.data)
+
+    def test_update_email_taken_fail(self):
+        create_user(email="other@example.com")
+
+        res = self.client.patch(SELF_URL, {"email": "other@EXAMPLE.COM"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_own_email_kept(self):
+        res = self.client.put(
+            SELF_URL,
+            {"email": "federico@example.com", "password": "NewPasw123!!"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+class SelfReviewsTests(TestCase):
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.other = create_user(email="other@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_reviews(self, author, count):
+        recipes = [
+            Recipe.objects.create(
+                title=f"recipe {i}", description="desc", time=15, author=self.other
+            )
+            for i in range(count)
+        ]
+        return [
+            Review.objects.create(
+                title=f"review {i}", body="b", rating=4, author=author, recipe=recipe
+            )
+            for i, recipe in enumerate(recipes)
+        ]
+
+    def test_own_reviews_newest_first(self):
+        reviews = self.create_reviews(self.user, 3)
+        self.create_reviews(self.other, 1)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(SELF_REVIEWS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [review["id"] for review in res.data["results"]],
+            [review.pk for review in reversed(reviews)],
+        )
+        self.assertEqual(
+            res.data["results"][0],
+            {
+                "id": reviews[2].pk,
+                "recipe": reviews[2].recipe_id,
+                "title": "review 2",
+                "rating": 4,
+            },
+        )
+
+    def test_pagination(self):
+        reviews = self.create_reviews(self.user, 3)
+
+        first = self.client.get(SELF_REVIEWS_URL, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(len(first.data["results"]), 2)
+        self.assertEqual(
+            [review["id"] for review in second.data["results"]], [reviews[0].pk]
+        )
+
+    def test_authentication_required(self):
+        res = APIClient().get(SELF_REVIEWS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ListUsersTests(TestCase):
+    def setUp(self) -> None:
+        self.staff = get_user_model().objects.create_superuser(
+            "admin@example.com", "45Egd!!94", username="admin"
+        )
+        self.users = [
+            create_user(email=f"user{i}@example.com", first_name=f"User {i}")
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def test_same_output_as_model_serializer(self):
+        self.client.force_login(self.users[0])  # sets last_login
+        users = get_user_model().objects.order_by("id")
+
+        data = StaffUserValuesSerializer(
+            StaffUserValuesSerializer.rows(users), many=True
+        ).data
+
+        self.assertEqual(data, StaffUserSerializer(users, many=True).data)
+        self.assertIsNotNone(data[1]["last_login"])
+        self.assertIsNone(data[2]["last_login"])
+
+    def test_list_users(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(LIST_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [user["email"] for user in res.data["results"]],
+            ["admin@example.com", "user0@example.com"],
+        )
+        res = self.client.get(res.data["next"])
+        self.assertEqual(
+            [user["id"] for user in res.data["results"]],
+            [user.pk for user in self.users[1:]],
+        )
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.users[0])
+
+        res = self.client.get(LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,46 @@
+"""
+Login rate limits, applied before the password is checked
+"""
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Counts in the "throttle" cache, rates from DEFAULT_THROTTLE_RATES"""
+
+    @property
+    def cache(self):
+        return caches["throttle"]
+
+    def get_rate(self):
+        # read per request, THROTTLE_RATES is frozen when DRF is imported
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+
+class LoginIPRateThrottle(LoginRateThrottle):
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class LoginEmailRateThrottle(LoginRateThrottle):
+    """Limits guesses against one account, whichever IPs they come from"""
+
+    scope = "login_email"
+
+    def get_cache_key(self, request, view):
+        if not isinstance(request.data, dict):
+            return None  # left for the serializer to reject
+        email = request.data.get("email")
+        if not isinstance(email, str) or not email:
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": email.strip().lower(),
+        }
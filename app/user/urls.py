@@ -1,10 +1,23 @@
 from django.urls import path
-from .views import CreateUserView, CreateTokenView, RetrieveUpdateSelfView
+from .views import (
+    CreateUserView,
+    CreateTokenView,
+    ListSelfReviewsView,
+    ListUsersView,
+    RetrieveUpdateSelfView,
+)
+from . import async_views
 
 app_name = "user"
 
 urlpatterns = [
     path("create/", CreateUserView.as_view(), name="create"),
     path("token/", CreateTokenView.as_view(), name="token"),
-    path("self", RetrieveUpdateSelfView.as_view(), name="self")
+    path("self", RetrieveUpdateSelfView.as_view(), name="self"),
+    path("self/reviews", ListSelfReviewsView.as_view(), name="self-reviews"),
+    path("list/", ListUsersView.as_view(), name="list"),
+    # async variants, meant to be served by the ASGI application
+    path("async/create/", async_views.create_user, name="async-create"),
+    path("async/token/", async_views.create_token, name="async-token"),
+    path("async/self", async_views.retrieve_update_self, name="async-self"),
 ]
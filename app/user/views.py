@@ -1,26 +1,126 @@
-from rest_framework import generics, authentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model
+from django.utils.http import parse_etags
 
-from .serializers import UserSerializer, AuthUserSerializer
+from core.compression import weak_etag_match
+from core.metrics import record_login
+from core.models import Review
+
+from .authentication import CachedTokenAuthentication
+from .pagination import ReviewCursorPagination, UserCursorPagination
+from .serializers import (
+    UserSerializer,
+    AuthUserSerializer,
+    OwnReviewSerializer,
+    StaffUserValuesSerializer,
+)
+from .throttling import LoginIPRateThrottle, LoginEmailRateThrottle
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    # email uniqueness check, INSERT and its savepoint, then the welcome
+    # email job: its INSERT, or with the eager broker the job itself
+    query_budget = 4
 
 
 class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthUserSerializer
     renderer_class = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginIPRateThrottle, LoginEmailRateThrottle]
+    # user, then the token: get_or_create and its INSERT in a savepoint
+    query_budget = 5
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # throttled requests never reach post()
+        record_login(response.status_code)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+# bump when the output of UserSerializer changes, retiring the ETags clients hold
+PROFILE_ETAG_VERSION = 1
+
+
+def profile_etag(user, media_format):
+    """
+    ETag of the profile of `user` rendered as `media_format`, from the
+    User.updated_at version stamp: no rendering or hashing of the body
+    """
+    stamp = f"{user.updated_at:%Y%m%d%H%M%S%f}"
+    return f'"{user.pk}.{stamp}.{media_format}.{PROFILE_ETAG_VERSION}"'
+
+
+def profile_not_modified(request, etag):
+    return weak_etag_match(etag, parse_etags(request.headers.get("If-None-Match", "")))
+
 
 class RetrieveUpdateSelfView(generics.RetrieveUpdateAPIView):
+    """
+    GET answers 304 to an If-None-Match holding the current profile_etag(),
+    which costs no query when the token is cached
+    """
+
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    # see core.profiling: a token authentication costs one query when the
+    # token is not cached
+    query_budget = 5
     
     
     def get_object(self):
         return self.request.user
-    
\ No newline at end of file
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = profile_etag(request.user, request.accepted_renderer.format)
+        if profile_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        # the save moved updated_at
+        response["ETag"] = profile_etag(request.user, request.accepted_renderer.format)
+        return response
+
+
+class ListSelfReviewsView(generics.ListAPIView):
+    """
+    The user's reviews, newest first. Keyset paginated on the id, so every
+    page is an index-only scan of review_author_listing_idx on PostgreSQL
+    """
+
+    serializer_class = OwnReviewSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = ReviewCursorPagination
+    query_budget = 2
+
+    def get_queryset(self):
+        # not user.reviews: the related manager reads the deferred author_id
+        return Review.objects.filter(author=self.request.user).only(
+            *OwnReviewSerializer.Meta.fields
+        )
+
+
+class ListUsersView(generics.ListAPIView):
+    """
+    Every account, for staff. Pages of up to a thousand users are
+    serialized from values() rows, see core.serializers.ValuesSerializer
+    """
+
+    serializer_class = StaffUserValuesSerializer
+    permission_classes = [IsAdminUser]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = UserCursorPagination
+    query_budget = 2
+
+    def get_queryset(self):
+        return StaffUserValuesSerializer.rows(get_user_model().objects.all())
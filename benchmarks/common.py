@@ -0,0 +1,126 @@
+"""
+Helpers shared by the benchmark scripts: Django bootstrap, a throwaway
+database to seed and summaries of latency samples
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+
+def setup_django():
+    """Make the project importable and configure Django for in-process requests"""
+    sys.path.insert(0, str(APP_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+
+    import django
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    # allows the test client's "testserver" host and keeps DEBUG off, so
+    # connection.queries does not grow for the whole run
+    setup_test_environment(debug=False)
+
+
+@contextmanager
+def test_database():
+    """
+    Create test_<NAME> for the run and drop it afterwards, never touching
+    real data
+    """
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return float("nan")
+    rank = max(
+        0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples)) - 1)
+    )
+    return sorted_samples[rank]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds of a list of durations in seconds"""
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        "n": count,
+        "mean": sum(ordered) / count * 1000 if count else float("nan"),
+        "p50": percentile(ordered, 50) * 1000,
+        "p95": percentile(ordered, 95) * 1000,
+        "p99": percentile(ordered, 99) * 1000,
+        "max": ordered[-1] * 1000 if count else float("nan"),
+    }
+
+
+def print_summary(label, samples):
+    stats = summarize(samples)
+    print(
+        f"{label:<32} n={stats['n']:<6} mean={stats['mean']:8.2f}ms "
+        f"p50={stats['p50']:8.2f}ms p95={stats['p95']:8.2f}ms "
+        f"p99={stats['p99']:8.2f}ms max={stats['max']:8.2f}ms"
+    )
+
+
+def http_load(url, total, concurrency, method="GET", headers=None, body=None):
+    """
+    Send `total` requests to `url` from `concurrency` threads, each holding a
+    keep-alive connection. Returns (latencies in seconds, error count, wall time)
+    """
+    import http.client
+    import itertools
+    import threading
+    import time
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    connection_class = (
+        http.client.HTTPSConnection
+        if parts.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    tickets = itertools.count()
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client():
+        connection = connection_class(parts.netloc, timeout=30)
+        samples, failures = [], 0
+        while next(tickets) < total:
+            started = time.perf_counter()
+            try:
+                connection.request(method, target, body=body, headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failures += 1
+            except (OSError, http.client.HTTPException):
+                failures += 1
+                connection.close()
+                continue
+            samples.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(samples)
+            errors.append(failures)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(errors), time.perf_counter() - started
@@ -0,0 +1,80 @@
+"""
+Bytes on the wire and CPU per request of the API with and without
+core.compression, and of conditional GETs of /user/self. Requests go
+through the whole middleware stack in process (the Django test client)
+against a throwaway database seeded with recipes; CPU is the process time
+of each request, so only the server side is counted.
+
+    SETTINGS_PROFILE=test python benchmarks/compression.py
+    SETTINGS_PROFILE=test python benchmarks/compression.py --page-sizes 20 100
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from common import setup_django, test_database
+from json_backends import seed
+
+ENCODINGS = {"identity": "identity", "gzip": "gzip", "br": "br, gzip"}
+
+
+def measure(client, url, count, **headers):
+    """(median CPU seconds, body bytes, status) of `count` GETs of `url`"""
+    samples = []
+    for _ in range(count):
+        started = time.process_time()
+        response = client.get(url, **headers)
+        samples.append(time.process_time() - started)
+    return statistics.median(samples), len(response.content), response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 100, 1000])
+    parser.add_argument("-n", "--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+    from core import compression
+
+    if not settings.COMPRESSION["ENABLED"]:
+        parser.error("COMPRESSION=0: nothing to compare")
+    if compression.brotli is None:
+        print("brotli is not installed: br falls back to gzip")
+
+    with test_database():
+        seed(max(args.page_sizes), random.Random(42))
+        token = Token.objects.create(user=get_user_model().objects.get())
+        client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        urls = {"/user/self": "/user/self"}
+        urls.update(
+            (f"recipes x{size}", f"/recipe/recipes/?page_size={size}")
+            for size in args.page_sizes
+        )
+        for label, url in urls.items():
+            print(label)
+            for name, accept_encoding in ENCODINGS.items():
+                cpu, size, status = measure(
+                    client, url, args.requests, HTTP_ACCEPT_ENCODING=accept_encoding
+                )
+                assert status == 200, (url, status)
+                print(f"  {name:<10} {size:9d} B  {cpu * 1000:8.3f}ms CPU")
+
+        etag = client.get(urls["/user/self"])["ETag"]
+        cpu, size, status = measure(
+            client, urls["/user/self"], args.requests, HTTP_IF_NONE_MATCH=etag
+        )
+        assert status == 304, status
+        print(f"/user/self If-None-Match  {size:5d} B  {cpu * 1000:8.3f}ms CPU")
+
+
+if __name__ == "__main__":
+    main()
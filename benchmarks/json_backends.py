@@ -0,0 +1,153 @@
+"""
+Compare the JSON backends of the API on recipe list payloads: DRF's
+JSONRenderer/JSONParser (stdlib json) against core.renderers and
+core.parsers (orjson). Recipes with ingredients, tags and reviews are
+seeded in a throwaway database and serialized once per page size with
+RecipeSerializer, as the list endpoints do; only rendering and parsing of
+that data are timed.
+
+    SETTINGS_PROFILE=test python benchmarks/json_backends.py --sizes 100 1000 5000
+"""
+
+import argparse
+import io
+import random
+import statistics
+import time
+
+from common import setup_django, test_database
+
+WORDS = (
+    "tomato basil garlic onion pepper chili lemon lime ginger pasta rice noodle "
+    "bread potato carrot celery spinach kale mushroom cheese butter cream egg "
+    "chicken beef pork lamb salmon tuna shrimp tofu bean lentil chickpea corn"
+).split()
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def seed(count, rng):
+    from django.contrib.auth import get_user_model
+    from core.models import Ingredient, Recipe, Review, Tag
+    from core.names import normalize_name
+
+    author = get_user_model().objects.create_user(
+        "bench@example.com", "bench-pass", username="bench"
+    )
+    # bulk_create skips NamedModel.save(), which fills name_key
+    names = [f"{word} {i}" for i, word in enumerate(WORDS * 10)]
+    Ingredient.objects.bulk_create(
+        Ingredient(name=name, name_key=normalize_name(name)) for name in names
+    )
+    names = [f"tag {i}" for i in range(50)]
+    Tag.objects.bulk_create(
+        Tag(name=name, name_key=normalize_name(name)) for name in names
+    )
+    ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+    tag_ids = list(Tag.objects.values_list("id", flat=True))
+    Recipe.objects.bulk_create(
+        Recipe(
+            title=sentence(rng, 4).capitalize(),
+            description=sentence(rng, 30),
+            instruction=sentence(rng, 60),
+            time=rng.randint(5, 120),
+            author=author,
+            public=True,
+        )
+        for _ in range(count)
+    )
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    ingredients, tags = Recipe.ingredients.through, Recipe.tags.through
+    ingredients.objects.bulk_create(
+        ingredients(recipe_id=recipe_id, ingredient_id=ingredient_id)
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(ingredient_ids, 8)
+    )
+    tags.objects.bulk_create(
+        tags(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, 3)
+    )
+    Review.objects.bulk_create(
+        Review(author=author, recipe_id=recipe_id, title="Nice", rating=4)
+        for recipe_id in recipe_ids
+    )
+
+
+def page(size):
+    """A list response body as the recipe list endpoint builds it"""
+    from django.db.models import Prefetch
+    from core.models import Recipe, Review
+    from recipe.serializers import RecipeSerializer
+
+    recipes = (
+        Recipe.objects.select_related("author")
+        .prefetch_related(
+            "ingredients",
+            "tags",
+            Prefetch("reviews", queryset=Review.objects.only("id", "recipe")),
+        )
+        .defer("search_vector")
+        .order_by("-id")[:size]
+    )
+    return {
+        "next": "http://testserver/recipe/recipes/?cursor=cD0yMDIz",
+        "previous": None,
+        "results": RecipeSerializer(recipes, many=True).data,
+    }
+
+
+def median_time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from core import renderers
+    from core.parsers import FastJSONParser
+    from core.renderers import FastJSONRenderer
+
+    if renderers.orjson is None:
+        print("orjson is not installed: FastJSON* fall back to the stdlib")
+    backends = {
+        "json": (JSONRenderer(), JSONParser()),
+        "orjson": (FastJSONRenderer(), FastJSONParser()),
+    }
+
+    with test_database():
+        seed(max(args.sizes), random.Random(42))
+        for size in args.sizes:
+            data = page(size)
+            body = JSONRenderer().render(data)
+            print(f"{size} recipes, {len(body) / 1024:.0f} KiB")
+            for name, (renderer, json_parser) in backends.items():
+                assert renderer.render(data) == body, name
+                render = median_time(lambda: renderer.render(data), args.repeat)
+                parse = median_time(
+                    lambda: json_parser.parse(io.BytesIO(body)), args.repeat
+                )
+                print(
+                    f"  {name:<8} render {render * 1000:8.2f}ms "
+                    f"({len(body) / render / 2**20:6.0f} MiB/s)   "
+                    f"parse {parse * 1000:8.2f}ms "
+                    f"({len(body) / parse / 2**20:6.0f} MiB/s)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure what collecting the request metrics (core.metrics) costs per request:
+the same in-process requests are timed with MetricsMiddleware enabled and
+disabled, interleaved in rounds so drift affects both alike. Exits non-zero
+when the median overhead exceeds --max-overhead-us.
+
+    python benchmarks/metrics_overhead.py --requests 5000 --max-overhead-us 150
+    python benchmarks/metrics_overhead.py --multiprocess   # mmap-backed values
+
+/healthz is the default path because it does the least work, which makes
+the overhead the largest share of the request; it touches no database
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from common import setup_django
+
+
+def time_requests(client, path, count):
+    """Seconds per request of `count` GETs of `path`"""
+    started = time.perf_counter()
+    for _ in range(count):
+        response = client.get(path)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.status_code
+    return elapsed / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--path", default="/healthz")
+    parser.add_argument("--requests", type=int, default=2000, help="per round")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument(
+        "--multiprocess",
+        action="store_true",
+        help="write the metrics to a PROMETHEUS_MULTIPROC_DIR, as the "
+        "production workers do",
+    )
+    parser.add_argument("--max-overhead-us", type=float, default=150)
+    args = parser.parse_args()
+
+    if args.multiprocess:
+        # must be set before prometheus_client is imported
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="metrics-")
+    setup_django()
+
+    from django.conf import settings
+    from django.test import Client, override_settings
+
+    clients = {}
+    for enabled in (True, False):
+        # the middleware chain is built on the first request of a client
+        with override_settings(METRICS={**settings.METRICS, "ENABLED": enabled}):
+            clients[enabled] = Client()
+            time_requests(clients[enabled], args.path, 200)
+
+    samples = {True: [], False: []}
+    for _ in range(args.rounds):
+        for enabled, client in clients.items():
+            samples[enabled].append(time_requests(client, args.path, args.requests))
+
+    on = statistics.median(samples[True]) * 1e6
+    off = statistics.median(samples[False]) * 1e6
+    overhead = on - off
+    print(f"metrics on   {on:8.1f}us/request")
+    print(f"metrics off  {off:8.1f}us/request")
+    print(
+        f"overhead     {overhead:8.1f}us/request ({overhead / off:.1%}), "
+        f"bound {args.max_overhead_us:.0f}us"
+    )
+    if overhead > args.max_overhead_us:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
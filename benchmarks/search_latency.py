@@ -0,0 +1,120 @@
+"""
+Seed a throwaway PostgreSQL database with ~100k recipes and report the
+p50/p95 latency of the full-text search endpoint.
+
+    DB_HOST=... DB_NAME=... DB_USER=... DB_PASSWORD=... \
+        python benchmarks/search_latency.py --recipes 100000 --queries 500
+"""
+
+import argparse
+import random
+import time
+
+from common import print_summary, setup_django, test_database
+
+WORDS = (
+    "tomato basil garlic onion pepper chili lemon lime ginger pasta rice noodle "
+    "bread potato carrot celery spinach kale mushroom cheese butter cream egg "
+    "chicken beef pork lamb salmon tuna shrimp tofu bean lentil chickpea corn "
+    "pea avocado apple pear peach berry cherry chocolate vanilla honey maple "
+    "almond walnut cashew sesame coconut curry soup stew salad roast grill bake "
+    "fry steam braise smoke quick easy spicy sweet sour crispy creamy fresh"
+).split()
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def seed(recipes, batch_size, rng):
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from core.models import Ingredient, Recipe
+    from core.names import normalize_name
+
+    author = get_user_model().objects.create_user("bench@example.com", "bench-pass")
+    # unique names, and bulk_create skips NamedModel.save(), which fills name_key
+    names = {f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(2000)}
+    Ingredient.objects.bulk_create(
+        Ingredient(name=name, name_key=normalize_name(name)) for name in sorted(names)
+    )
+    ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+    through = Recipe.ingredients.through
+
+    for start in range(0, recipes, batch_size):
+        count = min(batch_size, recipes - start)
+        with transaction.atomic():
+            created = Recipe.objects.bulk_create(
+                Recipe(
+                    title=sentence(rng, 3),
+                    description=sentence(rng, 25),
+                    instruction=sentence(rng, 40),
+                    time=rng.randint(5, 120),
+                    author=author,
+                )
+                for _ in range(count)
+            )
+            through.objects.bulk_create(
+                through(recipe_id=recipe.pk, ingredient_id=ingredient_id)
+                for recipe in created
+                for ingredient_id in rng.sample(ingredient_ids, 5)
+            )
+            Recipe.objects.filter(
+                pk__in=[recipe.pk for recipe in created]
+            ).update_search_vector()
+        print(f"seeded {start + count}/{recipes} recipes", end="\r", flush=True)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE core_recipe")
+    print()
+    return author
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    rng = random.Random(args.seed)
+
+    with test_database() as connection:
+        if connection.vendor != "postgresql":
+            raise SystemExit("search benchmark needs PostgreSQL")
+
+        from django.test import Client
+        from django.urls import reverse
+        from rest_framework.authtoken.models import Token
+        from core.models import Recipe
+
+        author = seed(args.recipes, args.batch_size, rng)
+        token = Token.objects.create(user=author)
+        client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+        url = reverse("recipe:search")
+        queries = [sentence(rng, rng.choice((1, 2))) for _ in range(args.queries)]
+
+        db_samples, http_samples = [], []
+        for text in queries:
+            started = time.perf_counter()
+            list(Recipe.objects.search(text).values_list("id", flat=True)[:20])
+            db_samples.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            response = client.get(url, {"q": text})
+            http_samples.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.content
+
+        plan = Recipe.objects.search("tomato")[:20].explain()
+
+    print(f"{args.recipes} recipes, {args.queries} queries")
+    print_summary("search query (DB only)", db_samples)
+    print_summary("GET /recipe/recipes/search/", http_samples)
+    print("plan for q=tomato:")
+    print(plan)
+
+
+if __name__ == "__main__":
+    main()
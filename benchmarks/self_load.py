@@ -0,0 +1,93 @@
+"""
+Load `/user/self` on a running server and report latency and throughput.
+Run it once against a server started with DB_CONN_MAX_AGE=0 and once with
+persistent connections to see what opening a connection per request costs.
+
+    DEBUG=1 DB_CONN_MAX_AGE=0 python app/manage.py runserver --noreload &
+    python benchmarks/self_load.py --url http://localhost:8000 --requests 2000
+
+With --connect-cost (and the DB_* variables of the server) it also times,
+in-process, opening a new connection against reusing an open one.
+"""
+
+import argparse
+import json
+import time
+import uuid
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from common import http_load, print_summary, setup_django
+
+
+def post(url, data):
+    request = Request(
+        url,
+        data=json.dumps(data).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urlopen(request) as response:
+        return json.load(response)
+
+
+def get_token(base_url, email, password):
+    try:
+        post(f"{base_url}/user/create/", {"email": email, "password": password})
+    except HTTPError as e:
+        if e.code != 400:  # 400: the user already exists
+            raise
+    return post(f"{base_url}/user/token/", {"email": email, "password": password})[
+        "token"
+    ]
+
+
+def connect_cost(samples):
+    setup_django()
+    from django.db import connection
+
+    connect, reuse = [], []
+    for _ in range(samples):
+        connection.close()
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connect.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        reuse.append(time.perf_counter() - started)
+    print_summary("connect + SELECT 1", connect)
+    print_summary("reused connection SELECT 1", reuse)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--email", default=f"bench-{uuid.uuid4().hex[:8]}@example.com")
+    parser.add_argument("--password", default="Bench-Pass-123!")
+    parser.add_argument("--connect-cost", type=int, metavar="SAMPLES", default=0)
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    token = get_token(base_url, args.email, args.password)
+    latencies, errors, elapsed = http_load(
+        f"{base_url}/user/self",
+        args.requests,
+        args.concurrency,
+        headers={"Authorization": f"Token {token}"},
+    )
+    print(
+        f"{args.requests} requests, {args.concurrency} clients: "
+        f"{len(latencies) / elapsed:.0f} req/s, {errors} errors"
+    )
+    print_summary("GET /user/self", latencies)
+
+    if args.connect_cost:
+        connect_cost(args.connect_cost)
+
+
+if __name__ == "__main__":
+    main()
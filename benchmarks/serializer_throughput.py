@@ -0,0 +1,68 @@
+"""
+Micro-benchmark of UserSerializer validation: validations per second of
+the create and PATCH payloads of the user endpoints, in a throwaway
+database. Nothing is saved, so only validation is timed: field checks,
+the email uniqueness query and, when a password is sent, the password
+validators.
+
+    SETTINGS_PROFILE=test python benchmarks/serializer_throughput.py
+    DB_HOST=... DB_NAME=... python benchmarks/serializer_throughput.py -n 5000
+"""
+
+import argparse
+import time
+
+from common import setup_django, test_database
+
+
+def throughput(make_serializer, count):
+    """Validations per second, and whether the last one passed"""
+    started = time.perf_counter()
+    for _ in range(count):
+        serializer = make_serializer()
+        valid = serializer.is_valid()
+    return count / (time.perf_counter() - started), valid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", "--validations", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from user.serializers import UserSerializer
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            "bench@example.com", "45Egd!!94", username="bench"
+        )
+        payloads = {
+            "create": lambda: UserSerializer(
+                data={
+                    "email": "new@example.com",
+                    "username": "new.user",
+                    "password": "45Egd!!94",
+                }
+            ),
+            "PATCH profile": lambda: UserSerializer(
+                user, data={"first_name": "Bench", "last_name": "User"}, partial=True
+            ),
+            "PATCH email": lambda: UserSerializer(
+                user, data={"email": "bench2@example.com"}, partial=True
+            ),
+            "PATCH password": lambda: UserSerializer(
+                user, data={"password": "NewPasw123!!"}, partial=True
+            ),
+        }
+        for label, make_serializer in payloads.items():
+            # warm up: validators load their word lists on first use
+            throughput(make_serializer, 10)
+            rate, valid = throughput(make_serializer, args.validations)
+            assert valid, label
+            print(f"{label:<16} {rate:10.0f} validations/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Time `manage.py test` under each settings profile and report the speedup
+of SETTINGS_PROFILE=test over the default (PBKDF2 + PostgreSQL) settings.
+
+    python benchmarks/test_suite_timing.py --runs 3
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from common import APP_DIR
+
+CONFIGURATIONS = {
+    "default": {},
+    "test-postgresql": {"SETTINGS_PROFILE": "test", "TEST_DATABASE": "postgresql"},
+    "test-sqlite": {"SETTINGS_PROFILE": "test", "TEST_DATABASE": "sqlite"},
+}
+
+
+def time_suite(overrides, labels):
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if key not in ("SETTINGS_PROFILE", "TEST_DATABASE")
+    }
+    env.update(overrides)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "manage.py", "test", "--noinput", *labels],
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    lines = result.stderr.strip().splitlines() or [""]
+    summary = [line for line in lines if line.startswith(("Ran ", "OK", "FAILED"))]
+    return elapsed, result.returncode, ", ".join(summary) or lines[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--configurations",
+        nargs="+",
+        choices=CONFIGURATIONS,
+        default=list(CONFIGURATIONS),
+    )
+    parser.add_argument("--runs", type=int, default=1, help="runs per configuration")
+    parser.add_argument("labels", nargs="*", help="test labels, default: all apps")
+    args = parser.parse_args()
+
+    best = {}
+    for name in args.configurations:
+        timings = []
+        for _ in range(args.runs):
+            elapsed, returncode, summary = time_suite(CONFIGURATIONS[name], args.labels)
+            if returncode:
+                print(f"{name:<16} FAILED ({summary})")
+                break
+            timings.append(elapsed)
+        else:
+            best[name] = min(timings)
+            print(f"{name:<16} best of {args.runs}: {best[name]:7.2f}s  ({summary})")
+
+    baseline = best.get("default")
+    if baseline:
+        for name, elapsed in best.items():
+            if name != "default":
+                print(f"{name:<16} {baseline / elapsed:5.1f}x faster than default")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Throughput of the list serializers: RecipeSerializer and
+StaffUserSerializer over model instances against their ValuesSerializer
+counterparts (core.serializers) over values() rows, as the list endpoints
+run them. Each run reads and serializes every row of a throwaway database,
+queries included; both outputs are checked to be equal first.
+
+    SETTINGS_PROFILE=test python benchmarks/values_serializer.py --rows 10000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+from common import setup_django, test_database
+from json_backends import seed
+
+
+def seed_users(count):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    password = make_password("bench-pass")
+    get_user_model().objects.bulk_create(
+        get_user_model()(
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            first_name="Bench",
+            last_name=f"User {i}",
+            password=password,
+        )
+        for i in range(count)
+    )
+
+
+def median_time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from recipe.serializers import RecipeSerializer, RecipeValuesSerializer
+    from recipe.views import RecipeQuerysetMixin
+    from user.serializers import StaffUserSerializer, StaffUserValuesSerializer
+
+    with test_database():
+        seed(args.rows, random.Random(42))
+        seed_users(args.rows - 1)  # plus the author of the recipes
+
+        view = RecipeQuerysetMixin()
+        view.request = SimpleNamespace(user=get_user_model().objects.first())
+        recipes = view.get_queryset().order_by("id")
+        users = get_user_model().objects.order_by("id")
+        cases = {
+            "recipes": (recipes, RecipeSerializer, RecipeValuesSerializer),
+            "users": (users, StaffUserSerializer, StaffUserValuesSerializer),
+        }
+        for label, (queryset, serializer, values_serializer) in cases.items():
+            runs = {
+                "model": lambda: serializer(queryset.all(), many=True).data,
+                "values": lambda: values_serializer(
+                    values_serializer.rows(queryset), many=True
+                ).data,
+            }
+            assert runs["model"]() == runs["values"](), label
+            times = {name: median_time(run, args.repeat) for name, run in runs.items()}
+            for name, seconds in times.items():
+                print(
+                    f"{label:<8} {name:<7} {seconds * 1000:9.1f}ms "
+                    f"{args.rows / seconds:10.0f} rows/s"
+                )
+            print(f"{label:<8} speedup {times['model'] / times['values']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
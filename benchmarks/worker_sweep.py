@@ -0,0 +1,117 @@
+"""
+Find the uWSGI process/thread counts giving the best throughput on this
+machine. For every combination the script starts uWSGI with app/uwsgi.ini,
+loads an endpoint and records req/s and latency, then prints the ranking.
+
+    DB_HOST=... DB_NAME=... DB_USER=... DB_PASSWORD=... ALLOWED_HOSTS=localhost \
+        python benchmarks/worker_sweep.py --processes 1 2 4 8 --threads 1 4
+"""
+
+import argparse
+import os
+import subprocess
+import time
+import uuid
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from common import APP_DIR, http_load, summarize
+from self_load import get_token
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(f"{base_url}/healthz", timeout=1):
+                return
+        except (URLError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"uWSGI did not start within {timeout}s")
+
+
+def start_uwsgi(port, processes, threads):
+    env = {
+        **os.environ,
+        "UWSGI_PORT": str(port),
+        "UWSGI_PROCESSES": str(processes),
+        "UWSGI_THREADS": str(threads),
+        "UWSGI_LISTEN": "1024",
+        "UWSGI_POST_BUFFERING": "65536",
+        "UWSGI_MAX_REQUESTS": "0",
+        "UWSGI_MAX_WORKER_LIFETIME": "0",
+        "UWSGI_RELOAD_ON_RSS": "0",
+        "UWSGI_HARAKIRI": "60",
+        "UWSGI_OFFLOAD_THREADS": "1",
+    }
+    return subprocess.Popen(
+        ["uwsgi", "--ini", "uwsgi.ini"],
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="+",
+        default=sorted({1, max(1, cpus // 2), cpus, cpus * 2}),
+    )
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--path", default="/user/self", help="endpoint to load")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=cpus * 4)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    base_url = f"http://localhost:{args.port}"
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    results = []
+    for processes in args.processes:
+        for threads in args.threads:
+            server = start_uwsgi(args.port, processes, threads)
+            try:
+                wait_until_up(base_url)
+                token = get_token(base_url, email, "Bench-Pass-123!")
+                headers = {"Authorization": f"Token {token}"}
+                # warm up workers and their database connections
+                http_load(
+                    base_url + args.path,
+                    processes * threads * 4,
+                    args.concurrency,
+                    headers=headers,
+                )
+                latencies, errors, elapsed = http_load(
+                    base_url + args.path,
+                    args.requests,
+                    args.concurrency,
+                    headers=headers,
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            stats = summarize(latencies)
+            throughput = len(latencies) / elapsed
+            results.append((throughput, processes, threads, stats, errors))
+            print(
+                f"processes={processes:<3} threads={threads:<3} "
+                f"{throughput:8.0f} req/s p50={stats['p50']:7.2f}ms "
+                f"p95={stats['p95']:7.2f}ms errors={errors}"
+            )
+
+    throughput, processes, threads, stats, _ = max(
+        results, key=lambda result: result[0]
+    )
+    print(
+        f"\nbest on {cpus} CPUs: UWSGI_PROCESSES={processes} UWSGI_THREADS={threads} "
+        f"({throughput:.0f} req/s, p95 {stats['p95']:.2f}ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
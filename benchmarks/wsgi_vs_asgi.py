@@ -0,0 +1,101 @@
+"""
+Compare uWSGI serving the sync user views with uvicorn serving the async
+ones (/user/async/...) under many concurrent clients. Both servers get the
+same number of worker processes; each scenario reports req/s, p50/p99
+latency and errors.
+
+    DB_HOST=... DB_NAME=... DB_USER=... DB_PASSWORD=... ALLOWED_HOSTS=localhost \
+        python benchmarks/wsgi_vs_asgi.py --concurrency 500 --processes 2
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import uuid
+
+from common import APP_DIR, http_load, summarize
+from self_load import get_token
+from worker_sweep import start_uwsgi, wait_until_up
+
+PASSWORD = "Bench-Pass-123!"
+
+
+def start_uvicorn(port, processes):
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.asgi:application",
+            "--port",
+            str(port),
+            "--workers",
+            str(processes),
+            "--backlog",
+            "2048",
+            "--no-access-log",
+        ],
+        cwd=APP_DIR,
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def scenarios(base_url, prefix, email):
+    """(label, url, method, body) for the self and token endpoints"""
+    body = f'{{"email": "{email}", "password": "{PASSWORD}"}}'.encode()
+    return [
+        ("GET self", f"{base_url}/user/{prefix}self", "GET", None),
+        ("POST token", f"{base_url}/user/{prefix}token/", "POST", body),
+    ]
+
+
+def run(name, server, base_url, prefix, args):
+    try:
+        wait_until_up(base_url)
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        token = get_token(base_url, email, PASSWORD)
+        headers = {
+            "Authorization": f"Token {token}",
+            "Content-Type": "application/json",
+        }
+        for label, url, method, body in scenarios(base_url, prefix, email):
+            requests = args.requests if method == "GET" else args.requests // 10
+            latencies, errors, elapsed = http_load(
+                url, requests, args.concurrency, method, headers, body
+            )
+            stats = summarize(latencies)
+            print(
+                f"{name:<8} {label:<11} {len(latencies) / elapsed:8.0f} req/s "
+                f"p50={stats['p50']:8.2f}ms p99={stats['p99']:8.2f}ms errors={errors}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4, help="uWSGI threads")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    # every token request comes from one IP for one email: lift the login
+    # throttles, or all but the first few would be answered 429
+    os.environ["LOGIN_THROTTLE_IP_RATE"] = "1000000/min"
+    os.environ["LOGIN_THROTTLE_EMAIL_RATE"] = "1000000/min"
+
+    base_url = f"http://localhost:{args.port}"
+    uwsgi = start_uwsgi(args.port, args.processes, args.threads)
+    run("uwsgi", uwsgi, base_url, "", args)
+    uvicorn = start_uvicorn(args.port, args.processes)
+    run("uvicorn", uvicorn, base_url, "async/", args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/bin/sh
+# Production entry point: prepare the database and static files, then hand
+# the process over to uWSGI (see app/uwsgi.ini for the tunables), or to
+# uvicorn serving app.asgi with SERVER=asgi
+
+set -e
+
+python manage.py wait_for_db
+python manage.py collectstatic --noinput
+python manage.py migrate
+
+# every worker writes its metrics to files in this directory (see
+# core.metrics); empty it so the samples of a previous run are not added up.
+# The image creates it owned by django-user; only its content is removed
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/vol/web/prometheus}"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+find "$PROMETHEUS_MULTIPROC_DIR" -mindepth 1 -delete
+
+if [ "${SERVER:-wsgi}" = "asgi" ]; then
+    exec uvicorn app.asgi:application \
+        --host 0.0.0.0 --port "${UVICORN_PORT:-8000}" \
+        --workers "${UVICORN_WORKERS:-$(nproc)}" \
+        --backlog "${UVICORN_BACKLOG:-2048}" \
+        --no-access-log
+fi
+
+export UWSGI_PORT="${UWSGI_PORT:-8000}"
+export UWSGI_PROCESSES="${UWSGI_PROCESSES:-$(nproc)}"
+export UWSGI_THREADS="${UWSGI_THREADS:-4}"
+export UWSGI_LISTEN="${UWSGI_LISTEN:-128}"
+export UWSGI_POST_BUFFERING="${UWSGI_POST_BUFFERING:-65536}"
+export UWSGI_MAX_REQUESTS="${UWSGI_MAX_REQUESTS:-5000}"
+export UWSGI_MAX_WORKER_LIFETIME="${UWSGI_MAX_WORKER_LIFETIME:-3600}"
+export UWSGI_RELOAD_ON_RSS="${UWSGI_RELOAD_ON_RSS:-512}"
+export UWSGI_HARAKIRI="${UWSGI_HARAKIRI:-30}"
+export UWSGI_OFFLOAD_THREADS="${UWSGI_OFFLOAD_THREADS:-2}"
+
+exec uwsgi --ini uwsgi.ini